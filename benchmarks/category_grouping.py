@@ -0,0 +1,46 @@
+"""
+Benchmarks splitting the rows of a dataset into categories by selecting each
+category with a boolean mask, as plot_file used to, against grouping all of
+the categories in a single pass with obj_graph.group_categories.
+
+Run from the root of the repository with:
+
+    PYTHONPATH=. python benchmarks/category_grouping.py
+"""
+import numpy as np
+import pandas as pd
+import time
+
+from blendplot import obj_graph
+
+NUM_ROWS = 1000000
+CATEGORY_COUNTS = [1, 10, 100, 1000, 10000]
+
+def group_with_masks(rows, categories):
+    return [(cat, rows[categories == cat]) for cat in pd.unique(categories)]
+
+def group_in_one_pass(rows, categories):
+    (unique_categories, order, starts) = obj_graph.group_categories(categories)
+    rows = rows[order]
+    return [(cat, rows[starts[i]:starts[i + 1]]) for (i, cat) in enumerate(unique_categories)]
+
+def time_function(function, *args):
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+def main():
+    random = np.random.RandomState(0)
+    rows = random.normal(size=(NUM_ROWS, 3))
+
+    print("%10s %12s %12s %8s" % ("categories", "masks (s)", "one pass (s)", "speedup"))
+    for num_categories in CATEGORY_COUNTS:
+        categories = np.array(["category_%s" % i for i in random.randint(0, num_categories, NUM_ROWS)], dtype=object)
+
+        masks_time = time_function(group_with_masks, rows, categories)
+        one_pass_time = time_function(group_in_one_pass, rows, categories)
+
+        print("%10s %12.4f %12.4f %7.1fx" % (num_categories, masks_time, one_pass_time, masks_time / one_pass_time))
+
+if __name__ == "__main__":
+    main()
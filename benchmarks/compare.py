@@ -0,0 +1,65 @@
+"""
+Compares two sets of benchmark results from benchmarks/suite.py, reporting
+the benchmarks that got slower or used more memory.
+
+Run with:
+
+    python benchmarks/compare.py old.json new.json --threshold 0.1
+
+Exits with a non-zero status if any benchmark regressed by more than the
+threshold, so it can be used to catch regressions before upgrading.
+"""
+import argparse
+import json
+import sys
+
+METRICS = ["seconds", "peak_memory_bytes", "output_bytes"]
+
+def result_key(result):
+    return (result["benchmark"], json.dumps(result["parameters"], sort_keys=True))
+
+def compare(old_results, new_results):
+    """
+    Returns a list of (key, metric, old value, new value, relative change)
+    tuples for each metric of each benchmark present in both result sets.
+    """
+    old_by_key = dict((result_key(result), result) for result in old_results)
+
+    changes = []
+    for new in new_results:
+        key = result_key(new)
+        if not key in old_by_key:
+            continue
+
+        old = old_by_key[key]
+        for metric in METRICS:
+            if old[metric] and new[metric] is not None:
+                change = (new[metric] - old[metric]) / old[metric]
+                changes.append((key, metric, old[metric], new[metric], change))
+
+    return changes
+
+def main():
+    parser = argparse.ArgumentParser(description="Compares two sets of blendplot benchmark results.")
+    parser.add_argument("old", help="json file of the baseline results")
+    parser.add_argument("new", help="json file of the results to check")
+    parser.add_argument("--threshold", help="relative increase to count as a regression", type=float, default=0.1)
+    args = parser.parse_args()
+
+    with open(args.old) as old_file, open(args.new) as new_file:
+        old_results = json.load(old_file)["results"]
+        new_results = json.load(new_file)["results"]
+
+    regressions = 0
+    for ((benchmark, parameters), metric, old, new, change) in compare(old_results, new_results):
+        regressed = change > args.threshold
+        regressions += regressed
+        print("%s %-12s %-70s %-18s %14.4g -> %14.4g (%+.1f%%)" % (
+                "!" if regressed else " ", benchmark, parameters, metric, old, new, 100 * change))
+
+    if regressions > 0:
+        print("%s regression(s) above %.0f%%" % (regressions, 100 * args.threshold), file=sys.stderr)
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
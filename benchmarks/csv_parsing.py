@@ -0,0 +1,63 @@
+"""
+Benchmarks reading the plotted columns of a wide csv file with each csv
+engine, with the dtypes of the columns inferred or pinned.
+
+The pyarrow engine is skipped if pyarrow is not installed.
+
+Run from the root of the repository with:
+
+    PYTHONPATH=. python benchmarks/csv_parsing.py --rows 1000000 --columns 100
+"""
+import argparse
+import importlib.util
+import numpy as np
+import os
+import pandas as pd
+import tempfile
+import time
+
+from blendplot import readers
+
+def write_wide_dataset(filename, num_rows, num_columns, chunk_size=100000):
+    """
+    Writes a csv file with the given number of float columns along with a
+    "category" column, a chunk of rows at a time.
+    """
+    random = np.random.RandomState(0)
+    for start in range(0, num_rows, chunk_size):
+        count = min(chunk_size, num_rows - start)
+        data = pd.DataFrame(random.normal(size=(count, num_columns)), columns=["column_%s" % i for i in range(num_columns)])
+        data["category"] = ["category_%s" % i for i in random.randint(0, 100, count)]
+        data.to_csv(filename, mode="w" if start == 0 else "a", header=start == 0, index=False)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--columns", type=int, default=100)
+    args = parser.parse_args()
+
+    engines = ["c"]
+    if importlib.util.find_spec("pyarrow") is not None:
+        engines.append("pyarrow")
+
+    columns = ["column_0", "column_1", "column_2"]
+    used_columns = columns + ["category"]
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = os.path.join(directory, "wide.csv")
+        write_wide_dataset(filename, args.rows, args.columns)
+        print("%s rows, %s columns, %.1f MB" % (args.rows, args.columns + 1, os.path.getsize(filename) / 1e6))
+
+        print("%8s %10s %12s" % ("engine", "dtype", "seconds"))
+        for engine in engines:
+            for column_dtype in [None, "float64", "float32"]:
+                dtypes = readers.pinned_dtypes(columns, "category", column_dtype)
+
+                start = time.perf_counter()
+                readers.CsvReader(engine).read(filename, used_columns, None, dtypes)
+                seconds = time.perf_counter() - start
+
+                print("%8s %10s %12.4f" % (engine, column_dtype or "inferred", seconds))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Generators of synthetic datasets for benchmarking blendplot.
+"""
+import numpy as np
+import pandas as pd
+
+def make_dataset(num_rows, num_categories=None, seed=0):
+    """
+    Returns a synthetic dataset with three normally distributed columns "x",
+    "y" and "z" and, if a number of categories is given, a "category" column.
+
+    Parameters
+    ----------
+    num_rows : int
+        the number of rows in the dataset
+    num_categories : int
+        the number of distinct categories, or None to not include a category
+        column
+    seed : int
+        the seed for the random number generator
+    """
+    random = np.random.RandomState(seed)
+    data = pd.DataFrame({
+            "x": random.normal(0.0, 1.0, num_rows),
+            "y": random.normal(10.0, 5.0, num_rows),
+            "z": random.standard_cauchy(num_rows)
+        })
+
+    if num_categories is not None:
+        codes = random.randint(0, num_categories, num_rows)
+        data["category"] = pd.Categorical.from_codes(codes, ["category_%s" % i for i in range(num_categories)]).astype(str)
+
+    return data
+
+def write_dataset(filename, num_rows, num_categories=None, seed=0, chunk_size=1000000):
+    """
+    Writes a synthetic dataset, as made by make_dataset, to the given csv file
+    a chunk of rows at a time so that very large datasets can be generated.
+
+    Parameters
+    ----------
+    filename : str
+        the path of the csv file to write
+    num_rows : int
+        the number of rows in the dataset
+    num_categories : int
+        the number of distinct categories, or None to not include a category
+        column
+    seed : int
+        the seed for the random number generator
+    chunk_size : int
+        the number of rows to generate at a time
+    """
+    with open(filename, "w") as output_file:
+        for (i, start) in enumerate(range(0, num_rows, chunk_size)):
+            count = min(chunk_size, num_rows - start)
+            chunk = make_dataset(count, num_categories, seed + i)
+            chunk.to_csv(output_file, header=(i == 0), index=False)
@@ -0,0 +1,77 @@
+"""
+Benchmarks writing obj plots through a default buffered text file, as the cli
+used to, against writing them through output.BlockWriter, counting the number
+of writes that reach the underlying file.
+
+The plots are written to a directory given on the command line, so that the
+benchmark can be pointed at the volume the plots are normally written to.
+
+Run from the root of the repository with:
+
+    PYTHONPATH=. python benchmarks/output_writer.py /path/to/scratch
+"""
+import io
+import os
+import sys
+import time
+
+from blendplot import obj_graph
+from blendplot import output
+
+import datasets
+
+NUM_ROWS = 1000000
+NUM_CATEGORIES = 10000
+
+class CountingRawFile(io.RawIOBase):
+    """
+    An unbuffered file that counts the writes made to it.
+    """
+    def __init__(self, filename):
+        self.raw_file = open(filename, "wb", buffering=0)
+        self.writes = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.writes += 1
+        return self.raw_file.write(data)
+
+    def close(self):
+        self.raw_file.close()
+        super().close()
+
+def open_text(raw_file):
+    return io.TextIOWrapper(io.BufferedWriter(raw_file))
+
+def open_blocks(raw_file):
+    return output.BlockWriter(raw_file)
+
+def time_plot(input_filename, output_filename, open_function, instanced):
+    raw_file = CountingRawFile(output_filename)
+    output_file = open_function(raw_file)
+
+    start = time.perf_counter()
+    obj_graph.plot_file(input_filename, output_file, None, ["x", "y", "z"], 2.0, 0.0625, "category", "scale", instanced=instanced)
+    output_file.close()
+    seconds = time.perf_counter() - start
+
+    return (seconds, raw_file.writes)
+
+def main(directory):
+    input_filename = os.path.join(directory, "output_writer.csv")
+    output_filename = os.path.join(directory, "output_writer.obj")
+    datasets.write_dataset(input_filename, NUM_ROWS, NUM_CATEGORIES)
+
+    print("%10s %10s %12s %12s" % ("instanced", "writer", "seconds", "writes"))
+    for instanced in [False, True]:
+        for (name, open_function) in [("text", open_text), ("blocks", open_blocks)]:
+            (seconds, writes) = time_plot(input_filename, output_filename, open_function, instanced)
+            print("%10s %10s %12.4f %12s" % (instanced, name, seconds, writes))
+
+    os.remove(input_filename)
+    os.remove(output_filename)
+
+if __name__ == "__main__":
+    main(sys.argv[1])
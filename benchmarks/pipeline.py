@@ -0,0 +1,83 @@
+"""
+Benchmarks plotting with the stages of the plot run one after another against
+running them concurrently with pipelined=True, writing to a file that is
+throttled to a given bandwidth to stand in for slow storage.
+
+The time spent in each stage is reported alongside the total time, so the
+total can be compared against the sum of the stages and the slowest one.
+
+Run from the root of the repository with:
+
+    PYTHONPATH=. python benchmarks/pipeline.py /path/to/scratch --bandwidth 50
+"""
+import argparse
+import io
+import os
+import time
+
+from blendplot import obj_graph
+from blendplot import output
+from blendplot.stats import PlotStats
+
+import datasets
+
+class ThrottledRawFile(io.RawIOBase):
+    """
+    An unbuffered file that sleeps after each write for as long as writing it
+    would take at the given bandwidth, in megabytes per second.
+    """
+    def __init__(self, filename, bandwidth):
+        self.raw_file = open(filename, "wb", buffering=0)
+        self.bandwidth = bandwidth
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        written = self.raw_file.write(data)
+        if self.bandwidth is not None:
+            time.sleep(written / (self.bandwidth * 1e6))
+        return written
+
+    def close(self):
+        self.raw_file.close()
+        super().close()
+
+def time_plot(input_filename, output_filename, bandwidth, chunk_size, category_column, pipelined):
+    stats = PlotStats()
+    output_file = output.BlockWriter(ThrottledRawFile(output_filename, bandwidth))
+
+    start = time.perf_counter()
+    obj_graph.plot_file(input_filename, output_file, None, ["x", "y", "z"], 2.0, 0.0625, category_column, "scale", chunk_size=chunk_size, stats=stats, pipelined=pipelined)
+    with stats.stage("write"):
+        output_file.close()
+    seconds = time.perf_counter() - start
+
+    return (seconds, stats)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("directory", help="the directory to write the data file and plots to")
+    parser.add_argument("--rows", type=int, default=1000000)
+    parser.add_argument("--bandwidth", help="the megabytes per second to throttle writes to, or 0 to not throttle them", type=float, default=50.0)
+    parser.add_argument("--chunk-size", type=int, default=100000)
+    args = parser.parse_args()
+
+    bandwidth = args.bandwidth if args.bandwidth > 0 else None
+    input_filename = os.path.join(args.directory, "pipeline.csv")
+    output_filename = os.path.join(args.directory, "pipeline.obj")
+    datasets.write_dataset(input_filename, args.rows, 10)
+
+    print("%8s %10s %10s %10s %10s %10s %10s %10s" % ("chunked", "category", "pipelined", "seconds", "read", "scale", "format", "write"))
+    for chunk_size in [None, args.chunk_size]:
+        for category_column in [None, "category"]:
+            for pipelined in [False, True]:
+                (seconds, stats) = time_plot(input_filename, output_filename, bandwidth, chunk_size, category_column, pipelined)
+                stages = [stats.stage_seconds.get(name, 0.0) for name in ["read", "scale", "format", "write"]]
+                print("%8s %10s %10s %10.4f %10.4f %10.4f %10.4f %10.4f" % ((chunk_size is not None, category_column is not None, pipelined, seconds) + tuple(stages)))
+
+    os.remove(input_filename)
+    os.remove(output_filename)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Benchmarks how long blendplot takes to start, by timing fresh Python processes
+that print the help of the cli, make a tiny plot with the cli, import the
+plotting module and make a tiny plot through plot_file.
+
+Each command is run several times and the median wall time is reported, so
+that the results mostly reflect the time spent importing modules rather than
+the plotting itself. Commands that fail are reported along with the last line
+of their error.
+
+When pyCLI is not importable, such as the release of pyCLI on PyPI under
+Python 3, the cli commands are run with a minimal stand in for its
+CommandLineApp on the path, built on argparse as pyCLI is, so that the time
+spent starting the cli can still be measured.
+
+Run from the root of the repository with:
+
+    PYTHONPATH=. python benchmarks/startup.py --runs 10
+
+Pass --imports to also list the packages that took longest to import for the
+tiny plot_file plot, as reported by python -X importtime.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+NUM_ROWS = 10
+
+PLOT_FILE_SCRIPT = """
+import sys
+from blendplot import obj_graph
+with open(sys.argv[2], "w") as output_file:
+    obj_graph.plot_file(sys.argv[1], output_file, None, ["x", "y", "z"], 2.0, 0.0625, None, "scale")
+"""
+
+CLI_SHIM = """
+import argparse
+
+class CommandLineApp:
+    def __init__(self, main):
+        self.main = main
+        self.argparser = argparse.ArgumentParser(description=main.__doc__)
+        self.params = None
+
+    def add_param(self, *args, **kwargs):
+        self.argparser.add_argument(*args, **kwargs)
+
+    def run(self):
+        self.params = self.argparser.parse_args()
+        return self.main(self)
+"""
+
+def write_tiny_dataset(filename):
+    """
+    Writes a csv file with a handful of rows of the columns "x", "y" and "z".
+    """
+    with open(filename, "w") as data_file:
+        data_file.write("x,y,z\n")
+        for i in range(NUM_ROWS):
+            data_file.write("%s,%s,%s\n" % (i, i * i, NUM_ROWS - i))
+
+def cli_environment(directory):
+    """
+    Returns the environment to run the cli commands in, which puts a stand in
+    for pyCLI on the path if pyCLI is not importable, or None to run them in
+    the current environment.
+    """
+    result = subprocess.run([sys.executable, "-c", "import cli.app"], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if result.returncode == 0:
+        return None
+
+    shim_dir = os.path.join(directory, "shim")
+    os.makedirs(os.path.join(shim_dir, "cli"))
+    open(os.path.join(shim_dir, "cli", "__init__.py"), "w").close()
+    with open(os.path.join(shim_dir, "cli", "app.py"), "w") as shim_file:
+        shim_file.write(CLI_SHIM)
+
+    environment = dict(os.environ)
+    paths = [shim_dir] + [path for path in environment.get("PYTHONPATH", "").split(os.pathsep) if path != ""]
+    environment["PYTHONPATH"] = os.pathsep.join(paths)
+    return environment
+
+def commands(input_filename, output_filename, environment=None):
+    """
+    Returns the name, command line and environment of each command to time,
+    running the cli commands in the given environment.
+    """
+    python = sys.executable
+    return [
+            ("blendplot --help", [python, "-m", "blendplot", "--help"], environment),
+            ("blendplot tiny plot", [python, "-m", "blendplot", input_filename, output_filename, "x", "y", "z", "--no-cache"], environment),
+            ("import blendplot", [python, "-c", "import blendplot"], None),
+            ("import obj_graph", [python, "-c", "import blendplot.obj_graph"], None),
+            ("plot_file tiny plot", [python, "-c", PLOT_FILE_SCRIPT, input_filename, output_filename], None)
+        ]
+
+def time_command(command, runs, environment=None):
+    """
+    Runs the given command the given number of times in the given
+    environment, and returns the median wall time in seconds, or None along
+    with the last line of its error if it fails.
+    """
+    seconds = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, env=environment)
+        seconds.append(time.perf_counter() - start)
+
+        if result.returncode != 0:
+            lines = result.stderr.decode("utf-8", "replace").strip().splitlines()
+            return (None, lines[-1] if len(lines) > 0 else "exit code %s" % result.returncode)
+
+    return (statistics.median(seconds), None)
+
+def slowest_imports(command, count):
+    """
+    Returns the packages with the largest cumulative import times in
+    microseconds when running the given python command.
+    """
+    result = subprocess.run([command[0], "-X", "importtime"] + command[1:], stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+
+    imports = []
+    for line in result.stderr.decode("utf-8", "replace").splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        (self_time, cumulative, name) = line[len("import time:"):].split("|")
+        # Only packages, as the times of their submodules are included in them
+        if not "." in name:
+            imports.append((int(cumulative), name.strip()))
+
+    return sorted(imports, reverse=True)[:count]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--imports", help="also list the slowest packages to import for the tiny plot_file plot", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        input_filename = os.path.join(directory, "tiny.csv")
+        output_filename = os.path.join(directory, "tiny.obj")
+        write_tiny_dataset(input_filename)
+
+        environment = cli_environment(directory)
+        if environment is not None:
+            print("pyCLI is not importable, so the cli commands use a stand in for it")
+            print()
+
+        print("%-22s %12s" % ("command", "seconds"))
+        for (name, command, command_environment) in commands(input_filename, output_filename, environment):
+            (seconds, error) = time_command(command, args.runs, command_environment)
+            if error is None:
+                print("%-22s %12.4f" % (name, seconds))
+            else:
+                print("%-22s %12s  %s" % (name, "failed", error))
+
+        if args.imports:
+            print()
+            print("%-40s %12s" % ("slowest packages imported", "seconds"))
+            (name, command, command_environment) = commands(input_filename, output_filename)[4]
+            for (cumulative, module) in slowest_imports(command, 10):
+                print("%-40s %12.4f" % (module, cumulative / 1e6))
+
+if __name__ == "__main__":
+    main()
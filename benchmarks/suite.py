@@ -0,0 +1,199 @@
+"""
+A benchmark suite for blendplot, measuring the wall time, throughput, peak
+memory use and output size of plot_file, plot and cube_string on synthetic
+datasets.
+
+Run from the root of the repository with:
+
+    PYTHONPATH=. python benchmarks/suite.py --output results.json
+
+The results are written as a JSON document, which can be compared against the
+results of another version with benchmarks/compare.py. Peak memory is measured
+with tracemalloc in a separate run from the timing, as tracing slows down
+allocations. It covers memory allocated by Python and numpy but not all of the
+memory used internally by the pandas csv parser. Output is written
+to a sink that only counts bytes, so disk speed does not affect the results.
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from blendplot import obj_graph
+
+import datasets
+
+SCALE_FUNCTIONS = ["maxabs_scale", "minmax_scale", "normalize", "robust_scale", "scale", "none"]
+
+class CountingFile:
+    """
+    A file-like object that discards everything written to it, only keeping
+    count of the number of bytes written.
+    """
+    def __init__(self):
+        self.bytes_written = 0
+
+    def write(self, data):
+        self.bytes_written += len(data)
+        return len(data)
+
+MEASURE_MEMORY = True
+
+def measure(function):
+    """
+    Runs the given function and returns its return value along with the wall
+    time in seconds and peak traced memory in bytes that it used.
+
+    The function is run a second time to measure its memory use, unless
+    MEASURE_MEMORY is turned off, in which case the peak memory is None.
+    """
+    start = time.perf_counter()
+    value = function()
+    seconds = time.perf_counter() - start
+
+    peak = None
+    if MEASURE_MEMORY:
+        tracemalloc.start()
+        try:
+            function()
+            (current, peak) = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+    return (value, seconds, peak)
+
+def result(benchmark, parameters, points, seconds, peak_memory, output_bytes):
+    return {
+            "benchmark": benchmark,
+            "parameters": parameters,
+            "points": points,
+            "seconds": seconds,
+            "points_per_second": points / seconds if seconds > 0 else None,
+            "peak_memory_bytes": peak_memory,
+            "output_bytes": output_bytes
+        }
+
+def bench_plot_file(input_filename, num_rows, num_categories, scale_function, csv_engine="c"):
+    category_column = None if num_categories is None else "category"
+
+    def run():
+        output_file = CountingFile()
+        obj_graph.plot_file(input_filename, output_file, None, ["x", "y", "z"], 2.0, 0.0625, category_column, scale_function, csv_engine=csv_engine)
+        return output_file
+
+    (output_file, seconds, peak) = measure(run)
+    points = num_rows
+
+    parameters = {"rows": num_rows, "categories": num_categories, "scale_function": scale_function}
+    # The default engine is left out of the parameters, so that the results
+    # stay comparable with those of versions without a choice of engine
+    if csv_engine != "c":
+        parameters["csv_engine"] = csv_engine
+    return result("plot_file", parameters, points, seconds, peak, output_file.bytes_written)
+
+def bench_plot(num_rows):
+    rows = datasets.make_dataset(num_rows)[["x", "y", "z"]].to_numpy()
+
+    def run():
+        output_file = CountingFile()
+        obj_graph.plot(rows, 2.0, 0.0625, output_file, 0)
+        return output_file
+
+    (output_file, seconds, peak) = measure(run)
+
+    return result("plot", {"rows": num_rows}, num_rows, seconds, peak, output_file.bytes_written)
+
+def bench_cube_string(num_rows):
+    rows = datasets.make_dataset(num_rows)[["x", "y", "z"]].to_numpy().tolist()
+
+    def run():
+        output_bytes = 0
+        for (i, (x, y, z)) in enumerate(rows):
+            output_bytes += len(obj_graph.cube_string(x, y, z, 0.0625, 8 * i))
+        return output_bytes
+
+    (output_bytes, seconds, peak) = measure(run)
+
+    return result("cube_string", {"rows": num_rows}, num_rows, seconds, peak, output_bytes)
+
+def run_suite(sizes, category_counts, scale_functions, cube_string_max_rows, data_dir, csv_engines=["c"]):
+    results = []
+    for num_rows in sizes:
+        for num_categories in category_counts:
+            input_filename = os.path.join(data_dir, "data_%s_%s.csv" % (num_rows, num_categories))
+            datasets.write_dataset(input_filename, num_rows, num_categories)
+
+            for scale_function in scale_functions:
+                for csv_engine in csv_engines:
+                    results.append(bench_plot_file(input_filename, num_rows, num_categories, scale_function, csv_engine))
+                    print_result(results[-1])
+
+            os.remove(input_filename)
+
+        results.append(bench_plot(num_rows))
+        print_result(results[-1])
+
+        if num_rows <= cube_string_max_rows:
+            results.append(bench_cube_string(num_rows))
+            print_result(results[-1])
+
+    return results
+
+def print_result(result):
+    parameters = " ".join("%s=%s" % (key, value) for (key, value) in sorted(result["parameters"].items()))
+    peak_memory = result["peak_memory_bytes"]
+    print("%-12s %-70s %10.4fs %14.0f points/s %8s MB" % (
+            result["benchmark"],
+            parameters,
+            result["seconds"],
+            result["points_per_second"] or 0.0,
+            "-" if peak_memory is None else "%.1f" % (peak_memory / 1e6)
+        ), file=sys.stderr)
+
+def environment():
+    return {
+            "timestamp": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "cpus": os.cpu_count()
+        }
+
+def parse_category_count(value):
+    return None if value == "none" else int(value)
+
+def main():
+    parser = argparse.ArgumentParser(description="Runs the blendplot benchmark suite.")
+    parser.add_argument("--output", help="json file to write the results to, defaults to stdout", default=None)
+    parser.add_argument("--sizes", help="numbers of rows to benchmark", nargs="+", type=int, default=[10 ** 3, 10 ** 4, 10 ** 5, 10 ** 6, 10 ** 7])
+    parser.add_argument("--categories", help="numbers of categories to benchmark, or \"none\" for no category column", nargs="+", type=parse_category_count, default=[None, 10, 1000])
+    parser.add_argument("--scale-functions", help="scale functions to benchmark", nargs="+", default=SCALE_FUNCTIONS)
+    parser.add_argument("--cube-string-max-rows", help="largest number of rows to benchmark cube_string with", type=int, default=10 ** 5)
+    parser.add_argument("--csv-engines", help="csv engines to benchmark plot_file with", nargs="+", choices=["c", "pyarrow"], default=["c"])
+    parser.add_argument("--skip-memory", help="do not measure peak memory use, halving the run time", action="store_true")
+    args = parser.parse_args()
+
+    global MEASURE_MEMORY
+    MEASURE_MEMORY = not args.skip_memory
+
+    with tempfile.TemporaryDirectory() as data_dir:
+        results = run_suite(args.sizes, args.categories, args.scale_functions, args.cube_string_max_rows, data_dir, args.csv_engines)
+
+    document = {"environment": environment(), "results": results}
+    if args.output is None:
+        json.dump(document, sys.stdout, indent=2)
+    else:
+        with open(args.output, "w") as output_file:
+            json.dump(document, output_file, indent=2)
+
+if __name__ == "__main__":
+    main()
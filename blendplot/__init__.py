@@ -1 +1,13 @@
-import blendplot.obj_graph
+"""
+Plotting 3D data as models for use in Blender.
+
+The plotting modules are imported when first used rather than with the
+package, as they import numpy and pandas, so that the cli can print its help
+and the plot client can start without importing them.
+"""
+import importlib
+
+def __getattr__(name):
+    if name == "obj_graph":
+        return importlib.import_module(".obj_graph", __name__)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
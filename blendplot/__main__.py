@@ -5,7 +5,8 @@ import cli.app
 import sys
 import time
 
-from . import obj_graph
+from . import output
+from .stats import PlotStats
 
 @cli.app.CommandLineApp
 def blendplot(app):
@@ -17,23 +18,10 @@ def blendplot(app):
     app : cli.app.CommandLineApp
         the cli information
     """
-    input_filename = app.params.input_file
-    output_filename = app.params.output_file
-    num_rows = app.params.rows
-    columns = [
-                app.params.x,
-                app.params.y,
-                app.params.z
-            ]
-    spacing = app.params.spacing
-    point_size = app.params.point_size
-    category_column = app.params.category
-    scale_function = app.params.scale_function
-
-    main(input_filename, output_filename, num_rows, columns, spacing, point_size, category_column, scale_function)
+    run_params(app.params)
 
 blendplot.add_param("input_file", help="data file to plot", type=str)
-blendplot.add_param("output_file", help="obj file to output to", type=str)
+blendplot.add_param("output_file", help="obj, ply or glb file to output to, compressed with gzip or zstd if it ends in .gz or .zst", type=str)
 blendplot.add_param("x", help="x column", type=str)
 blendplot.add_param("y", help="y column", type=str)
 blendplot.add_param("z", help="z column", type=str)
@@ -43,8 +31,72 @@ blendplot.add_param("--spacing", help="the scaling factor to space the data out
 blendplot.add_param("--point-size", help="the size to use for the data points", default=0.0625, type=float)
 blendplot.add_param("-c", "--category", help="the column to use for point categorization", default=None, type=str)
 blendplot.add_param("--scale-function", help="the function to use for scaling the data, valid options are \"maxabs_scale\", \"minmax_scale\", \"normalize\", \"robust_scale\", \"scale\", and \"none\"", default="scale", type=str)
+blendplot.add_param("--chunk-size", help="the number of rows to read from the data file at a time, limiting memory use for large data files", default=None, type=int)
+blendplot.add_param("--format", help="the format of the output file, valid options are \"obj\", \"ply\" and \"glb\", defaults to the output file extension or \"obj\"", default=None, type=str)
+blendplot.add_param("--instanced", help="plot each point as a single vertex along with one cube to instance onto them", action="store_true")
+blendplot.add_param("-j", "--jobs", help="the number of processes to use for writing obj files", default=1, type=int)
+blendplot.add_param("--stats", help="print the time spent in each stage of the plot and the amount of data plotted to stderr, valid options are \"json\" and \"text\"", default=None, type=str)
+blendplot.add_param("--voxel-size", help="downsample the points to one point per voxel of this size in each category, after scaling and spacing", default=None, type=float)
+blendplot.add_param("--max-points", help="downsample the points to at most this many points, using the smallest voxel size that fits", default=None, type=int)
+blendplot.add_param("--no-cache", help="always read and scale the data file, rather than reusing the scaled data from a previous plot of the same data", action="store_true")
+blendplot.add_param("--cache-dir", help="the directory to cache scaled data in, defaults to ~/.cache/blendplot", default=None, type=str)
+blendplot.add_param("--csv-engine", help="the parser to use for csv data files, valid options are \"c\" and \"pyarrow\", which is multithreaded", default="c", type=str)
+blendplot.add_param("--dtype", help="read the plotted columns as this dtype rather than inferring it, and the category column as categorical, valid options are \"float64\" and \"float32\"", default=None, type=str)
+blendplot.add_param("--incremental", help="only plot the rows added to the csv data file since it was last plotted to the obj file, appending them to the obj file", action="store_true")
+blendplot.add_param("--rescale", help="with --incremental, rebuild the plot with the scaling fitted to all of the data, rather than appending to it", action="store_true")
+blendplot.add_param("--primitive", help="the shape to plot each point as, valid options are \"cube\", \"tetrahedron\", \"triangle\", and \"point\", which take 8, 4, 3 and 1 verticies per point", default="cube", type=str)
+blendplot.add_param("--dedup", help="collapse points at exactly the same position in the same category into a single point, reporting the number of points collapsed", action="store_true")
+blendplot.add_param("--compression-threads", help="the number of threads to compress .gz and .zst output files with", default=1, type=int)
+blendplot.add_param("--precision", help="the number of decimal places to round the coordinates of obj files to, making them smaller and faster to write, defaults to full precision", default=None, type=int)
+blendplot.add_param("--pipelined", help="read, scale, format and write the plot concurrently on separate threads, so that slow storage does not hold up formatting, cannot be used with --jobs", action="store_true")
+
+def run_params(params, plot_cache=None):
+    """
+    Plots the data in the input file to the output file with the settings
+    given by the parsed command line arguments.
+
+    Parameters
+    ----------
+    params : argparse.Namespace
+        the parsed command line arguments
+    plot_cache : cache.PlotCache
+        the cache to use instead of opening the cache directory, or None to
+        open the cache directory given by the arguments
+    """
+    input_filename = params.input_file
+    output_filename = params.output_file
+    num_rows = params.rows
+    columns = [
+                params.x,
+                params.y,
+                params.z
+            ]
+    spacing = params.spacing
+    point_size = params.point_size
+    category_column = params.category
+    scale_function = params.scale_function
+    chunk_size = params.chunk_size
+    output_format = params.format
+    instanced = params.instanced
+    jobs = params.jobs
+    stats_format = params.stats
+    voxel_size = params.voxel_size
+    max_points = params.max_points
+    use_cache = not params.no_cache
+    cache_dir = params.cache_dir
+    csv_engine = params.csv_engine
+    column_dtype = params.dtype
+    incremental = params.incremental
+    rescale = params.rescale
+    primitive = params.primitive
+    dedup = params.dedup
+    compression_threads = params.compression_threads
+    precision = params.precision
+    pipelined = params.pipelined
 
-def main(input_filename, output_filename, num_rows, columns, spacing, point_size, category_column, scale_function):
+    main(input_filename, output_filename, num_rows, columns, spacing, point_size, category_column, scale_function, chunk_size, output_format, instanced, jobs, stats_format, voxel_size, max_points, use_cache, cache_dir, csv_engine, column_dtype, incremental, rescale, primitive, dedup, compression_threads, precision, plot_cache, pipelined)
+
+def main(input_filename, output_filename, num_rows, columns, spacing, point_size, category_column, scale_function, chunk_size=None, output_format=None, instanced=False, jobs=1, stats_format=None, voxel_size=None, max_points=None, use_cache=True, cache_dir=None, csv_engine="c", column_dtype=None, incremental=False, rescale=False, primitive="cube", dedup=False, compression_threads=1, precision=None, plot_cache=None, pipelined=False):
     """
     Plots the data in the given input file to the given output file with the
     specified settings.
@@ -68,6 +120,58 @@ def main(input_filename, output_filename, num_rows, columns, spacing, point_size
         categories
     scale_function : str
         the name of the data scaling function to use
+    chunk_size : int
+        the number of rows to read from the data file at a time, or None to
+        read the whole data file at once
+    output_format : str
+        the name of the output file format, or None to pick it based on the
+        output file extension
+    instanced : bool
+        whether to plot each point as a single vertex along with one cube to
+        instance onto them
+    jobs : int
+        the number of processes to use for writing obj files
+    stats_format : str
+        the format to print stats about the plot in, either "json" or "text",
+        or None to not print stats
+    voxel_size : float
+        the size of the voxels to downsample the points to, or None to not
+        downsample
+    max_points : int
+        the maximum number of points to plot, or None to not limit the number
+        of points
+    use_cache : bool
+        whether to reuse the scaled data from previous plots of the same data
+    cache_dir : str
+        the directory to cache scaled data in, or None to use the default
+    csv_engine : str
+        the parser to use for csv data files, either "c" or "pyarrow"
+    column_dtype : str
+        the dtype to read the plotted columns as, either "float64" or
+        "float32", or None to infer the dtypes of the columns
+    incremental : bool
+        whether to only plot the rows added to the data file since it was last
+        plotted to the output file, appending them to the output file
+    rescale : bool
+        whether to rebuild an incremental plot with the scaling fitted to all
+        of the data, rather than appending to it
+    primitive : str
+        the name of the shape to plot each point as
+    dedup : bool
+        whether to collapse points at exactly the same position in the same
+        category into a single point
+    compression_threads : int
+        the number of threads to compress the output file with, if its name
+        ends in .gz or .zst
+    precision : int
+        the number of decimal places to round the coordinates of obj files
+        to, or None to write them at full precision
+    plot_cache : cache.PlotCache
+        the cache to use instead of opening one in the cache directory, such
+        as a cache.MemoryCache kept by a long running server
+    pipelined : bool
+        whether to run the stages of the plot concurrently on separate
+        threads, which cannot be used with more than one job
     """
     valid_scale_functions = ["maxabs_scale", "minmax_scale", "normalize", "robust_scale", "scale", "none"]
     if not scale_function in valid_scale_functions:
@@ -77,18 +181,164 @@ def main(input_filename, output_filename, num_rows, columns, spacing, point_size
         print("Valid scale-functions are: %s" % valid_function_list, file=sys.stderr)
         sys.exit(1)
 
-    output_file = open(output_filename, "w")
+    if output_format is None:
+        output_format = output.format_for(output_filename)
+
+    valid_output_formats = ["obj", "ply", "glb"]
+    if not output_format in valid_output_formats:
+        print("Invalid format: %s" % output_format, file=sys.stderr)
+
+        valid_format_list = ", ".join(valid_output_formats)
+        print("Valid formats are: %s" % valid_format_list, file=sys.stderr)
+        sys.exit(1)
+
+    valid_stats_formats = ["json", "text"]
+    if not stats_format is None and not stats_format in valid_stats_formats:
+        print("Invalid stats format: %s" % stats_format, file=sys.stderr)
+
+        valid_stats_list = ", ".join(valid_stats_formats)
+        print("Valid stats formats are: %s" % valid_stats_list, file=sys.stderr)
+        sys.exit(1)
+
+    valid_csv_engines = ["c", "pyarrow"]
+    if not csv_engine in valid_csv_engines:
+        print("Invalid csv engine: %s" % csv_engine, file=sys.stderr)
+
+        valid_engine_list = ", ".join(valid_csv_engines)
+        print("Valid csv engines are: %s" % valid_engine_list, file=sys.stderr)
+        sys.exit(1)
+
+    valid_column_dtypes = ["float64", "float32"]
+    if not column_dtype is None and not column_dtype in valid_column_dtypes:
+        print("Invalid dtype: %s" % column_dtype, file=sys.stderr)
+
+        valid_dtype_list = ", ".join(valid_column_dtypes)
+        print("Valid dtypes are: %s" % valid_dtype_list, file=sys.stderr)
+        sys.exit(1)
+
+    valid_primitives = ["cube", "tetrahedron", "triangle", "point"]
+    if not primitive in valid_primitives:
+        print("Invalid primitive: %s" % primitive, file=sys.stderr)
+
+        valid_primitive_list = ", ".join(valid_primitives)
+        print("Valid primitives are: %s" % valid_primitive_list, file=sys.stderr)
+        sys.exit(1)
+
+    from . import precision as fixed_precision
+    if not precision is None and not fixed_precision.valid_decimals(precision):
+        print("Invalid precision: %s" % precision, file=sys.stderr)
+        print("Valid precisions are whole numbers of decimal places from 0 to %s" % fixed_precision.MAX_DECIMALS, file=sys.stderr)
+        sys.exit(1)
+
+    if pipelined and jobs > 1:
+        print("Invalid options for --pipelined: --jobs %s" % jobs, file=sys.stderr)
+        print("Pipelined plots are formatted in a single process, as processes cannot safely be forked while the threads of the pipeline are running", file=sys.stderr)
+        sys.exit(1)
+
+    if incremental:
+        incompatible = [
+                    ("--format %s" % output_format, output_format != "obj"),
+                    ("--rows", num_rows is not None),
+                    ("--chunk-size", chunk_size is not None),
+                    ("--voxel-size", voxel_size is not None),
+                    ("--max-points", max_points is not None),
+                    ("--dedup", dedup),
+                    ("--pipelined", pipelined),
+                    ("--csv-engine %s" % csv_engine, csv_engine != "c"),
+                    ("--dtype", column_dtype is not None),
+                    ("compressed output", output.compression_for(output_filename) is not None)
+                ]
+        incompatible = [option for (option, used) in incompatible if used]
+        if len(incompatible) > 0:
+            print("Invalid options for --incremental: %s" % ", ".join(incompatible), file=sys.stderr)
+            print("Incremental plots are written in uncompressed obj format from whole csv data files", file=sys.stderr)
+            sys.exit(1)
+
+        main_incremental(input_filename, output_filename, columns, spacing, point_size, category_column, scale_function, instanced, rescale, stats_format, primitive, precision)
+        return
+
+    # The plotting modules import numpy and pandas, which take far longer
+    # than the rest of startup, so they are only imported once the arguments
+    # are known to be valid
+    from . import obj_graph
+    from .cache import PlotCache
+
+    stats = PlotStats()
+    if not use_cache:
+        plot_cache = None
+    elif plot_cache is None:
+        plot_cache = PlotCache(cache_dir)
+
+    try:
+        output_file = output.open_output(output_filename, compression_threads=compression_threads)
+    except ImportError as error:
+        print("Unable to write %s: %s" % (output_filename, error), file=sys.stderr)
+        sys.exit(1)
+
     start = time.time()
-    points = obj_graph.plot_file(input_filename, output_file, num_rows, columns, spacing, point_size, category_column, scale_function)
+    points = obj_graph.plot_file(input_filename, output_file, num_rows, columns, spacing, point_size, category_column, scale_function, chunk_size, output_format, instanced, jobs, stats, voxel_size, max_points, plot_cache, csv_engine, column_dtype, primitive, dedup, precision, pipelined)
+
+    # Closing waits for any compression still running in the background
+    with stats.stage("write"):
+        output_file.close()
     end = time.time()
-    output_file.close()
+    stats.count("output_writes", output_file.raw_writes)
+    if isinstance(output_file.raw_file, output.CompressedFile):
+        stats.count("compressed_bytes", output_file.raw_file.bytes_written)
+
+    if stats_format == "json":
+        print(stats.to_json(), file=sys.stderr)
+    elif stats_format == "text":
+        print(stats.to_text(), file=sys.stderr)
 
     if points is None:
         sys.exit(1)
     else:
         print("Wrote plot file to %s" % output_filename)
+        if "points_removed" in stats.counters:
+            print("Removed %s points by downsampling to voxels of size %s" % (stats.counters["points_removed"], stats.counters["voxel_size"]))
+        if "duplicates_removed" in stats.counters:
+            print("Collapsed %s duplicate points, with up to %s points at one position" % (stats.counters["duplicates_removed"], stats.counters["max_multiplicity"]))
+        print_precision_error(stats)
         print("Plotted %s points in %f seconds" % (points, end - start))
 
+def main_incremental(input_filename, output_filename, columns, spacing, point_size, category_column, scale_function, instanced, rescale, stats_format, primitive, precision):
+    """
+    Plots the rows added to the given input file since it was last plotted to
+    the given obj file, appending them to the obj file, or rebuilds the plot.
+    """
+    from .incremental import plot_file_incremental
+
+    stats = PlotStats()
+
+    start = time.time()
+    result = plot_file_incremental(input_filename, output_filename, columns, spacing, point_size, category_column, scale_function, instanced, rescale, stats, primitive, precision)
+    end = time.time()
+
+    if stats_format == "json":
+        print(stats.to_json(), file=sys.stderr)
+    elif stats_format == "text":
+        print(stats.to_text(), file=sys.stderr)
+
+    if result is None:
+        sys.exit(1)
+
+    (points, added_points, rebuilt) = result
+    if rebuilt:
+        print("Wrote plot file to %s" % output_filename)
+    else:
+        print("Appended %s points to %s" % (added_points, output_filename))
+    print_precision_error(stats)
+    print("Plotted %s points in %f seconds" % (points, end - start))
+
+def print_precision_error(stats):
+    """
+    Prints how far rounding the coordinates of the plot could have moved each
+    vertex, if they were rounded.
+    """
+    if "max_position_error" in stats.counters:
+        print("Rounded coordinates, moving verticies by at most %g, %.3g%% of the point size" % (stats.counters["max_position_error"], 100.0 * stats.counters["max_relative_error"]))
+
 def run():
     blendplot.run()
 
@@ -0,0 +1,294 @@
+"""
+Making many plots from a single data file at once.
+
+The plots to make are listed in a json job file, along with the data file to
+read them from:
+
+    {
+        "input_file": "survey.csv",
+        "plots": [
+            {"output_file": "a.obj", "columns": ["x", "y", "z"]},
+            {"output_file": "b.ply", "columns": ["x", "y", "w"], "category": "type", "scale_function": "robust_scale"}
+        ]
+    }
+
+The data file is read once, with only the columns used by the plots, and the
+scaled data is shared between plots of the same columns, category and scale
+function, so that each plot only needs to be formatted and written. The plots
+can be made in parallel with multiple processes.
+"""
+import concurrent.futures
+import json
+import os
+
+from . import obj_graph
+from . import output
+from . import precision
+from . import readers
+from .stats import PlotStats
+
+VALID_SCALE_FUNCTIONS = ["maxabs_scale", "minmax_scale", "normalize", "robust_scale", "scale", "none"]
+
+VALID_OUTPUT_FORMATS = ["obj", "ply", "glb"]
+
+VALID_CSV_ENGINES = ["c", "pyarrow"]
+
+VALID_COLUMN_DTYPES = ["float64", "float32"]
+
+VALID_PRIMITIVES = ["cube", "tetrahedron", "triangle", "point"]
+
+# The scaled data of the batch being made, in each worker process
+worker_scaled = None
+
+class PlotJob:
+    """
+    A plot to make as part of a batch.
+
+    Parameters
+    ----------
+    output_file : str
+        the path of the file to write the plot to
+    columns : List[str]
+        the columns to plot
+    category_column : str
+        the column to categorize the points by, or None to plot data without
+        categories
+    scale_function : str
+        the name of the data scaling function to use
+    spacing : float
+        the scaling of the data range
+    point_size : float
+        the size to use for the data points
+    output_format : str
+        the name of the output file format, or None to pick it based on the
+        output file extension
+    instanced : bool
+        whether to plot each point as a single vertex along with one cube to
+        instance onto them
+    voxel_size : float
+        the size of the voxels to downsample the points to, or None to not
+        downsample
+    max_points : int
+        the maximum number of points to plot, or None to not limit the number
+        of points
+    primitive : str
+        the name of the shape to plot each point as
+    dedup : bool
+        whether to collapse points at exactly the same scaled position in the
+        same category into a single point
+    precision : int
+        the number of decimal places to round the coordinates of obj output
+        to, or None to write them at full precision
+    """
+    def __init__(self, output_file, columns, category_column=None, scale_function="scale", spacing=2.0, point_size=0.0625, output_format=None, instanced=False, voxel_size=None, max_points=None, primitive="cube", dedup=False, precision=None):
+        if output_format is None:
+            output_format = output.format_for(output_file)
+
+        self.output_file = output_file
+        self.columns = list(columns)
+        self.category_column = category_column
+        self.scale_function = scale_function
+        self.spacing = spacing
+        self.point_size = point_size
+        self.output_format = output_format
+        self.instanced = instanced
+        self.voxel_size = voxel_size
+        self.max_points = max_points
+        self.primitive = primitive
+        self.dedup = dedup
+        self.precision = precision
+
+    @property
+    def scale_key(self):
+        """
+        The settings that the scaled data of the plot depends on, which plots
+        can share scaled data by.
+        """
+        return (tuple(self.columns), self.category_column, self.scale_function)
+
+JOB_KEYS = {
+            "output_file": "output_file",
+            "columns": "columns",
+            "category": "category_column",
+            "scale_function": "scale_function",
+            "spacing": "spacing",
+            "point_size": "point_size",
+            "format": "output_format",
+            "instanced": "instanced",
+            "voxel_size": "voxel_size",
+            "max_points": "max_points",
+            "primitive": "primitive",
+            "dedup": "dedup",
+            "precision": "precision"
+        }
+
+def load_job_file(job_filename):
+    """
+    Reads the given job file. Relative paths in the job file are relative to
+    the directory of the job file.
+
+    Parameters
+    ----------
+    job_filename : str
+        the path to the job file
+
+    Returns
+    -------
+    batch : (str, int, List[PlotJob], str, str)
+        the path to the data file, the number of rows to plot or None to plot
+        all rows, the plots to make, the csv engine and the column dtype
+
+    Raises
+    ------
+    ValueError
+        if the job file is invalid
+    """
+    with open(job_filename, "r") as job_file:
+        batch = json.load(job_file)
+
+    directory = os.path.dirname(os.path.abspath(job_filename))
+    resolve = lambda path: os.path.join(directory, path)
+
+    if not "input_file" in batch or not "plots" in batch:
+        raise ValueError("The job file must list an input_file and plots")
+
+    csv_engine = batch.get("csv_engine", "c")
+    if not csv_engine in VALID_CSV_ENGINES:
+        raise ValueError("Invalid csv engine: %s\nValid csv engines are: %s" % (csv_engine, ", ".join(VALID_CSV_ENGINES)))
+
+    column_dtype = batch.get("dtype")
+    if not column_dtype is None and not column_dtype in VALID_COLUMN_DTYPES:
+        raise ValueError("Invalid dtype: %s\nValid dtypes are: %s" % (column_dtype, ", ".join(VALID_COLUMN_DTYPES)))
+
+    jobs = []
+    for (i, plot) in enumerate(batch["plots"]):
+        unknown = [key for key in plot if not key in JOB_KEYS]
+        if len(unknown) > 0:
+            raise ValueError("Unknown setting(s) in plot %s: %s\nValid settings are: %s" % (i + 1, ", ".join(unknown), ", ".join(JOB_KEYS)))
+        if not "output_file" in plot or not "columns" in plot:
+            raise ValueError("Plot %s must have an output_file and columns" % (i + 1))
+        if len(plot["columns"]) != 3:
+            raise ValueError("Plot %s must have three columns, but has %s" % (i + 1, len(plot["columns"])))
+
+        job = PlotJob(**dict((JOB_KEYS[key], value) for (key, value) in plot.items()))
+        job.output_file = resolve(job.output_file)
+
+        if not job.scale_function in VALID_SCALE_FUNCTIONS:
+            raise ValueError("Invalid scale-function in plot %s: %s\nValid scale-functions are: %s" % (i + 1, job.scale_function, ", ".join(VALID_SCALE_FUNCTIONS)))
+        if not job.output_format in VALID_OUTPUT_FORMATS:
+            raise ValueError("Invalid format in plot %s: %s\nValid formats are: %s" % (i + 1, job.output_format, ", ".join(VALID_OUTPUT_FORMATS)))
+        if not job.primitive in VALID_PRIMITIVES:
+            raise ValueError("Invalid primitive in plot %s: %s\nValid primitives are: %s" % (i + 1, job.primitive, ", ".join(VALID_PRIMITIVES)))
+        if job.precision is not None and not precision.valid_decimals(job.precision):
+            raise ValueError("Invalid precision in plot %s: %s\nValid precisions are whole numbers of decimal places from 0 to %s" % (i + 1, job.precision, precision.MAX_DECIMALS))
+
+        jobs.append(job)
+
+    return (resolve(batch["input_file"]), batch.get("rows"), jobs, csv_engine, column_dtype)
+
+def run_batch(input_filename, jobs, num_rows=None, workers=1, csv_engine="c", column_dtype=None, stats=None):
+    """
+    Makes the given plots from the given data file, reading the data file
+    only once.
+
+    Parameters
+    ----------
+    input_filename : str
+        the path to the input data file
+    jobs : List[PlotJob]
+        the plots to make
+    num_rows : int
+        the number of rows to plot, or None to plot all rows
+    workers : int
+        the number of processes to make plots with at once
+    csv_engine : str
+        the parser to use for csv data files, either "c" or "pyarrow"
+    column_dtype : str
+        the dtype to read the plotted columns as, either "float64" or
+        "float32", or None to infer the dtypes of the columns
+    stats : stats.PlotStats
+        the stats to record the time spent reading and scaling the data into,
+        or None to not record stats
+
+    Returns
+    -------
+    points : List[int]
+        the number of points in each plot, or None if the plots are unable to
+        be made
+    """
+    if stats is None:
+        stats = PlotStats()
+
+    with stats.stage("read"):
+        header = readers.read_header(input_filename, csv_engine)
+        if header is None:
+            return None
+
+    with stats.stage("validate"):
+        for job in jobs:
+            if not obj_graph.check_columns(header, job.columns, job.category_column):
+                return None
+
+    plot_columns = readers.unique(column for job in jobs for column in job.columns)
+    category_columns = readers.unique(job.category_column for job in jobs if job.category_column is not None)
+
+    dtypes = readers.pinned_dtypes(plot_columns, None, column_dtype)
+    if dtypes is not None:
+        for column in category_columns:
+            dtypes.setdefault(column, "category")
+
+    with stats.stage("read"):
+        reader = readers.reader_for(input_filename, csv_engine)
+        data = reader.read(input_filename, plot_columns + category_columns, num_rows, dtypes)
+
+    # Each distinct set of columns, category and scale function is only
+    # scaled once, no matter how many plots use it
+    scaled = {}
+    for job in jobs:
+        if not job.scale_key in scaled:
+            scaled[job.scale_key] = obj_graph.scale_frame(data, job.columns, job.category_column, job.scale_function, stats)
+    del data
+
+    if workers <= 1:
+        return [run_job(job, scaled[job.scale_key]) for job in jobs]
+
+    # The scaled data is given to each worker once as it starts, rather than
+    # pickled along with every job. Forked workers inherit it without it being
+    # pickled at all
+    with concurrent.futures.ProcessPoolExecutor(workers, initializer=init_worker, initargs=(scaled,)) as executor:
+        futures = [executor.submit(run_worker_job, job) for job in jobs]
+        return [future.result() for future in futures]
+
+def init_worker(scaled):
+    """
+    Keeps the given scaled data of a batch, keyed by scale key, for the jobs
+    run by this worker process.
+    """
+    global worker_scaled
+    worker_scaled = scaled
+
+def run_worker_job(job):
+    """
+    Makes the given plot in a worker process, from the scaled data given to
+    the worker when it started.
+    """
+    return run_job(job, worker_scaled[job.scale_key])
+
+def run_job(job, scaled):
+    """
+    Makes the given plot from the given scaled data, and returns the number of
+    points plotted.
+
+    Parameters
+    ----------
+    job : PlotJob
+        the plot to make
+    scaled : cache.CachedData
+        the scaled rows and categories for the plot
+    """
+    groups = obj_graph.plot_groups(scaled.rows, scaled.categories, job.spacing, PlotStats(), job.voxel_size, job.max_points, job.dedup)
+
+    with output.open_output(job.output_file) as output_file:
+        obj_graph.output_formats[job.output_format](output_file, groups, job.spacing, job.point_size, job.instanced, 1, job.primitive, job.precision)
+
+    return sum(group_points for (name, group_points, chunks) in groups)
@@ -0,0 +1,62 @@
+"""
+A cli application for making many plots from a single data file at once, as
+listed in a json job file. See the batch module for the format of job files.
+"""
+import cli.app
+import sys
+import time
+
+from . import batch
+
+@cli.app.CommandLineApp
+def blendplot_batch(app):
+    """
+    Runs the cli interface for batch plotting.
+
+    Parameters
+    ----------
+    app : cli.app.CommandLineApp
+        the cli information
+    """
+    main(app.params.job_file, app.params.jobs)
+
+blendplot_batch.add_param("job_file", help="json file listing the data file and the plots to make from it", type=str)
+blendplot_batch.add_param("-j", "--jobs", help="the number of processes to make plots with at once", default=1, type=int)
+
+def main(job_filename, workers=1):
+    """
+    Makes the plots listed in the given job file.
+
+    Parameters
+    ----------
+    job_filename : str
+        the path to the job file
+    workers : int
+        the number of processes to make plots with at once
+    """
+    try:
+        (input_filename, num_rows, jobs, csv_engine, column_dtype) = batch.load_job_file(job_filename)
+    except (OSError, ValueError) as error:
+        print("Invalid job file %s: %s" % (job_filename, error), file=sys.stderr)
+        sys.exit(1)
+
+    start = time.time()
+    try:
+        points = batch.run_batch(input_filename, jobs, num_rows, workers, csv_engine, column_dtype)
+    except ImportError as error:
+        print("Unable to write plots: %s" % error, file=sys.stderr)
+        sys.exit(1)
+    end = time.time()
+
+    if points is None:
+        sys.exit(1)
+
+    for (job, job_points) in zip(jobs, points):
+        print("Wrote %s points to %s" % (job_points, job.output_file))
+    print("Plotted %s plots in %f seconds" % (len(jobs), end - start))
+
+def run():
+    blendplot_batch.run()
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,287 @@
+"""
+A persistent on-disk cache of the scaled data of plots, so that replotting the
+same data with a different spacing or point size does not need to parse and
+scale the input file again.
+
+Each entry is a directory named after a hash of the input file's path, size
+and modification time along with the settings that affect the scaled data:
+the number of rows, the columns, the category column and the scale function.
+The scaled rows and category codes are stored as uncompressed npy files, which
+are memory-mapped when loaded, and the distinct categories are stored as json.
+Nothing in an entry is pickled, so loading an entry that someone else wrote
+into the cache directory can never run code.
+
+The total size of the cache is bounded, with the least recently used entries
+evicted first when it grows too large.
+
+A long running process, such as the plot server, can also keep the most
+recently used entries in memory with a MemoryCache, so that plotting the same
+data again does not need to load anything from the cache directory.
+"""
+import collections
+import hashlib
+import json
+import numpy as np
+import os
+import pandas as pd
+import shutil
+import tempfile
+
+CACHE_VERSION = 2
+
+DEFAULT_CACHE_SIZE = 2 * 1024 * 1024 * 1024
+
+DEFAULT_MEMORY_CACHE_SIZE = 512 * 1024 * 1024
+
+def default_cache_dir():
+    """
+    Returns the default directory to keep the cache in, following the XDG base
+    directory specification.
+    """
+    cache_home = os.environ.get("XDG_CACHE_HOME")
+    if cache_home is None or cache_home == "":
+        cache_home = os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(cache_home, "blendplot")
+
+class CachedData:
+    """
+    The scaled data of a plot, as stored in the cache.
+
+    Parameters
+    ----------
+    rows : numpy.ndarray
+        the (N, 3) scaled rows
+    categories : numpy.ndarray
+        the category of each row, or None if the plot has no categories
+    rows_read : int
+        the number of rows read from the input file
+    rows_dropped : int
+        the number of rows dropped for having missing values
+    """
+    def __init__(self, rows, categories, rows_read, rows_dropped):
+        self.rows = rows
+        self.categories = categories
+        self.rows_read = rows_read
+        self.rows_dropped = rows_dropped
+
+class PlotCache:
+    """
+    A cache of the scaled data of plots, kept in the given directory.
+
+    Parameters
+    ----------
+    cache_dir : str
+        the directory to keep the cache in, or None to use the default
+    max_size : int
+        the maximum total size of the cache in bytes
+    """
+    def __init__(self, cache_dir=None, max_size=DEFAULT_CACHE_SIZE):
+        self.cache_dir = cache_dir if cache_dir is not None else default_cache_dir()
+        self.max_size = max_size
+
+    def key(self, input_filename, num_rows, columns, category_column, scale_function, read_options=None):
+        """
+        Returns the key of the cache entry for the given input file and
+        settings, along with any options used when reading the input file
+        that affect the data read.
+        """
+        stat = os.stat(input_filename)
+        identity = {
+                "version": CACHE_VERSION,
+                "path": os.path.abspath(input_filename),
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "num_rows": num_rows,
+                "columns": list(columns),
+                "category_column": category_column,
+                "scale_function": scale_function,
+                "read_options": read_options
+            }
+        return hashlib.sha256(json.dumps(identity, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def _entry_dir(self, key):
+        return os.path.join(self.cache_dir, key)
+
+    def load(self, key):
+        """
+        Returns the cached data for the given key, or None if it is not in the
+        cache or the entry is unreadable.
+        """
+        entry_dir = self._entry_dir(key)
+        meta_filename = os.path.join(entry_dir, "meta.json")
+
+        try:
+            with open(meta_filename, "r") as meta_file:
+                meta = json.load(meta_file)
+
+            rows = np.load(os.path.join(entry_dir, "rows.npy"), mmap_mode="r", allow_pickle=False)
+
+            categories = None
+            if meta["categorized"]:
+                codes = np.load(os.path.join(entry_dir, "codes.npy"), allow_pickle=False)
+                with open(os.path.join(entry_dir, "uniques.json"), "r") as uniques_file:
+                    uniques = json.load(uniques_file)
+                uniques = np.array(uniques["values"], dtype=np.dtype(uniques["dtype"]))
+                categories = uniques[codes]
+
+            # The modification time of the metadata records when the entry
+            # was last used, for evicting the least recently used entries
+            os.utime(meta_filename)
+        except (OSError, ValueError, KeyError, TypeError, IndexError):
+            return None
+
+        return CachedData(rows, categories, meta["rows_read"], meta["rows_dropped"])
+
+    def store(self, key, data):
+        """
+        Stores the given cached data under the given key, and evicts the least
+        recently used entries if the cache has grown too large. Data with
+        categories that cannot be stored as json is not stored.
+        """
+        uniques_json = None
+        if data.categories is not None:
+            (codes, uniques) = pd.factorize(data.categories, use_na_sentinel=False)
+            uniques = np.asarray(uniques)
+            try:
+                uniques_json = json.dumps({"dtype": uniques.dtype.str, "values": uniques.tolist()})
+            except TypeError:
+                return
+
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+        # The entry is written to a temporary directory and then renamed into
+        # place, so that other runs never see a partially written entry
+        temp_dir = tempfile.mkdtemp(dir=self.cache_dir, prefix=".tmp-")
+        try:
+            np.save(os.path.join(temp_dir, "rows.npy"), np.asarray(data.rows, dtype=float))
+
+            if data.categories is not None:
+                np.save(os.path.join(temp_dir, "codes.npy"), codes)
+                with open(os.path.join(temp_dir, "uniques.json"), "w") as uniques_file:
+                    uniques_file.write(uniques_json)
+
+            meta = {
+                    "categorized": data.categories is not None,
+                    "rows_read": data.rows_read,
+                    "rows_dropped": data.rows_dropped
+                }
+            with open(os.path.join(temp_dir, "meta.json"), "w") as meta_file:
+                json.dump(meta, meta_file)
+
+            entry_dir = self._entry_dir(key)
+            shutil.rmtree(entry_dir, ignore_errors=True)
+            os.rename(temp_dir, entry_dir)
+        except OSError:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+            raise
+
+        self.evict(keep=key)
+
+    def entries(self):
+        """
+        Returns the key, last use time and size in bytes of each entry in the
+        cache, from least to most recently used.
+        """
+        entries = []
+        if not os.path.isdir(self.cache_dir):
+            return entries
+
+        for key in os.listdir(self.cache_dir):
+            entry_dir = self._entry_dir(key)
+            if key.startswith(".") or not os.path.isdir(entry_dir):
+                continue
+
+            try:
+                last_used = os.stat(os.path.join(entry_dir, "meta.json")).st_mtime_ns
+                size = sum(entry.stat().st_size for entry in os.scandir(entry_dir))
+            except OSError:
+                continue
+            entries.append((key, last_used, size))
+
+        return sorted(entries, key=lambda entry: entry[1])
+
+    def evict(self, keep=None):
+        """
+        Removes the least recently used entries until the cache is within its
+        maximum size, never removing the entry with the given key.
+        """
+        entries = self.entries()
+        total_size = sum(size for (key, last_used, size) in entries)
+
+        for (key, last_used, size) in entries:
+            if total_size <= self.max_size:
+                break
+            if key == keep:
+                continue
+
+            shutil.rmtree(self._entry_dir(key), ignore_errors=True)
+            total_size -= size
+
+class MemoryCache(PlotCache):
+    """
+    A cache of the scaled data of plots, kept in the given directory, which
+    also keeps the most recently used entries in memory.
+
+    Entries are looked up by the same keys as in the cache directory, which
+    change whenever the input file is modified, so entries held in memory are
+    never stale.
+
+    Parameters
+    ----------
+    cache_dir : str
+        the directory to keep the cache in, or None to use the default
+    max_size : int
+        the maximum total size of the cache directory in bytes
+    memory_size : int
+        the maximum total size in bytes of the scaled rows and categories of
+        the entries kept in memory
+    """
+    def __init__(self, cache_dir=None, max_size=DEFAULT_CACHE_SIZE, memory_size=DEFAULT_MEMORY_CACHE_SIZE):
+        PlotCache.__init__(self, cache_dir, max_size)
+        self.memory_size = memory_size
+        self.memory = collections.OrderedDict()
+
+    def load(self, key):
+        """
+        Returns the cached data for the given key, from memory if it is held
+        there, or None if it is not in the cache.
+        """
+        if key in self.memory:
+            self.memory.move_to_end(key)
+            return self.memory[key]
+
+        data = PlotCache.load(self, key)
+        if data is not None:
+            self.remember(key, data)
+        return data
+
+    def store(self, key, data):
+        """
+        Stores the given cached data under the given key, both in memory and
+        in the cache directory.
+        """
+        self.remember(key, data)
+        PlotCache.store(self, key, data)
+
+    def remember(self, key, data):
+        """
+        Keeps the given cached data in memory under the given key, and forgets
+        the least recently used entries if too much is held in memory, which
+        can include the given entry if it is too large on its own.
+        """
+        self.memory[key] = data
+        self.memory.move_to_end(key)
+
+        total_size = sum(entry_size(entry) for entry in self.memory.values())
+        while total_size > self.memory_size and len(self.memory) > 0:
+            (oldest_key, oldest) = self.memory.popitem(last=False)
+            total_size -= entry_size(oldest)
+
+def entry_size(data):
+    """
+    Returns the number of bytes taken by the arrays of the given cached data.
+    """
+    size = np.asarray(data.rows).nbytes
+    if data.categories is not None:
+        size += np.asarray(data.categories).nbytes
+    return size
@@ -0,0 +1,67 @@
+"""
+A cli application for sending plots to a running blendplot-server, taking the
+same arguments as blendplot.
+"""
+import argparse
+import cli.app
+import sys
+
+from . import server
+
+@cli.app.CommandLineApp
+def blendplot_client(app):
+    """
+    Runs the cli interface for sending plots to the plot server.
+
+    Parameters
+    ----------
+    app : cli.app.CommandLineApp
+        the cli information
+    """
+    main(app.params.arguments, app.params.socket, app.params.ping, app.params.stop)
+
+blendplot_client.add_param("--socket", help="the path of the server's socket, defaults to the default socket of blendplot-server", default=None, type=str)
+blendplot_client.add_param("--ping", help="check that the server is running, rather than sending a plot", action="store_true")
+blendplot_client.add_param("--stop", help="stop the server, rather than sending a plot", action="store_true")
+blendplot_client.add_param("arguments", help="the arguments of the plot, the same as for blendplot", nargs=argparse.REMAINDER)
+
+def main(arguments, socket_path=None, ping=False, stop=False):
+    """
+    Sends the plot with the given blendplot arguments to the plot server, or
+    sends the server a ping or stop request, and exits with the exit code of
+    the plot.
+
+    Parameters
+    ----------
+    arguments : List[str]
+        the blendplot command line arguments of the plot
+    socket_path : str
+        the path of the server's socket, or None to use the default
+    ping : bool
+        whether to check that the server is running instead
+    stop : bool
+        whether to stop the server instead
+    """
+    if socket_path is None:
+        socket_path = server.default_socket_path()
+
+    try:
+        if ping or stop:
+            result = server.send_request(socket_path, {"command": "stop" if stop else "ping"})
+            sys.stdout.write(result["stdout"])
+            sys.stderr.write(result["stderr"])
+            exit_code = result["exit_code"]
+        else:
+            exit_code = server.plot_remote(socket_path, arguments)
+    except OSError as error:
+        print("Unable to reach server at %s: %s" % (socket_path, error), file=sys.stderr)
+        print("Start one with blendplot-server", file=sys.stderr)
+        sys.exit(1)
+
+    sys.exit(exit_code)
+
+def run():
+    blendplot_client.run()
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,150 @@
+"""
+Functions for reducing the number of points in very large plots, either by
+collapsing points at exactly the same position in the same category into one,
+or by snapping the points to a grid of voxels and keeping a single point from
+each occupied voxel of each category.
+"""
+import numpy as np
+import pandas as pd
+
+def voxel_downsample(points, codes, voxel_size):
+    """
+    Returns a mask of the points to keep so that there is only one point in
+    each occupied voxel of each category. The first point in each voxel is
+    kept, so the kept points stay in their original order. The voxel grid
+    starts at the minimum corner of the points.
+
+    Parameters
+    ----------
+    points : numpy.ndarray
+        an (N, 3) array of the positions of the points, in the same units as
+        the voxel size
+    codes : numpy.ndarray
+        the integer category code of each point
+    voxel_size : float
+        the length of the sides of the voxels
+
+    Returns
+    -------
+    keep : numpy.ndarray
+        a boolean mask of the points to keep
+    """
+    points = np.asarray(points, dtype=float)
+    if len(points) == 0:
+        return np.zeros(0, dtype=bool)
+
+    voxels = np.floor((points - points.min(axis=0)) / voxel_size)
+
+    # The voxels are hashed by pandas rather than sorted, keeping this linear
+    # in the number of points
+    keys = pd.DataFrame({
+            "code": codes,
+            "x": voxels[:, 0],
+            "y": voxels[:, 1],
+            "z": voxels[:, 2]
+        })
+
+    return ~keys.duplicated().to_numpy()
+
+def collapse_duplicates(points, codes):
+    """
+    Returns a mask of the points to keep so that there is only one point at
+    each distinct position in each category, along with the number of points
+    that were at the position of each kept point. The first point at each
+    position is kept, so the kept points stay in their original order.
+
+    Parameters
+    ----------
+    points : numpy.ndarray
+        an (N, 3) array of the positions of the points
+    codes : numpy.ndarray
+        the integer category code of each point
+
+    Returns
+    -------
+    keep : numpy.ndarray
+        a boolean mask of the points to keep
+    multiplicity : numpy.ndarray
+        the number of points at the position of each kept point, including
+        itself, in the order of the kept points
+    """
+    points = np.asarray(points, dtype=float)
+    if len(points) == 0:
+        return (np.zeros(0, dtype=bool), np.zeros(0, dtype=np.int64))
+
+    # Adding zero turns -0.0 into 0.0, as both are the same position
+    points = points + 0.0
+
+    # As with voxels, the positions are hashed by pandas rather than sorted
+    keys = pd.DataFrame({
+            "code": codes,
+            "x": points[:, 0],
+            "y": points[:, 1],
+            "z": points[:, 2]
+        })
+    ids = keys.groupby(list(keys.columns), sort=False).ngroup().to_numpy()
+
+    keep = ~pd.Series(ids).duplicated().to_numpy()
+    multiplicity = np.bincount(ids)[ids[keep]]
+
+    return (keep, multiplicity)
+
+def voxel_size_for_budget(points, codes, max_points, iterations=20):
+    """
+    Returns the smallest voxel size that reduces the given points to at most
+    the given number of points, or None if there are already few enough
+    points. If there are more categories than the maximum number of points,
+    the largest voxel size is returned, keeping one point per category.
+
+    The voxel size is found with a bisection search, so it is only accurate to
+    within a small fraction of its value.
+
+    Parameters
+    ----------
+    points : numpy.ndarray
+        an (N, 3) array of the positions of the points
+    codes : numpy.ndarray
+        the integer category code of each point
+    max_points : int
+        the maximum number of points to keep
+    iterations : int
+        the number of steps of bisection to use
+
+    Returns
+    -------
+    voxel_size : float
+        the voxel size to use, or None if no downsampling is needed
+    """
+    points = np.asarray(points, dtype=float)
+    if len(points) <= max_points:
+        return None
+
+    extent = np.max(np.ptp(points, axis=0))
+    if extent == 0.0:
+        extent = 1.0
+
+    # With voxels larger than the data each category fits into one voxel, so
+    # this is the coarsest grid worth trying
+    high = 2.0 * extent
+    low = high / len(points)
+
+    count = lambda size: np.count_nonzero(voxel_downsample(points, codes, size))
+
+    if count(low) <= max_points:
+        return low
+
+    # The first guess assumes the points are spread evenly through their
+    # bounding box, which is close enough for most datasets to need only a few
+    # steps of bisection after it
+    middle = min(max(extent / max_points ** (1.0 / 3.0), low), high)
+    for _ in range(iterations):
+        kept = count(middle)
+        if kept <= max_points:
+            high = middle
+            if kept >= 0.95 * max_points:
+                break
+        else:
+            low = middle
+        middle = np.sqrt(low * high)
+
+    return high
@@ -0,0 +1,200 @@
+"""
+Functions for writing plots as binary glTF (.glb) files.
+
+Rather than writing the geometry of every point, the file holds a single mesh
+of the point primitive, and one node per group of points that instances the
+mesh onto each point using the EXT_mesh_gpu_instancing extension. The points
+are stored as a buffer of little-endian float32 translations, one per point,
+so the file takes 12 bytes per point and viewers that support the extension,
+including Blender, can load millions of points quickly.
+
+As with ply files, the translations of each group are streamed out chunk by
+chunk, which needs the number of points in each group up front to lay out
+the buffer.
+"""
+import json
+import numpy as np
+import struct
+
+from . import obj_graph
+from . import primitives
+
+GLB_MAGIC = 0x46546C67
+
+GLB_VERSION = 2
+
+JSON_CHUNK_TYPE = 0x4E4F534A
+
+BIN_CHUNK_TYPE = 0x004E4942
+
+FLOAT = 5126
+
+UNSIGNED_INT = 5125
+
+ARRAY_BUFFER = 34962
+
+ELEMENT_ARRAY_BUFFER = 34963
+
+POINTS_MODE = 0
+
+TRIANGLES_MODE = 4
+
+INSTANCING_EXTENSION = "EXT_mesh_gpu_instancing"
+
+MAX_GLB_SIZE = 2 ** 32 - 1
+
+def padded(length, alignment=4):
+    """
+    Returns the given length rounded up to a multiple of the given alignment.
+    """
+    return (length + alignment - 1) // alignment * alignment
+
+def primitive_triangles(primitive):
+    """
+    Returns the faces of the given primitive split into triangles, as an
+    (T, 3) array of vertex indices starting from 0.
+    """
+    triangles = []
+    for face in primitive.faces:
+        for i in range(1, len(face) - 1):
+            triangles.append((face[0] - 1, face[i] - 1, face[i + 1] - 1))
+    return np.array(triangles, dtype="<u4").reshape(-1, 3)
+
+def glb_layout(groups, point_size, primitive):
+    """
+    Returns the glTF json of a plot of the given groups, along with the bytes
+    of the mesh that start the binary buffer. The translations of the points
+    of each group follow the mesh in the buffer, in the order of the groups.
+
+    Parameters
+    ----------
+    groups : List[(str, int)]
+        the name and number of points of each group of points
+    point_size : float
+        the size to use for the data points
+    primitive : primitives.Primitive
+        the shape to plot each point as
+
+    Returns
+    -------
+    layout : (dict, bytes, int)
+        the glTF json, the bytes of the mesh, and the total length of the
+        binary buffer
+    """
+    verticies = np.ascontiguousarray(primitive.offsets(point_size), dtype="<f4")
+    triangles = primitive_triangles(primitive)
+
+    mesh_bytes = verticies.tobytes()
+    buffer_views = [{"buffer": 0, "byteOffset": 0, "byteLength": len(mesh_bytes), "target": ARRAY_BUFFER}]
+    accessors = [{
+            "bufferView": 0,
+            "componentType": FLOAT,
+            "count": len(verticies),
+            "type": "VEC3",
+            "min": verticies.min(axis=0).tolist(),
+            "max": verticies.max(axis=0).tolist()
+        }]
+    mesh_primitive = {"attributes": {"POSITION": 0}, "mode": POINTS_MODE}
+
+    if len(triangles) > 0:
+        index_bytes = triangles.tobytes()
+        buffer_views.append({"buffer": 0, "byteOffset": len(mesh_bytes), "byteLength": len(index_bytes), "target": ELEMENT_ARRAY_BUFFER})
+        accessors.append({"bufferView": 1, "componentType": UNSIGNED_INT, "count": triangles.size, "type": "SCALAR"})
+        mesh_primitive = {"attributes": {"POSITION": 0}, "indices": 1, "mode": TRIANGLES_MODE}
+        mesh_bytes += index_bytes
+
+    offset = len(mesh_bytes)
+    nodes = []
+    for (name, group_points) in groups:
+        if group_points == 0:
+            continue
+
+        byte_length = 12 * group_points
+        buffer_views.append({"buffer": 0, "byteOffset": offset, "byteLength": byte_length})
+        accessors.append({"bufferView": len(buffer_views) - 1, "componentType": FLOAT, "count": group_points, "type": "VEC3"})
+        nodes.append({
+                "name": str(name),
+                "mesh": 0,
+                "extensions": {INSTANCING_EXTENSION: {"attributes": {"TRANSLATION": len(accessors) - 1}}}
+            })
+        offset += byte_length
+
+    gltf = {
+            "asset": {"version": "2.0", "generator": "blendplot"},
+            "extensionsUsed": [INSTANCING_EXTENSION],
+            "scene": 0,
+            "scenes": [{"nodes": list(range(len(nodes)))}],
+            "nodes": nodes,
+            "meshes": [{"name": obj_graph.INSTANCE_OBJECT_NAME, "primitives": [mesh_primitive]}],
+            "accessors": accessors,
+            "bufferViews": buffer_views,
+            "buffers": [{"byteLength": offset}],
+            "extras": {"point_size": point_size, "primitive": primitive.name}
+        }
+
+    return (gltf, mesh_bytes, offset)
+
+def write_glb(output_file, groups, spacing, point_size, instanced=False, jobs=1, primitive="cube", precision=None):
+    """
+    Writes the given groups of points to the given output file in binary
+    glTF format, as one node per group that instances a single mesh of the
+    point primitive onto each of its points.
+
+    Parameters
+    ----------
+    output_file : file
+        the binary file to write the plot to
+    groups : List[(str, int, Iterable[numpy.ndarray])]
+        the name, number of points, and chunks of (N, 3) scaled rows of each
+        group of points
+    spacing : float
+        the scaling of the data range
+    point_size : float
+        the size to use for the data points
+    instanced : bool
+        unused, as the points are always instanced
+    jobs : int
+        unused, as packing the binary buffers is fast enough that it is not
+        worth splitting across processes
+    primitive : str
+        the name of the shape to plot each point as
+    precision : int
+        unused, as the coordinates are always written as 32 bit floats
+    """
+    groups = list(groups)
+    primitive = primitives.primitives[primitive]
+
+    (gltf, mesh_bytes, buffer_length) = glb_layout([(name, group_points) for (name, group_points, chunks) in groups], point_size, primitive)
+
+    json_bytes = json.dumps(gltf, separators=(",", ":")).encode("utf-8")
+    json_bytes += b" " * (padded(len(json_bytes)) - len(json_bytes))
+    bin_length = padded(buffer_length)
+
+    total_length = 12 + 8 + len(json_bytes) + 8 + bin_length
+    if total_length > MAX_GLB_SIZE:
+        raise ValueError("The plot is too large for a glb file, at %s bytes" % total_length)
+
+    output_file.write(struct.pack("<III", GLB_MAGIC, GLB_VERSION, total_length))
+    output_file.write(struct.pack("<II", len(json_bytes), JSON_CHUNK_TYPE))
+    output_file.write(json_bytes)
+    output_file.write(struct.pack("<II", bin_length, BIN_CHUNK_TYPE))
+    output_file.write(mesh_bytes)
+
+    for (name, group_points, chunks) in groups:
+        written = 0
+        for rows in chunks:
+            for i in range(0, len(rows), obj_graph.PLOT_BATCH_SIZE):
+                batch = np.asarray(rows[i:i + obj_graph.PLOT_BATCH_SIZE], dtype=float).reshape(-1, 3)
+
+                # The spaced points are written straight into the float32
+                # buffer that is written out, without a float64 copy
+                translations = np.empty(batch.shape, dtype="<f4")
+                with np.errstate(over="ignore", invalid="ignore"):
+                    np.multiply(batch, spacing, out=translations, casting="unsafe")
+                output_file.write(memoryview(translations).cast("B"))
+                written += len(translations)
+
+        if written != group_points:
+            raise ValueError("Expected to write %s points in %s, but got %s" % (group_points, name, written))
+
+    output_file.write(b"\0" * (bin_length - buffer_length))
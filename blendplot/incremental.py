@@ -0,0 +1,331 @@
+"""
+Incremental plotting of csv data files that are only ever appended to.
+
+After plotting a data file, the plot is recorded in a state file next to the
+obj file: how far into the data file was plotted, as a byte offset and a
+number of rows, the parameters of the scaling used, and the last used vertex
+number. When the data file has grown since, only the new rows are read,
+scaled with the recorded parameters and appended to the obj file, with the
+points of each category appended as another object of the same name.
+
+The plot is instead rebuilt from scratch if it was made with different
+settings, if the data file or obj file were changed other than by appending
+to the data file, if rescaling is requested, or if the new rows fall outside
+of the range that minmax_scale or maxabs_scale scaled the data into. For the
+other scale functions the recorded parameters stay valid as the data grows,
+though they drift from the parameters that a full rebuild would use.
+"""
+import hashlib
+import io
+import json
+import os
+import pandas as pd
+import sys
+
+from . import obj_graph
+from . import output
+from . import primitives
+from . import readers
+from . import scaling
+from .stats import PlotStats, TimedFile
+
+STATE_VERSION = 1
+
+HASH_BYTES = 64 * 1024
+
+SCALED_RANGES = {
+            "minmax_scale": (0.0, 1.0),
+            "maxabs_scale": (-1.0, 1.0)
+        }
+
+RANGE_TOLERANCE = 1e-9
+
+def state_filename(output_filename):
+    """
+    Returns the path of the state file for the given obj file.
+    """
+    return output_filename + ".blendplot.json"
+
+def plot_file_incremental(input_filename, output_filename, columns, spacing, point_size, category_column, scale_function, instanced=False, rescale=False, stats=None, primitive="cube", precision=None):
+    """
+    Plots the rows added to the given csv data file since it was last plotted
+    to the given obj file, appending them to the obj file, or rebuilds the
+    plot if it cannot be appended to.
+
+    Parameters
+    ----------
+    input_filename : str
+        the path to the input csv data file
+    output_filename : str
+        the path of the obj file to write the plot to
+    columns : List[str]
+        the columns to plot
+    spacing : float
+        the scaling of the data range
+    point_size : float
+        the size to use for the data points
+    category_column : str
+        the column to categorize the points by, or None to plot data without
+        categories
+    scale_function : str
+        the name of the data scaling function to use
+    instanced : bool
+        whether to plot the points as single verticies along with one cube to
+        instance onto them, rather than as a cube for every point
+    rescale : bool
+        whether to always rebuild the plot, fitting the scaling to all of the
+        data again
+    stats : stats.PlotStats
+        the stats to record the time spent in each stage of the plot and the
+        amount of data plotted into, or None to not record stats
+    primitive : str
+        the name of the shape to plot each point as
+    precision : int
+        the number of decimal places to round the coordinates to, or None to
+        write them at full precision
+
+    Returns
+    -------
+    result : (int, int, bool)
+        the total number of points in the plot, the number of points that
+        were added, and whether the plot was rebuilt, or None if the plot is
+        unable to be made
+    """
+    if stats is None:
+        stats = PlotStats()
+    obj_graph.count_precision_error(stats, "obj", precision, point_size)
+
+    if not isinstance(readers.reader_for(input_filename), readers.CsvReader):
+        print("Incremental plotting only supports csv data files", file=sys.stderr)
+        return None
+
+    with stats.stage("read"):
+        header = readers.read_header(input_filename)
+
+    with stats.stage("validate"):
+        if not obj_graph.check_columns(header, columns, category_column):
+            return None
+
+    settings = {
+            "input_file": os.path.abspath(input_filename),
+            "columns": list(columns),
+            "category_column": category_column,
+            "scale_function": scale_function,
+            "spacing": spacing,
+            "point_size": point_size,
+            "instanced": instanced,
+            "primitive": primitive,
+            "precision": precision
+        }
+
+    state = None
+    if not rescale:
+        state = load_state(output_filename)
+        if state is not None and not can_append(state, settings, input_filename, output_filename):
+            state = None
+
+    if state is not None:
+        result = append_plot(input_filename, output_filename, state, stats)
+        if result is not None:
+            return result
+
+    return rebuild_plot(input_filename, output_filename, settings, stats)
+
+def rebuild_plot(input_filename, output_filename, settings, stats):
+    """
+    Plots all of the complete rows of the given data file to the given obj
+    file, and records the state of the plot.
+    """
+    (columns, category_column, scale_function) = (settings["columns"], settings["category_column"], settings["scale_function"])
+    used_columns = columns if category_column is None else columns + [category_column]
+
+    with stats.stage("read"):
+        (data, offset) = read_complete_lines(input_filename, 0)
+        original_data = pd.read_csv(io.BytesIO(data), usecols = set(used_columns))
+
+    # The plot is scaled in the same way as by plot_file, with the parameters
+    # of the scaling computed in the same way again so that they can be frozen
+    scaled = obj_graph.scale_frame(original_data, columns, category_column, scale_function, stats)
+    with stats.stage("scale"):
+        scaler = scaling.freeze_scaling(scale_function, original_data[columns].dropna().to_numpy(dtype=float))
+
+    groups = obj_graph.plot_groups(scaled.rows, scaled.categories, settings["spacing"], stats)
+    num_points = len(scaled.rows)
+
+    with stats.stage("format"):
+        with output.open_output(output_filename) as output_file:
+            obj_graph.write_obj(TimedFile(output_file, stats), groups, settings["spacing"], settings["point_size"], settings["instanced"], 1, settings["primitive"], settings["precision"])
+
+    primitive_verticies = len(primitives.primitives[settings["primitive"]].verticies)
+    if settings["instanced"]:
+        start_num = primitive_verticies + num_points
+    else:
+        start_num = primitive_verticies * num_points
+
+    state = dict(settings)
+    state.update({
+            "version": STATE_VERSION,
+            "header": list(readers.read_header(input_filename).columns),
+            "offset": offset,
+            "rows": len(original_data.index),
+            "points": num_points,
+            "start_num": start_num,
+            "scaler": scaler_state(scaler)
+        })
+    save_state(output_filename, input_filename, state)
+
+    return (num_points, num_points, True)
+
+def append_plot(input_filename, output_filename, state, stats):
+    """
+    Appends the rows added to the given data file since the given state was
+    recorded to the given obj file, and records the new state of the plot.
+    Returns None without changing the obj file if the plot needs to be
+    rebuilt instead.
+    """
+    (columns, category_column) = (state["columns"], state["category_column"])
+    used_columns = columns if category_column is None else columns + [category_column]
+
+    with stats.stage("read"):
+        (data, offset) = read_complete_lines(input_filename, state["offset"])
+        if len(data) == 0:
+            return (state["points"], 0, False)
+        new_data = pd.read_csv(io.BytesIO(data), header = None, names = state["header"], usecols = set(used_columns))
+    stats.count("rows_read", len(new_data.index))
+
+    with stats.stage("dropna"):
+        frame = pd.DataFrame(new_data, columns = columns).dropna()
+    stats.count("rows_dropped", len(new_data.index) - len(frame.index))
+
+    with stats.stage("scale"):
+        scaler = load_scaler(state["scale_function"], state["scaler"])
+        rows = scaler.transform(frame.to_numpy(dtype=float))
+
+        if state["scale_function"] in SCALED_RANGES and len(rows) > 0:
+            (low, high) = SCALED_RANGES[state["scale_function"]]
+            if rows.min() < low - RANGE_TOLERANCE or rows.max() > high + RANGE_TOLERANCE:
+                return None
+
+    categories = None
+    if category_column is not None:
+        categories = new_data[category_column][frame.index].to_numpy()
+
+    groups = obj_graph.plot_groups(rows, categories, state["spacing"], stats)
+
+    start_num = state["start_num"]
+    with stats.stage("format"):
+        with output.BlockWriter(open(output_filename, "ab", buffering=0)) as output_file:
+            output_file = TimedFile(output_file, stats)
+            for (name, group_points, chunks) in groups:
+                output_file.write("o %s\n" % name)
+                for group_rows in chunks:
+                    if state["instanced"]:
+                        start_num = obj_graph.plot_points(group_rows, state["spacing"], output_file, start_num, state["precision"])
+                    else:
+                        start_num = obj_graph.plot(group_rows, state["spacing"], state["point_size"], output_file, start_num, state["primitive"], state["precision"])
+
+    state = dict(state)
+    state.update({
+            "offset": offset,
+            "rows": state["rows"] + len(new_data.index),
+            "points": state["points"] + len(rows),
+            "start_num": start_num
+        })
+    save_state(output_filename, input_filename, state)
+
+    return (state["points"], len(rows), False)
+
+def read_complete_lines(input_filename, offset):
+    """
+    Returns the bytes of the given file from the given offset up to the end of
+    its last complete line, along with the offset of the end of those bytes.
+    Any partly written line at the end of the file is left for later.
+    """
+    with open(input_filename, "rb") as input_file:
+        input_file.seek(offset)
+        data = input_file.read()
+
+    end = data.rfind(b"\n") + 1
+    return (data[:end], offset + end)
+
+def file_hashes(filename, offset):
+    """
+    Returns hashes of the first and last bytes before the given offset of the
+    given file, for checking that the file has only been appended to since.
+    """
+    with open(filename, "rb") as input_file:
+        head = input_file.read(min(offset, HASH_BYTES))
+        input_file.seek(max(offset - HASH_BYTES, 0))
+        tail = input_file.read(offset - max(offset - HASH_BYTES, 0))
+
+    return [hashlib.sha256(head).hexdigest(), hashlib.sha256(tail).hexdigest()]
+
+def scaler_state(scaler):
+    """
+    Returns the frozen parameters of the given scaler in a form that can be
+    serialized as json, or None if the scaler has no parameters.
+    """
+    if isinstance(scaler, scaling.AffineScaler):
+        return {"center": scaler.center.tolist(), "scale": scaler.scale.tolist()}
+    return None
+
+def load_scaler(scale_function, parameters):
+    """
+    Returns the scaler with the given frozen parameters for the given scale
+    function.
+    """
+    if parameters is None:
+        return scaling.streaming_scalers[scale_function]()
+    return scaling.AffineScaler(parameters["center"], parameters["scale"])
+
+def load_state(output_filename):
+    """
+    Returns the recorded state of the plot in the given obj file, or None if
+    there is no readable state.
+    """
+    try:
+        with open(state_filename(output_filename), "r") as state_file:
+            state = json.load(state_file)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(state, dict) or state.get("version") != STATE_VERSION:
+        return None
+    return state
+
+def save_state(output_filename, input_filename, state):
+    """
+    Records the given state of the plot in the given obj file, along with the
+    current size of the obj file and hashes of the plotted part of the data
+    file.
+    """
+    state = dict(state)
+    state["input_hashes"] = file_hashes(input_filename, state["offset"])
+    state["output_size"] = os.path.getsize(output_filename)
+
+    filename = state_filename(output_filename)
+    with open(filename + ".tmp", "w") as state_file:
+        json.dump(state, state_file)
+    os.replace(filename + ".tmp", filename)
+
+def can_append(state, settings, input_filename, output_filename):
+    """
+    Returns whether the given recorded state of a plot can be appended to
+    with the given settings, as its data file has only been appended to and
+    its obj file is unchanged.
+    """
+    for (key, value) in settings.items():
+        if state.get(key) != value:
+            return False
+
+    try:
+        if os.path.getsize(input_filename) < state["offset"]:
+            return False
+        if os.path.getsize(output_filename) != state["output_size"]:
+            return False
+        if file_hashes(input_filename, state["offset"]) != state["input_hashes"]:
+            return False
+    except (OSError, KeyError):
+        return False
+
+    return True
@@ -0,0 +1,80 @@
+"""
+Plots as packed arrays of verticies and faces, for passing plots to other
+libraries without writing them to a file.
+"""
+import numpy as np
+
+from . import obj_graph
+from . import primitives
+
+class Mesh:
+    """
+    The verticies and faces of a plot.
+
+    The verticies and faces are in the same order as they are written to obj
+    and ply files, with the points of each group next to each other in the
+    order the groups are listed. Unlike in obj files, the faces refer to
+    verticies by their index starting from 0.
+
+    Parameters
+    ----------
+    verticies : numpy.ndarray
+        an (N, 3) array of the positions of the verticies
+    faces : numpy.ndarray
+        an (M, S) array of the indices of the verticies of each face, where S
+        is the number of verticies of each face of the primitive
+    groups : List[(str, int)]
+        the name and number of points of each group of points
+    instanced : bool
+        whether the verticies are a single primitive followed by one vertex
+        for each point, rather than a primitive for every point
+    """
+    def __init__(self, verticies, faces, groups, instanced):
+        self.verticies = verticies
+        self.faces = faces
+        self.groups = groups
+        self.instanced = instanced
+
+def build_mesh(groups, spacing, point_size, instanced=False, primitive="cube"):
+    """
+    Returns the mesh of the given groups of points.
+
+    Parameters
+    ----------
+    groups : List[(str, int, Iterable[numpy.ndarray])]
+        the name, number of points, and chunks of (N, 3) scaled rows of each
+        group of points
+    spacing : float
+        the scaling of the data range
+    point_size : float
+        the size to use for the data points
+    instanced : bool
+        whether to make a single primitive along with one vertex per point,
+        rather than a primitive for every point
+    primitive : str
+        the name of the shape to plot each point as
+
+    Returns
+    -------
+    mesh : Mesh
+        the verticies and faces of the plot
+    """
+    group_points = []
+    chunks = []
+    for (name, num_points, group_chunks) in groups:
+        group_points.append((name, num_points))
+        chunks.extend(np.asarray(rows, dtype=float).reshape(-1, 3) for rows in group_chunks)
+
+    points = np.concatenate(chunks) * spacing if len(chunks) > 0 else np.zeros((0, 3))
+
+    primitive = primitives.primitives[primitive]
+
+    if instanced:
+        instance = obj_graph.primitive_verticies(np.zeros((1, 3)), point_size, primitive)
+        verticies = np.concatenate([instance, points])
+        faces = obj_graph.primitive_faces(1, -1, primitive)
+    else:
+        verticies = obj_graph.primitive_verticies(points, point_size, primitive)
+        faces = obj_graph.primitive_faces(len(points), -1, primitive)
+
+    return Mesh(verticies, faces, group_points, instanced)
@@ -1,9 +1,38 @@
 """
 Functions for plotting datasets as 3D models in obj format for use in Blender.
 """
-from sklearn import preprocessing
+from . import downsample
+from . import gltf
+from . import mesh
+from . import pipeline
+from . import ply
+from . import precision as fixed_precision
+from . import primitives
+from . import readers
+from . import scaling
+from .cache import CachedData
+from .output import BlockWriter
+from .stats import PlotStats, TimedFile
+import collections
+import concurrent.futures
+import io
+import itertools
+import numpy as np
 import pandas as pd
 import sys
+import tempfile
+
+CUBE_VERTEX_PERMUTATIONS = primitives.CUBE.verticies
+
+CUBE_FACE_PERMUTATIONS = primitives.CUBE.faces
+
+PLOT_BATCH_SIZE = 10000
+
+INSTANCE_OBJECT_NAME = "point_instance"
+
+# The key that the points of rows with a missing category are grouped under
+# when spilling chunked plots
+MISSING_CATEGORY = object()
 
 def add_cube_verticies(cube_str, x, y, z, point_size):
     """
@@ -22,17 +51,7 @@ def add_cube_verticies(cube_str, x, y, z, point_size):
     point_size : float
         the size of the cube
     """
-    vert_permutations = [
-                (1,-1,-1),
-                (1,-1,1),
-                (-1,-1,1),
-                (-1,-1,-1),
-                (1,1,-1),
-                (1,1,1),
-                (-1,1,1),
-                (-1,1,-1)
-            ]
-    for perm in vert_permutations:
+    for perm in CUBE_VERTEX_PERMUTATIONS:
         cube_str += "v %s %s %s\n" % (
                     x + (point_size * perm[0]),
                     y + (point_size * perm[1]),
@@ -51,15 +70,7 @@ def add_cube_faces(cube_str, start_num):
     start_num : int
         the last used vertex number
     """
-    face_permutations = [
-                (1,2,3,4),
-                (5,8,7,6),
-                (1,5,6,2),
-                (2,6,7,3),
-                (3,7,8,4),
-                (5,1,4,8)
-            ]
-    for perm in face_permutations:
+    for perm in CUBE_FACE_PERMUTATIONS:
         cube_str += "f %s %s %s %s\n" % (
                     start_num + perm[0],
                     start_num + perm[1],
@@ -113,7 +124,224 @@ def add_cube(x, y, z, point_size, start_num, output_file):
     output_file.write(
             cube_string(x, y, z, point_size, start_num))
 
-def plot(rows, spacing, point_size, output_file, start_num):
+def primitive_verticies(points, point_size, primitive):
+    """
+    Returns the verticies of the given primitive placed on each of the given
+    points.
+
+    Parameters
+    ----------
+    points : numpy.ndarray
+        an (N, 3) array of the positions of the points
+    point_size : float
+        the size of the primitives
+    primitive : primitives.Primitive
+        the shape to plot each point as
+
+    Returns
+    -------
+    verticies : numpy.ndarray
+        an (N * V, 3) array of the verticies, where V is the number of
+        verticies of the primitive
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 3)
+    offsets = primitive.offsets(point_size)
+
+    with np.errstate(over="ignore", invalid="ignore"):
+        verticies = points[:, np.newaxis, :] + offsets[np.newaxis, :, :]
+
+    return verticies.reshape(-1, 3)
+
+def cube_verticies(points, point_size):
+    """
+    Returns the verticies of the cubes centered on each of the given points.
+
+    Parameters
+    ----------
+    points : numpy.ndarray
+        an (N, 3) array of the positions of the cubes
+    point_size : float
+        the size of the cubes
+
+    Returns
+    -------
+    verticies : numpy.ndarray
+        an (N * 8, 3) array of the cube verticies, in the same order as
+        add_cube_verticies writes them
+    """
+    return primitive_verticies(points, point_size, primitives.CUBE)
+
+def vertex_numbers(num_points, start_num, point_verticies):
+    """
+    Returns the vertex numbers used by each of the given number of points.
+
+    Parameters
+    ----------
+    num_points : int
+        the number of points
+    start_num : int
+        the last used vertex number
+    point_verticies : int
+        the number of verticies of each point
+
+    Returns
+    -------
+    vertex_numbers : numpy.ndarray
+        an (N, V) array of the vertex numbers of each point
+    """
+    numbers = np.arange(1, num_points * point_verticies + 1, dtype=np.int64)
+
+    # Vertex numbers outside of the int64 range fall back to Python ints
+    int64_info = np.iinfo(np.int64)
+    last_num = start_num + point_verticies * num_points
+    if start_num < int64_info.min or last_num > int64_info.max:
+        numbers = numbers.astype(object)
+
+    return (numbers + start_num).reshape(num_points, point_verticies)
+
+def cube_vertex_numbers(num_points, start_num):
+    """
+    Returns the vertex numbers used by each of the given number of cubes.
+
+    Parameters
+    ----------
+    num_points : int
+        the number of cubes
+    start_num : int
+        the last used vertex number
+
+    Returns
+    -------
+    vertex_numbers : numpy.ndarray
+        an (N, 8) array of the vertex numbers of each cube
+    """
+    return vertex_numbers(num_points, start_num, len(CUBE_VERTEX_PERMUTATIONS))
+
+def primitive_faces(num_points, start_num, primitive):
+    """
+    Returns the vertex numbers of the faces of the given number of
+    primitives.
+
+    Parameters
+    ----------
+    num_points : int
+        the number of points
+    start_num : int
+        the last used vertex number
+    primitive : primitives.Primitive
+        the shape to plot each point as
+
+    Returns
+    -------
+    faces : numpy.ndarray
+        an (N * F, S) array of the faces, where F is the number of faces of
+        the primitive and S is the number of verticies of each face
+    """
+    face_indices = np.array(primitive.faces, dtype=np.int64).reshape(len(primitive.faces), primitive.face_size) - 1
+    numbers = vertex_numbers(num_points, start_num, len(primitive.verticies))
+
+    return numbers[:, face_indices].reshape(num_points * len(primitive.faces), primitive.face_size)
+
+def cube_faces(num_points, start_num):
+    """
+    Returns the vertex numbers of the faces of the given number of cubes.
+
+    Parameters
+    ----------
+    num_points : int
+        the number of cubes
+    start_num : int
+        the last used vertex number
+
+    Returns
+    -------
+    faces : numpy.ndarray
+        an (N * 6, 4) array of the cube faces, in the same order as
+        add_cube_faces writes them
+    """
+    return primitive_faces(num_points, start_num, primitives.CUBE)
+
+def _to_strings(values):
+    """
+    Returns an object array of the %s formatting of each of the given values.
+    """
+    strings = np.empty(values.shape, dtype=object)
+    strings.ravel()[:] = list(map(str, values.ravel().tolist()))
+    return strings
+
+def cube_strings(points, point_size, start_num):
+    """
+    Returns a string representing cubes at all of the given points in obj file
+    formatting.
+
+    The output is identical to calling cube_string on each point in turn, but
+    each distinct coordinate and vertex number is only formatted once.
+
+    Parameters
+    ----------
+    points : numpy.ndarray
+        an (N, 3) array of the positions of the cubes
+    point_size : float
+        the size of the cubes
+    start_num : int
+        the last used vertex number
+    """
+    return primitive_strings(points, point_size, start_num, primitives.CUBE)
+
+def primitive_strings(points, point_size, start_num, primitive, precision=None):
+    """
+    Returns a string representing the given primitive at all of the given
+    points in obj file formatting.
+
+    Each distinct coordinate and vertex number is only formatted once, by
+    filling in the template of the primitive from a table of the bounds of
+    each point (x + size, x - size, y + size, ...) and its vertex numbers.
+    With a fixed precision, the table is formatted as ascii bytes and filled
+    into a bytes template, which avoids converting each value to a string.
+
+    Parameters
+    ----------
+    points : numpy.ndarray
+        an (N, 3) array of the positions of the points
+    point_size : float
+        the size of the primitives
+    start_num : int
+        the last used vertex number
+    primitive : primitives.Primitive
+        the shape to plot each point as
+    precision : int
+        the number of decimal places to round the coordinates to, or None to
+        write them at full precision
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 3)
+    num_points = len(points)
+    num_bounds = len(primitive.bounds)
+
+    with np.errstate(over="ignore", invalid="ignore"):
+        bounds = np.empty((num_points, num_bounds))
+        for (i, (axis, sign)) in enumerate(primitive.bounds):
+            if sign == 0:
+                bounds[:, i] = points[:, axis]
+            else:
+                bounds[:, i] = points[:, axis] + (point_size * sign)
+
+    numbers = vertex_numbers(num_points, start_num, len(primitive.verticies))
+
+    table = np.empty((num_points, num_bounds + len(primitive.verticies)), dtype=object)
+    if precision is None:
+        table[:, :num_bounds] = _to_strings(bounds)
+        table[:, num_bounds:] = _to_strings(numbers)
+    else:
+        table[:, :num_bounds] = fixed_precision.fixed_chars(bounds, precision)
+        table[:, num_bounds:] = fixed_precision.fixed_chars(numbers, 0)
+
+    values = table[:, primitive.template_indices]
+
+    if precision is None:
+        return (primitive.template * num_points) % tuple(values.ravel())
+    return ((primitive.template.encode("ascii") * num_points) % tuple(values.ravel())).decode("ascii")
+
+def plot(rows, spacing, point_size, output_file, start_num, primitive="cube", precision=None):
     """
     Plots the given 3D dataset using the given range scaling and point size to
     the given output file.
@@ -130,26 +358,737 @@ def plot(rows, spacing, point_size, output_file, start_num):
         the file to write the plot to
     start_num : int
         the last used vertex number
+    primitive : str
+        the name of the shape to plot each point as
+    precision : int
+        the number of decimal places to round the coordinates to, or None to
+        write them at full precision
+
+    Returns
+    -------
+    start_num : int
+        the new last used vertex number
+    """
+    primitive = primitives.primitives[primitive]
+
+    if isinstance(rows, np.ndarray):
+        batches = (rows[i:i + PLOT_BATCH_SIZE] for i in range(0, len(rows), PLOT_BATCH_SIZE))
+    else:
+        rows = iter(rows)
+        batches = iter(lambda: list(itertools.islice(rows, PLOT_BATCH_SIZE)), [])
+
+    for batch in batches:
+        with np.errstate(over="ignore", invalid="ignore"):
+            points = np.asarray(batch, dtype=float).reshape(-1, 3) * spacing
+
+        output_file.write(primitive_strings(points, point_size, start_num, primitive, precision))
+        start_num += len(primitive.verticies) * len(points)
+
+    return start_num
+
+def point_strings(points, precision=None):
+    """
+    Returns a string representing a vertex at each of the given points in obj
+    file formatting.
+
+    Parameters
+    ----------
+    points : numpy.ndarray
+        an (N, 3) array of the positions of the verticies
+    precision : int
+        the number of decimal places to round the coordinates to, or None to
+        write them at full precision
+    """
+    points = np.asarray(points, dtype=float).reshape(-1, 3)
+    if precision is None:
+        return ("v %s %s %s\n" * len(points)) % tuple(_to_strings(points).ravel())
+    return ((b"v %s %s %s\n" * len(points)) % tuple(fixed_precision.fixed_chars(points, precision).ravel())).decode("ascii")
+
+def plot_points(rows, spacing, output_file, start_num, precision=None):
+    """
+    Plots the given 3D dataset as a single vertex per point to the given output
+    file, for use with instancing.
+
+    Parameters
+    ----------
+    rows : numpy.ndarray
+        the rows of the 3D dataset to plot
+    spacing : float
+        the scaling of the data range
+    output_file : file
+        the file to write the plot to
+    start_num : int
+        the last used vertex number
+    precision : int
+        the number of decimal places to round the coordinates to, or None to
+        write them at full precision
 
     Returns
     -------
     start_num : int
         the new last used vertex number
     """
-    for row in rows:
-        x = row[0] * spacing
-        y = row[1] * spacing
-        z = row[2] * spacing
-        add_cube(x, y, z, point_size, start_num, output_file)
-        start_num += 8
+    for i in range(0, len(rows), PLOT_BATCH_SIZE):
+        with np.errstate(over="ignore", invalid="ignore"):
+            points = np.asarray(rows[i:i + PLOT_BATCH_SIZE], dtype=float).reshape(-1, 3) * spacing
+
+        output_file.write(point_strings(points, precision))
+        start_num += len(points)
 
     return start_num
 
-def plot_file(input_filename, output_file, num_rows, columns, spacing, point_size, category_column, scale_function):
+def shard_string(rows, spacing, point_size, start_num, instanced, primitive="cube", precision=None):
+    """
+    Returns the obj file formatting of the given shard of rows.
+
+    Parameters
+    ----------
+    rows : numpy.ndarray
+        the (N, 3) scaled rows of the shard
+    spacing : float
+        the scaling of the data range
+    point_size : float
+        the size to use for the data points
+    start_num : int
+        the last used vertex number before the shard
+    instanced : bool
+        whether to write a single vertex per point rather than a primitive
+    primitive : str
+        the name of the shape to plot each point as
+    precision : int
+        the number of decimal places to round the coordinates to, or None to
+        write them at full precision
+    """
+    with np.errstate(over="ignore", invalid="ignore"):
+        points = np.asarray(rows, dtype=float).reshape(-1, 3) * spacing
+
+    if instanced:
+        return point_strings(points, precision)
+    else:
+        return primitive_strings(points, point_size, start_num, primitives.primitives[primitive], precision)
+
+def obj_parts(groups, point_size, instanced, primitive="cube", precision=None):
+    """
+    Yields the parts of an obj file for the given groups of points, in order.
+
+    Each part is either a string of text to write, or a shard of at most
+    PLOT_BATCH_SIZE rows along with the last vertex number used before it, to
+    be formatted with shard_string.
+
+    Parameters
+    ----------
+    groups : List[(str, int, Iterable[numpy.ndarray])]
+        the name, number of points, and chunks of (N, 3) scaled rows of each
+        group of points
+    point_size : float
+        the size to use for the data points
+    instanced : bool
+        whether to write a single primitive object to be instanced onto one
+        vertex per point, rather than a primitive for every point
+    primitive : str
+        the name of the shape to plot each point as
+    precision : int
+        the number of decimal places to round the coordinates to, or None to
+        write them at full precision
+    """
+    primitive_verticies = len(primitives.primitives[primitive].verticies)
+
+    start_num = 0
+    if instanced:
+        yield "# point_size %s\n" % point_size
+        yield "o %s\n" % INSTANCE_OBJECT_NAME
+        yield primitive_strings(np.zeros((1, 3)), point_size, start_num, primitives.primitives[primitive], precision)
+        start_num += primitive_verticies
+
+    point_verticies = 1 if instanced else primitive_verticies
+    for (name, num_points, chunks) in groups:
+        yield "o %s\n" % name
+        for rows in chunks:
+            for i in range(0, len(rows), PLOT_BATCH_SIZE):
+                shard = rows[i:i + PLOT_BATCH_SIZE]
+                yield (shard, start_num)
+                start_num += point_verticies * len(shard)
+
+def write_obj(output_file, groups, spacing, point_size, instanced=False, jobs=1, primitive="cube", precision=None):
+    """
+    Writes the given groups of points to the given output file in obj format,
+    with each group as its own object.
+
+    Parameters
+    ----------
+    output_file : file
+        the text file to write the plot to
+    groups : List[(str, int, Iterable[numpy.ndarray])]
+        the name, number of points, and chunks of (N, 3) scaled rows of each
+        group of points
+    spacing : float
+        the scaling of the data range
+    point_size : float
+        the size to use for the data points
+    instanced : bool
+        whether to write a single primitive object to be instanced onto one
+        vertex per point, rather than a primitive for every point
+    jobs : int
+        the number of processes to format the points with
+    primitive : str
+        the name of the shape to plot each point as
+    precision : int
+        the number of decimal places to round the coordinates to, or None to
+        write them at full precision
+    """
+    parts = obj_parts(groups, point_size, instanced, primitive, precision)
+
+    if jobs <= 1:
+        for part in parts:
+            if not isinstance(part, str):
+                (rows, start_num) = part
+                part = shard_string(rows, spacing, point_size, start_num, instanced, primitive, precision)
+            write_part(output_file, part)
+        return
+
+    # Only a few shards per process are queued up at once, so that the
+    # formatted text does not pile up in memory ahead of the writes
+    pending = collections.deque()
+    with concurrent.futures.ProcessPoolExecutor(jobs) as executor:
+        for part in parts:
+            if not isinstance(part, str):
+                (rows, start_num) = part
+                part = executor.submit(shard_string, rows, spacing, point_size, start_num, instanced, primitive, precision)
+            pending.append(part)
+
+            while len(pending) > 2 * jobs:
+                write_part(output_file, pending.popleft())
+
+        while len(pending) > 0:
+            write_part(output_file, pending.popleft())
+
+def write_part(output_file, part):
+    """
+    Writes the given string or the result of the given future of a string to
+    the given output file.
+    """
+    if isinstance(part, str):
+        output_file.write(part)
+    else:
+        output_file.write(part.result())
+
+output_formats = {
+            "obj": write_obj,
+            "ply": ply.write_ply,
+            "glb": gltf.write_glb
+        }
+
+def write_groups(output_file, output_format, groups, spacing, point_size, instanced, jobs, primitive, precision, stats, pipelined=False):
+    """
+    Writes the given groups of points to the given output file in the given
+    format, timing the writes to the output file as the "write" stage.
+
+    When pipelined, the writes are made on a background thread, so that
+    formatting the points carries on while earlier points are written.
+
+    Parameters
+    ----------
+    output_file : file
+        the file to write the plot to
+    output_format : str
+        the name of the output file format to use
+    groups : List[(str, int, Iterable[numpy.ndarray])]
+        the name, number of points, and chunks of (N, 3) scaled rows of each
+        group of points
+    stats : stats.PlotStats
+        the stats to record the time spent writing into
+    pipelined : bool
+        whether to write on a background thread
+    """
+    output_file = TimedFile(output_file, stats)
+    if not pipelined:
+        output_formats[output_format](output_file, groups, spacing, point_size, instanced, jobs, primitive, precision)
+        return
+
+    threaded_file = pipeline.ThreadedFile(output_file)
+    try:
+        output_formats[output_format](threaded_file, groups, spacing, point_size, instanced, jobs, primitive, precision)
+    finally:
+        threaded_file.finish()
+
+def plot_file(input_filename, output_file, num_rows, columns, spacing, point_size, category_column, scale_function, chunk_size=None, output_format="obj", instanced=False, jobs=1, stats=None, voxel_size=None, max_points=None, cache=None, csv_engine="c", column_dtype=None, primitive="cube", dedup=False, precision=None, pipelined=False):
     """
     Plots the data from the given input file to the given output file and
     returns the number of points plotted.
 
+    Parameters
+    ----------
+    input_filename : str
+        the path to the input data file
+    output_file : file
+        the file to write the plot to, opened in text mode for obj output or
+        binary mode for ply output, or an output.BlockWriter for either
+    num_rows : int
+        the number of rows to plot, or None to plot all rows
+    columns : List[str]
+        the columns to plot
+    spacing : float
+        the scaling of the data range
+    point_size : float
+        the size to use for the data points
+    category_column : str
+        the column to categorize the points by, or None to plot data without
+        categories
+    scale_function : str
+        the name of the data scaling function to use
+    chunk_size : int
+        the number of rows to read from the input file at a time, or None to
+        read the whole input file at once
+    output_format : str
+        the name of the output file format to use, either "obj", "ply" or
+        "glb"
+    instanced : bool
+        whether to plot the points as single verticies along with one cube to
+        instance onto them, rather than as a cube for every point
+    jobs : int
+        the number of processes to use for writing obj output
+    stats : stats.PlotStats
+        the stats to record the time spent in each stage of the plot and the
+        amount of data plotted into, or None to not record stats
+    voxel_size : float
+        the size of the voxels to downsample the points to, after scaling and
+        spacing, keeping one point per occupied voxel of each category, or
+        None to not downsample
+    max_points : int
+        the maximum number of points to plot, picking the smallest voxel size
+        that downsamples the points to within it, or None to not limit the
+        number of points
+    cache : cache.PlotCache
+        the cache to reuse the scaled data of previous plots of the same input
+        file and columns from, or None to always read the input file. Chunked
+        plots are never cached.
+    csv_engine : str
+        the parser to use for csv data files, either "c" for pandas' single
+        threaded parser or "pyarrow" for pyarrow's multithreaded parser
+    column_dtype : str
+        the dtype to read the plotted columns as, either "float64" or
+        "float32", with the category column read as a categorical, or None to
+        infer the dtypes of the columns
+    primitive : str
+        the name of the shape to plot each point as, either "cube",
+        "tetrahedron", "triangle" or "point"
+    dedup : bool
+        whether to collapse points at exactly the same scaled position in the
+        same category into a single point
+    precision : int
+        the number of decimal places to round the coordinates of obj output
+        to, or None to write them at full precision
+    pipelined : bool
+        whether to run the stages of the plot concurrently on background
+        threads, reading and scaling the next chunks of a chunked plot and
+        writing the output file while the points are formatted. Cannot be
+        used with more than one job.
+
+    Returns
+    -------
+    points : int
+        the number of points that were plotted, or None if the plot is unable
+        to be made
+    """
+    # Formatting with multiple jobs forks processes, which could deadlock on
+    # locks held by the threads of the pipeline at the time of the fork
+    if pipelined and jobs > 1:
+        print("Pipelined plots cannot be formatted with multiple jobs", file=sys.stderr)
+        return None
+
+    if chunk_size is not None:
+        if voxel_size is not None or max_points is not None:
+            print("Voxel downsampling cannot be used with chunked reading", file=sys.stderr)
+            return None
+        if dedup:
+            print("Collapsing duplicate points cannot be used with chunked reading", file=sys.stderr)
+            return None
+
+        return plot_file_chunked(input_filename, output_file, num_rows, columns, spacing, point_size, category_column, scale_function, chunk_size, output_format, instanced, jobs, stats, csv_engine, column_dtype, primitive, precision, pipelined)
+
+    if stats is None:
+        stats = PlotStats()
+
+    scaled = None
+    if cache is not None:
+        with stats.stage("cache"):
+            read_options = {"csv_engine": csv_engine, "column_dtype": column_dtype}
+            cache_key = cache.key(input_filename, num_rows, columns, category_column, scale_function, read_options)
+            scaled = cache.load(cache_key)
+        stats.count("cache_hits", 0 if scaled is None else 1)
+
+    if scaled is None:
+        scaled = read_scaled_data(input_filename, num_rows, columns, category_column, scale_function, stats, csv_engine, column_dtype)
+        if scaled is None:
+            return None
+
+        if cache is not None:
+            with stats.stage("cache"):
+                try:
+                    cache.store(cache_key, scaled)
+                except OSError as error:
+                    print("Unable to write to cache: %s" % error, file=sys.stderr)
+    else:
+        stats.count("rows_read", scaled.rows_read)
+        stats.count("rows_dropped", scaled.rows_dropped)
+
+    rows = scaled.rows
+    categories = scaled.categories
+    num_data_rows = len(rows)
+
+    groups = plot_groups(rows, categories, spacing, stats, voxel_size, max_points, dedup)
+    plotted = sum(group_points for (name, group_points, chunks) in groups)
+
+    with stats.stage("format"):
+        write_groups(output_file, output_format, groups, spacing, point_size, instanced, jobs, primitive, precision, stats, pipelined)
+    count_precision_error(stats, output_format, precision, point_size)
+
+    if plotted < num_data_rows:
+        return plotted
+
+    points = num_rows if num_rows is not None else num_data_rows
+    return points
+
+def count_precision_error(stats, output_format, precision, point_size):
+    """
+    Records the largest distance that rounding the coordinates of an obj plot
+    to the given precision can move a vertex by, on its own and relative to
+    the given point size.
+    """
+    if precision is None or output_format != "obj":
+        return
+
+    (error, relative) = fixed_precision.error_report(precision, point_size)
+    stats.counters["max_position_error"] = error
+    stats.counters["max_relative_error"] = relative
+
+def plot_groups(rows, categories, spacing, stats, voxel_size=None, max_points=None, dedup=False):
+    """
+    Returns the given scaled rows split into groups of points by category,
+    collapsing duplicate points first if asked to, and downsampling them if a
+    voxel size or maximum number of points is given.
+
+    Parameters
+    ----------
+    rows : numpy.ndarray
+        the (N, 3) scaled rows
+    categories : numpy.ndarray
+        the category of each row, or None to put all of the rows in a single
+        group named "data"
+    spacing : float
+        the scaling of the data range
+    stats : stats.PlotStats
+        the stats to record the time spent downsampling and grouping into
+    voxel_size : float
+        the size of the voxels to downsample the points to, after spacing, or
+        None to not downsample
+    max_points : int
+        the maximum number of points to keep, or None to not limit the number
+        of points
+    dedup : bool
+        whether to collapse points at exactly the same scaled position in the
+        same category into a single point, recording the number of points
+        collapsed in each category and the largest number of points at one
+        position in the stats
+
+    Returns
+    -------
+    groups : List[(str, int, List[numpy.ndarray])]
+        the name, number of points, and chunks of (N, 3) scaled rows of each
+        group of points
+    """
+    if dedup:
+        with stats.stage("dedup"):
+            codes = category_codes(categories, len(rows))
+            (keep, multiplicity) = downsample.collapse_duplicates(rows, codes)
+
+            rows = rows[keep]
+            if categories is not None:
+                categories = categories[keep]
+
+            kept_categories = categories if categories is not None else np.full(len(rows), "data", dtype=object)
+            collapsed = pd.Series(multiplicity - 1).groupby(kept_categories, sort=False, dropna=False).sum()
+            for (cat, cat_collapsed) in collapsed.items():
+                stats.count_duplicates(cat, int(cat_collapsed))
+            stats.count("duplicates_removed", int(np.sum(multiplicity - 1)))
+            stats.counters["max_multiplicity"] = int(multiplicity.max()) if len(multiplicity) > 0 else 0
+
+    if voxel_size is not None or max_points is not None:
+        with stats.stage("downsample"):
+            codes = category_codes(categories, len(rows))
+
+            points = rows * spacing
+            if voxel_size is None:
+                voxel_size = downsample.voxel_size_for_budget(points, codes, max_points)
+
+            if voxel_size is not None:
+                keep = downsample.voxel_downsample(points, codes, voxel_size)
+                stats.counters["voxel_size"] = float(voxel_size)
+                stats.count("points_removed", int(len(rows) - np.count_nonzero(keep)))
+
+                rows = rows[keep]
+                if categories is not None:
+                    categories = categories[keep]
+
+    if categories is None:
+        groups = [("data", len(rows), [rows])]
+    else:
+        with stats.stage("group"):
+            (unique_categories, order, starts) = group_categories(categories)
+            rows = rows[order]
+
+            groups = [
+                    (cat, int(starts[i + 1] - starts[i]), [rows[starts[i]:starts[i + 1]]])
+                    for (i, cat) in enumerate(unique_categories)
+                ]
+
+    for (name, group_points, chunks) in groups:
+        stats.count_category(name, group_points)
+    stats.count("points", len(rows))
+
+    return groups
+
+def category_codes(categories, num_rows):
+    """
+    Returns the integer code of the category of each row, with every row
+    given the same code if there are no categories.
+    """
+    if categories is None:
+        return np.zeros(num_rows, dtype=np.int64)
+    return pd.factorize(categories, use_na_sentinel=False)[0]
+
+def read_scaled_data(input_filename, num_rows, columns, category_column, scale_function, stats, csv_engine="c", column_dtype=None):
+    """
+    Reads the given input file and returns its scaled data, or None if the
+    columns are invalid.
+
+    Parameters
+    ----------
+    input_filename : str
+        the path to the input data file
+    num_rows : int
+        the number of rows to read, or None to read all rows
+    columns : List[str]
+        the columns to plot
+    category_column : str
+        the column to categorize the points by, or None to plot data without
+        categories
+    scale_function : str
+        the name of the data scaling function to use
+    stats : stats.PlotStats
+        the stats to record the time spent reading and scaling into
+    csv_engine : str
+        the parser to use for csv data files, either "c" or "pyarrow"
+    column_dtype : str
+        the dtype to read the plotted columns as, either "float64" or
+        "float32", or None to infer the dtypes of the columns
+
+    Returns
+    -------
+    scaled : CachedData
+        the scaled rows and their categories
+    """
+    with stats.stage("read"):
+        header = readers.read_header(input_filename, csv_engine)
+        if header is None:
+            return None
+
+    with stats.stage("validate"):
+        if not check_columns(header, columns, category_column):
+            return None
+
+    used_columns = columns if category_column is None else columns + [category_column]
+    with stats.stage("read"):
+        dtypes = readers.pinned_dtypes(columns, category_column, column_dtype)
+        original_data = readers.reader_for(input_filename, csv_engine).read(input_filename, used_columns, num_rows, dtypes)
+
+    return scale_frame(original_data, columns, category_column, scale_function, stats)
+
+def scale_frame(original_data, columns, category_column, scale_function, stats):
+    """
+    Returns the scaled rows of the given columns of the given dataframe along
+    with their categories, dropping any rows with missing values.
+
+    Parameters
+    ----------
+    original_data : pandas.DataFrame
+        the data read from the input file
+    columns : List[str]
+        the columns to plot
+    category_column : str
+        the column to categorize the points by, or None to plot data without
+        categories
+    scale_function : str
+        the name of the data scaling function to use
+    stats : stats.PlotStats
+        the stats to record the time spent scaling into
+
+    Returns
+    -------
+    scaled : CachedData
+        the scaled rows and their categories
+    """
+    stats.count("rows_read", len(original_data.index))
+
+    with stats.stage("dropna"):
+        data = pd.DataFrame(original_data, columns = columns).dropna()
+    rows_dropped = len(original_data.index) - len(data.index)
+    stats.count("rows_dropped", rows_dropped)
+
+    with stats.stage("scale"):
+        # Pinned float32 columns only save time and memory while parsing, the
+        # scaling is still done in double precision
+        rows = scale_data(data.astype(float), scale_function)
+        rows = np.asarray(rows, dtype=float)
+
+    categories = None
+    if category_column is not None:
+        categories = original_data[category_column][data.index].to_numpy()
+
+    return CachedData(rows, categories, len(original_data.index), rows_dropped)
+
+def plot_data(data, spacing, point_size, scale_function="scale", columns=None, categories=None, output_format=None, instanced=False, jobs=1, stats=None, voxel_size=None, max_points=None, primitive="cube", dedup=False, precision=None):
+    """
+    Plots the given data, which is already in memory, and returns the plot
+    either as a mesh of verticies and faces or as the bytes of a plot file.
+
+    The data is scaled, categorized and downsampled in the same way as by
+    plot_file, with any rows that have missing values dropped.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame or numpy.ndarray
+        the data to plot, either a dataframe or an (N, 3) array of rows
+    spacing : float
+        the scaling of the data range
+    point_size : float
+        the size to use for the data points
+    scale_function : str
+        the name of the data scaling function to use
+    columns : List[str]
+        the three columns of the dataframe to plot, or None to plot all of
+        its columns other than the category column. Unused for arrays.
+    categories : str or numpy.ndarray
+        the column of the dataframe or the array of the category of each row
+        to categorize the points by, or None to plot data without categories
+    output_format : str
+        the name of the file format to return the plot as, either "obj",
+        "ply" or "glb", or None to return the plot as a mesh
+    instanced : bool
+        whether to plot the points as single verticies along with one cube to
+        instance onto them, rather than as a cube for every point
+    jobs : int
+        the number of processes to use for formatting obj output
+    stats : stats.PlotStats
+        the stats to record the time spent in each stage of the plot and the
+        amount of data plotted into, or None to not record stats
+    voxel_size : float
+        the size of the voxels to downsample the points to, after scaling and
+        spacing, or None to not downsample
+    max_points : int
+        the maximum number of points to plot, or None to not limit the number
+        of points
+    primitive : str
+        the name of the shape to plot each point as
+    dedup : bool
+        whether to collapse points at exactly the same scaled position in the
+        same category into a single point
+    precision : int
+        the number of decimal places to round the coordinates of obj output
+        to, or None to write them at full precision
+
+    Returns
+    -------
+    plot : mesh.Mesh or bytes
+        the mesh of the plot, or the contents of the plot file if an output
+        format is given
+
+    Raises
+    ------
+    ValueError
+        if any of the arguments are invalid, including columns or a category
+        column that are not in the dataframe
+    """
+    if not scale_function in scaling.streaming_scalers:
+        raise ValueError("Invalid scale function: %s" % scale_function)
+    if output_format is not None and not output_format in output_formats:
+        raise ValueError("Invalid output format: %s" % output_format)
+    if not primitive in primitives.primitives:
+        raise ValueError("Invalid primitive: %s" % primitive)
+    if precision is not None and not fixed_precision.valid_decimals(precision):
+        raise ValueError("Invalid precision: %s" % precision)
+
+    if stats is None:
+        stats = PlotStats()
+
+    if isinstance(data, pd.DataFrame):
+        category_column = categories if isinstance(categories, str) else None
+        if columns is None:
+            columns = [column for column in data.columns if column != category_column]
+        columns = list(columns)
+        if len(columns) != 3:
+            raise ValueError("Expected three columns to plot, but got %s" % len(columns))
+
+        with stats.stage("validate"):
+            missing = get_missing_columns(data, columns, category_column)
+        if len(missing) > 0:
+            raise ValueError("Invalid column(s): %s\nValid columns are: %s" % (", ".join(missing), ", ".join(str(column) for column in data.columns)))
+
+        if category_column is not None:
+            categories = data[category_column]
+        frame = data[columns]
+    else:
+        data = np.asarray(data)
+        if data.ndim != 2 or data.shape[1] != 3:
+            raise ValueError("Expected an (N, 3) array of rows, but got shape %s" % (data.shape,))
+        frame = pd.DataFrame(data)
+
+    if categories is not None:
+        categories = np.asarray(categories)
+        if len(categories) != len(frame.index):
+            raise ValueError("Expected %s categories, but got %s" % (len(frame.index), len(categories)))
+
+    stats.count("rows_read", len(frame.index))
+    with stats.stage("dropna"):
+        complete = frame.notna().all(axis=1).to_numpy()
+        frame = frame[complete]
+        if categories is not None:
+            categories = categories[complete]
+    stats.count("rows_dropped", len(complete) - len(frame.index))
+
+    with stats.stage("scale"):
+        rows = scale_data(frame.astype(float), scale_function)
+        rows = np.asarray(rows, dtype=float)
+
+    groups = plot_groups(rows, categories, spacing, stats, voxel_size, max_points, dedup)
+
+    with stats.stage("format"):
+        if output_format is None:
+            return mesh.build_mesh(groups, spacing, point_size, instanced, primitive)
+
+        buffer = io.BytesIO()
+        writer = BlockWriter(buffer)
+        output_formats[output_format](TimedFile(writer, stats), groups, spacing, point_size, instanced, jobs, primitive, precision)
+        writer.flush()
+    count_precision_error(stats, output_format, precision, point_size)
+
+    return buffer.getvalue()
+
+def plot_file_chunked(input_filename, output_file, num_rows, columns, spacing, point_size, category_column, scale_function, chunk_size, output_format="obj", instanced=False, jobs=1, stats=None, csv_engine="c", column_dtype=None, primitive="cube", precision=None, pipelined=False):
+    """
+    Plots the data from the given input file to the given output file while
+    only holding a limited number of rows in memory at once, and returns the
+    number of points plotted.
+
+    The input file is read once to fit a streaming scaler to the whole
+    dataset and then again to scale and plot each chunk. When using
+    categories, the scaled points are spilled to a temporary file so that the
+    points of each category can be written together.
+
+    When pipelined, the chunks are read, scaled, formatted and written on
+    separate threads, each handing its results on to the next through a
+    bounded queue.
+
     Parameters
     ----------
     input_filename : str
@@ -169,6 +1108,32 @@ def plot_file(input_filename, output_file, num_rows, columns, spacing, point_siz
         categories
     scale_function : str
         the name of the data scaling function to use
+    chunk_size : int
+        the number of rows to read from the input file at a time
+    output_format : str
+        the name of the output file format to use, either "obj", "ply" or
+        "glb"
+    instanced : bool
+        whether to plot the points as single verticies along with one cube to
+        instance onto them, rather than as a cube for every point
+    jobs : int
+        the number of processes to use for writing obj output
+    stats : stats.PlotStats
+        the stats to record the time spent in each stage of the plot and the
+        amount of data plotted into, or None to not record stats
+    csv_engine : str
+        the parser to use for csv data files, either "c" or "pyarrow"
+    column_dtype : str
+        the dtype to read the plotted columns as, either "float64" or
+        "float32", or None to infer the dtypes of the columns
+    primitive : str
+        the name of the shape to plot each point as
+    precision : int
+        the number of decimal places to round the coordinates of obj output
+        to, or None to write them at full precision
+    pipelined : bool
+        whether to run the stages of the plot concurrently on background
+        threads
 
     Returns
     -------
@@ -176,41 +1141,171 @@ def plot_file(input_filename, output_file, num_rows, columns, spacing, point_siz
         the number of points that were plotted, or None if the plot is unable
         to be made
     """
-    original_data = pd.read_csv(input_filename, nrows = num_rows)
+    if stats is None:
+        stats = PlotStats()
 
-    missing = get_missing_columns(original_data, columns, category_column)
-    if len(missing) > 0:
-        missing_columns = ", ".join(missing)
-        valid_columns = ", ".join(list(original_data.columns))
-        error_msg = "Invalid column(s): %s\n" % missing_columns
-        error_msg += "Valid columns are: %s" % valid_columns
-        print(error_msg, file=sys.stderr)
-        return None
+    with stats.stage("read"):
+        header = readers.read_header(input_filename, csv_engine)
+        if header is None:
+            return None
 
-    data = pd.DataFrame(original_data, columns = columns).dropna()
-    data = pd.DataFrame(scale_data(data, scale_function), columns = data.columns)
+    with stats.stage("validate"):
+        if not check_columns(header, columns, category_column):
+            return None
 
-    start_num = 0
+    used_columns = columns if category_column is None else columns + [category_column]
+    read_rows = lambda chunk: chunk[columns].to_numpy(dtype=float)
+
+    def read_chunks():
+        reader = readers.reader_for(input_filename, csv_engine)
+        dtypes = readers.pinned_dtypes(columns, category_column, column_dtype)
+        chunks = reader.read_chunks(input_filename, used_columns, num_rows, chunk_size, dtypes)
+        for chunk in stats.timed_iter("read", chunks):
+            with stats.stage("dropna"):
+                rows_read = len(chunk.index)
+                chunk = chunk.dropna(subset = columns)
+            yield (chunk, rows_read)
+
+    # Each stage of a pipelined plot gets its items ahead of time on its own
+    # thread, so the next chunks are read and scaled while earlier ones are
+    # being formatted
+    stage = pipeline.threaded if pipelined else iter
+
+    # The first pass fits the scaler and counts the points, which is skipped
+    # when neither is needed
+    scaler = scaling.streaming_scalers[scale_function]()
+    num_points = None
+    if not scale_function in ["normalize", "none"] or output_format != "obj":
+        num_points = 0
+        for (chunk, rows_read) in stage(read_chunks()):
+            with stats.stage("scale"):
+                scaler.partial_fit(read_rows(chunk))
+            num_points += len(chunk.index)
 
+    def scaled_chunks():
+        for (chunk, rows_read) in stage(read_chunks()):
+            stats.count("rows_read", rows_read)
+            stats.count("rows_dropped", rows_read - len(chunk.index))
+            stats.count("points", len(chunk.index))
+
+            if len(chunk.index) > 0:
+                with stats.stage("scale"):
+                    rows = scaler.transform(read_rows(chunk))
+                yield (rows, chunk)
+
+    plotted = 0
     if category_column is None:
-        rows = zip(data[columns[0]], data[columns[1]], data[columns[2]])
+        def data_chunks():
+            nonlocal plotted
+            for (rows, chunk) in stage(scaled_chunks()):
+                plotted += len(rows)
+                stats.count_category("data", len(rows))
+                yield rows
 
-        output_file.write("o data\n")
-        plot(rows, spacing, point_size, output_file, start_num)
+        with stats.stage("format"):
+            write_groups(output_file, output_format, [("data", num_points, data_chunks())], spacing, point_size, instanced, jobs, primitive, precision, stats, pipelined)
     else:
-        data[category_column] = original_data[category_column]
+        point_bytes = 3 * np.dtype(float).itemsize
+        segments = {}
+        with tempfile.TemporaryFile() as spill_file:
+            for (rows, chunk) in stage(scaled_chunks()):
+                with stats.stage("group"):
+                    (chunk_categories, order, starts) = group_categories(chunk[category_column].to_numpy())
+                    rows = rows[order]
+
+                with stats.stage("spill"):
+                    for (i, cat) in enumerate(chunk_categories):
+                        cat_rows = rows[starts[i]:starts[i + 1]]
+                        # Each chunk has its own missing value, which is not
+                        # equal to those of the other chunks, so the missing
+                        # categories of every chunk share a single key
+                        key = MISSING_CATEGORY if pd.isna(cat) else cat
+                        segments.setdefault(key, (cat, []))[1].append((spill_file.tell(), len(cat_rows)))
+                        spill_file.write(cat_rows.tobytes())
+                        stats.count_category(cat, len(cat_rows))
+                plotted += len(rows)
 
-        categories = data[category_column].unique()
-        for cat in categories:
-            cat_data = data[data[category_column] == cat]
-            rows = zip(cat_data[columns[0]], cat_data[columns[1]], cat_data[columns[2]])
+            def spilled_chunks(cat_segments):
+                for (offset, length) in cat_segments:
+                    spill_file.seek(offset)
+                    for i in range(0, length, chunk_size):
+                        count = min(chunk_size, length - i)
+                        yield np.frombuffer(spill_file.read(count * point_bytes), dtype=float).reshape(count, 3)
 
-            output_file.write("o %s\n" % cat)
-            start_num = plot(rows, spacing, point_size, output_file, start_num)
+            groups = [
+                    (cat, sum(length for (offset, length) in cat_segments), stats.timed_iter("spill", spilled_chunks(cat_segments)))
+                    for (cat, cat_segments) in segments.values()
+                ]
 
-    points = num_rows if num_rows is not None else len(data.index)
+            with stats.stage("format"):
+                write_groups(output_file, output_format, groups, spacing, point_size, instanced, jobs, primitive, precision, stats, pipelined)
+    count_precision_error(stats, output_format, precision, point_size)
+
+    points = num_rows if num_rows is not None else plotted
     return points
 
+def group_categories(categories):
+    """
+    Groups the given per row categories in a single pass, returning the
+    distinct categories in order of first appearance, an ordering of the rows
+    that places the rows of each category next to each other, and where the
+    rows of each category start in that ordering.
+
+    Parameters
+    ----------
+    categories : numpy.ndarray
+        the category of each row
+
+    Returns
+    -------
+    unique_categories : numpy.ndarray
+        the distinct categories, in the same order as pandas.unique
+    order : numpy.ndarray
+        the indices of the rows, sorted by category while keeping the rows of
+        each category in their original order
+    starts : numpy.ndarray
+        the position in order of the first row of each category, followed by
+        the total number of rows
+    """
+    (codes, unique_categories) = pd.factorize(categories, use_na_sentinel=False)
+    order = np.argsort(codes, kind="stable")
+
+    starts = np.zeros(len(unique_categories) + 1, dtype=np.int64)
+    np.cumsum(np.bincount(codes, minlength=len(unique_categories)), out=starts[1:])
+
+    return (unique_categories, order, starts)
+
+def check_columns(data, columns, category_column):
+    """
+    Checks that all of the given columns are in the given dataframe, printing
+    an error message if any of them are missing.
+
+    Parameters
+    ----------
+    data : pandas.DataFrame
+        the dataframe to check
+    columns : List[str]
+        the columns to look for
+    category_column : str
+        the category column to look for, or None if there is no category column
+        being used
+
+    Returns
+    -------
+    valid : bool
+        True if all of the columns are present, otherwise False
+    """
+    missing = get_missing_columns(data, columns, category_column)
+    if len(missing) > 0:
+        missing_columns = ", ".join(missing)
+        valid_columns = ", ".join(list(data.columns))
+        error_msg = "Invalid column(s): %s\n" % missing_columns
+        error_msg += "Valid columns are: %s" % valid_columns
+        print(error_msg, file=sys.stderr)
+        return False
+
+    return True
+
 def get_missing_columns(data, columns, category_column):
     """
     Returns all of the given columns that are not in the given dataframe.
@@ -241,16 +1336,7 @@ def get_missing_columns(data, columns, category_column):
     return missing
 
 def scale_data(original_data, scale_name):
-    scale_functions = {
-                "maxabs_scale": preprocessing.maxabs_scale,
-                "minmax_scale": preprocessing.minmax_scale,
-                "normalize": preprocessing.normalize,
-                "robust_scale": preprocessing.robust_scale,
-                "scale": preprocessing.scale,
-                "none": lambda x: x
-            }
-
-    function = scale_functions[scale_name]
+    function = scaling.scale_functions[scale_name]
     scaled_data = function(original_data)
 
     return scaled_data
@@ -0,0 +1,332 @@
+"""
+Writing of plot files in large blocks.
+
+Plots are formatted a batch of points at a time, with small strings for the
+object names in between, so writing them straight to a default buffered text
+file results in many small writes and encoding steps. The BlockWriter instead
+encodes everything it is given into one large preallocated buffer and only
+writes to the underlying file when the buffer fills up, so a plot of millions
+of points is written in a few large blocks.
+
+Plot files whose names end in ".gz" or ".zst" are compressed as they are
+written. The blocks are handed to a background thread through a bounded queue
+to be compressed and written, so formatting the plot carries on while earlier
+blocks are compressed, and only waits when the compressor falls behind by more
+than the queue holds. Writing zstd files requires the zstandard package.
+"""
+import concurrent.futures
+import os
+import queue
+import threading
+import zlib
+
+OUTPUT_BUFFER_SIZE = 8 * 1024 * 1024
+
+COMPRESSION_QUEUE_SIZE = 4
+
+class BlockWriter:
+    """
+    A file-like object that accepts both text and bytes, encoding text as
+    utf-8, and writes them to an underlying binary file in blocks of the
+    buffer size.
+
+    Writes that are at least as large as the buffer are passed directly to the
+    underlying file after the buffer is flushed, rather than being copied.
+
+    Parameters
+    ----------
+    raw_file : file
+        the binary file to write the blocks to, ideally unbuffered
+    buffer_size : int
+        the number of bytes to accumulate before writing a block
+    """
+    def __init__(self, raw_file, buffer_size=OUTPUT_BUFFER_SIZE):
+        self.raw_file = raw_file
+        self.buffer = bytearray(buffer_size)
+        self.used = 0
+        self.raw_writes = 0
+
+    def write(self, data):
+        """
+        Writes the given string or bytes, returning their length.
+        """
+        length = len(data)
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+
+        size = len(data)
+        if self.used + size > len(self.buffer):
+            self.flush()
+
+            if size >= len(self.buffer):
+                self._write_raw(data)
+                return length
+
+        self.buffer[self.used:self.used + size] = data
+        self.used += size
+        return length
+
+    def _write_raw(self, data):
+        # Unbuffered files can write fewer bytes than they are given
+        view = memoryview(data)
+        while len(view) > 0:
+            written = self.raw_file.write(view)
+            self.raw_writes += 1
+            if written is None:
+                written = len(view)
+            view = view[written:]
+
+    def flush(self):
+        """
+        Writes any buffered data to the underlying file.
+        """
+        if self.used > 0:
+            with memoryview(self.buffer) as view:
+                self._write_raw(view[:self.used])
+            self.used = 0
+
+        if hasattr(self.raw_file, "flush"):
+            self.raw_file.flush()
+
+    def close(self):
+        """
+        Flushes any buffered data and closes the underlying file.
+        """
+        self.flush()
+        self.raw_file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+class GzipCompressor:
+    """
+    Compression of blocks into gzip format.
+    """
+    default_level = 6
+
+    def __init__(self, level):
+        self.level = level
+
+    def stream(self):
+        """
+        Returns a compressor object with compress and flush methods for
+        compressing blocks into a single stream.
+        """
+        return zlib.compressobj(self.level, zlib.DEFLATED, 31)
+
+    def compress_block(self, data):
+        """
+        Returns the given block compressed on its own, as a complete gzip
+        member. Concatenated gzip members decompress as one file.
+        """
+        compressor = self.stream()
+        return compressor.compress(data) + compressor.flush()
+
+class ZstdCompressor:
+    """
+    Compression of blocks into zstd format, using the zstandard package.
+    """
+    default_level = 3
+
+    def __init__(self, level):
+        import zstandard
+        self.compressor = zstandard.ZstdCompressor(level=level)
+
+    def stream(self):
+        """
+        Returns a compressor object with compress and flush methods for
+        compressing blocks into a single stream.
+        """
+        return self.compressor.compressobj()
+
+    def compress_block(self, data):
+        """
+        Returns the given block compressed on its own, as a complete zstd
+        frame. Concatenated zstd frames decompress as one file.
+        """
+        return self.compressor.compress(data)
+
+compressors = {
+            "gzip": GzipCompressor,
+            "zstd": ZstdCompressor
+        }
+
+compression_extensions = {
+            ".gz": "gzip",
+            ".zst": "zstd"
+        }
+
+FORMAT_EXTENSIONS = {
+            ".ply": "ply",
+            ".glb": "glb"
+        }
+
+class CompressedFile:
+    """
+    A binary file-like object that compresses the blocks written to it on
+    background threads and writes them to an underlying binary file.
+
+    Each block is put on a bounded queue, so writes only wait when the
+    compressor has fallen behind by the size of the queue. With a single
+    thread the blocks are compressed as one stream by the writer thread, while
+    with more threads each block is compressed on its own by a pool of
+    threads, and the compressed blocks are written in order by the writer
+    thread.
+
+    Parameters
+    ----------
+    raw_file : file
+        the binary file to write the compressed data to
+    compression : str
+        the name of the compression format, either "gzip" or "zstd"
+    level : int
+        the compression level, or None to use the default level of the format
+    threads : int
+        the number of threads to compress blocks with
+    queue_size : int
+        the number of blocks that can be waiting to be compressed at once
+    """
+    def __init__(self, raw_file, compression, level=None, threads=1, queue_size=COMPRESSION_QUEUE_SIZE):
+        compressor = compressors[compression]
+        self.compressor = compressor(level if level is not None else compressor.default_level)
+        self.raw_file = raw_file
+        self.bytes_written = 0
+        self.error = None
+
+        self.executor = None
+        if threads > 1:
+            self.executor = concurrent.futures.ThreadPoolExecutor(threads)
+
+        self.queue = queue.Queue(max(queue_size, threads))
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def write(self, data):
+        """
+        Queues the given bytes to be compressed, returning their length.
+        """
+        self._check_error()
+
+        # The data is copied, as writers may reuse the memory it is in
+        data = bytes(data)
+        if self.executor is not None:
+            self.queue.put(self.executor.submit(self.compressor.compress_block, data))
+        else:
+            self.queue.put(data)
+        return len(data)
+
+    def _run(self):
+        item = b""
+        try:
+            stream = self.compressor.stream() if self.executor is None else None
+            while True:
+                item = self.queue.get()
+                if item is None:
+                    break
+
+                if stream is not None:
+                    self._write_raw(stream.compress(item))
+                else:
+                    self._write_raw(item.result())
+
+            if stream is not None:
+                self._write_raw(stream.flush())
+        except BaseException as error:
+            self.error = error
+
+            # The queue is drained so that writers waiting on it are released
+            # to see the error
+            while item is not None:
+                item = self.queue.get()
+
+    def _write_raw(self, data):
+        view = memoryview(data)
+        while len(view) > 0:
+            written = self.raw_file.write(view)
+            if written is None:
+                written = len(view)
+            view = view[written:]
+        self.bytes_written += len(data)
+
+    def _check_error(self):
+        if self.error is not None:
+            raise IOError("Unable to write compressed output: %s" % self.error) from self.error
+
+    def close(self):
+        """
+        Waits for all of the queued blocks to be compressed and written, and
+        closes the underlying file.
+        """
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+        if self.executor is not None:
+            self.executor.shutdown()
+        self.raw_file.close()
+
+        self._check_error()
+
+def compression_for(filename):
+    """
+    Returns the name of the compression format to write the given file in
+    based on its extension, or None if it should not be compressed.
+    """
+    extension = os.path.splitext(filename)[1].lower()
+    return compression_extensions.get(extension)
+
+def uncompressed_filename(filename):
+    """
+    Returns the given file name without any compression extension, for
+    picking the format of the plot by its extension.
+    """
+    if compression_for(filename) is not None:
+        return os.path.splitext(filename)[0]
+    return filename
+
+def format_for(filename):
+    """
+    Returns the name of the output format to write the given file in, picked
+    by its extension, defaulting to "obj".
+    """
+    extension = os.path.splitext(uncompressed_filename(filename))[1].lower()
+    return FORMAT_EXTENSIONS.get(extension, "obj")
+
+def open_output(filename, buffer_size=OUTPUT_BUFFER_SIZE, compression_threads=1):
+    """
+    Opens the given file for writing a plot to in large blocks, compressing
+    it if its name ends in ".gz" or ".zst".
+
+    Parameters
+    ----------
+    filename : str
+        the path of the file to write
+    buffer_size : int
+        the number of bytes to accumulate before writing a block
+    compression_threads : int
+        the number of threads to compress blocks with, if the file is
+        compressed
+
+    Returns
+    -------
+    output_file : BlockWriter
+        a writer that accepts both text and bytes
+
+    Raises
+    ------
+    ImportError
+        if the file is compressed in a format whose library is not installed
+    """
+    raw_file = open(filename, "wb", buffering=0)
+
+    compression = compression_for(filename)
+    if compression is not None:
+        try:
+            raw_file = CompressedFile(raw_file, compression, threads=compression_threads)
+        except ImportError:
+            raw_file.close()
+            raise
+
+    return BlockWriter(raw_file, buffer_size)
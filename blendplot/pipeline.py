@@ -0,0 +1,185 @@
+"""
+Running the stages of a plot concurrently on background threads.
+
+By default each stage of a plot runs in turn on one thread: a chunk of the
+data file is read, then scaled, then formatted, then written, before the next
+chunk is read. When the output file is on slow storage, or the data file is
+being read from it, each stage spends much of its time waiting while the
+others sit idle.
+
+A pipelined plot instead runs each stage on its own thread, connected to the
+next stage by a bounded queue. Each stage hands its results to the next one as
+soon as they are ready and carries on with the next chunk, so reading,
+scaling, formatting and writing overlap and the plot takes about as long as
+its slowest stage. When a stage falls behind, the queue in front of it fills
+up and the stages before it wait for it, so no more than a few chunks are
+held in memory between any two stages. Each stage is a single thread taking
+items from the queue in order, so the plot is written in exactly the same
+order, with the same vertex numbering, as without pipelining.
+
+Only the reading, parsing, compression and writing of files release the GIL,
+so the stages overlap best when the plot is limited by the speed of the
+storage it reads from and writes to.
+"""
+import queue
+import threading
+
+PIPELINE_QUEUE_SIZE = 4
+
+class ThreadedIterator:
+    """
+    An iterator over the items of the given iterable, which are got ahead of
+    time on a background thread and passed through a bounded queue.
+
+    Any exception raised while getting an item is raised again by the
+    iterator in place of that item. The iterator should be closed once it is
+    no longer needed, so that the background thread stops even if not all of
+    the items have been taken.
+
+    Parameters
+    ----------
+    iterable : Iterable
+        the items to get on the background thread
+    queue_size : int
+        the number of items that can be got ahead of time
+    """
+    def __init__(self, iterable, queue_size=PIPELINE_QUEUE_SIZE):
+        self.queue = queue.Queue(queue_size)
+        self.stopping = False
+        self.finished = False
+
+        self.thread = threading.Thread(target=self._run, args=(iter(iterable),), daemon=True)
+        self.thread.start()
+
+    def _run(self, iterator):
+        try:
+            for item in iterator:
+                self.queue.put((False, item))
+                if self.stopping:
+                    break
+            self.queue.put((True, None))
+        except BaseException as error:
+            self.queue.put((True, error))
+        finally:
+            if hasattr(iterator, "close"):
+                iterator.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.finished:
+            raise StopIteration
+
+        (finished, value) = self.queue.get()
+        if finished:
+            self.finished = True
+            self.thread.join()
+            if value is not None:
+                raise value
+            raise StopIteration
+        return value
+
+    def close(self):
+        """
+        Stops the background thread, discarding any items it has got ahead of
+        time.
+        """
+        self.stopping = True
+
+        # The queue is drained so that the thread is not left waiting to put
+        # items on it
+        while not self.finished:
+            (self.finished, value) = self.queue.get()
+        self.thread.join()
+
+def threaded(iterable, queue_size=PIPELINE_QUEUE_SIZE):
+    """
+    Yields the items of the given iterable, getting them ahead of time on a
+    background thread.
+
+    Parameters
+    ----------
+    iterable : Iterable
+        the items to get on the background thread
+    queue_size : int
+        the number of items that can be got ahead of time
+
+    Returns
+    -------
+    items : Iterator
+        the items of the iterable, in order
+    """
+    iterator = ThreadedIterator(iterable, queue_size)
+    try:
+        yield from iterator
+    finally:
+        iterator.close()
+
+class ThreadedFile:
+    """
+    A file-like object that writes everything written to it to the given file
+    on a background thread.
+
+    Each write is put on a bounded queue, so writes only wait when the
+    background thread has fallen behind by the size of the queue. Any error
+    raised while writing is raised again by the next write, or by finish.
+
+    Parameters
+    ----------
+    output_file : file
+        the file to write to on the background thread
+    queue_size : int
+        the number of writes that can be waiting to be written at once
+    """
+    def __init__(self, output_file, queue_size=PIPELINE_QUEUE_SIZE):
+        self.output_file = output_file
+        self.queue = queue.Queue(queue_size)
+        self.error = None
+
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def write(self, data):
+        """
+        Queues the given string or bytes to be written, returning their
+        length.
+        """
+        self._check_error()
+
+        # Other data is copied, as writers may reuse the memory it is in
+        if not isinstance(data, (str, bytes)):
+            data = bytes(data)
+        self.queue.put(data)
+        return len(data)
+
+    def _run(self):
+        data = b""
+        try:
+            while True:
+                data = self.queue.get()
+                if data is None:
+                    break
+                self.output_file.write(data)
+        except BaseException as error:
+            self.error = error
+
+            # The queue is drained so that writers waiting on it are released
+            # to see the error
+            while data is not None:
+                data = self.queue.get()
+
+    def _check_error(self):
+        if self.error is not None:
+            raise IOError("Unable to write output: %s" % self.error) from self.error
+
+    def finish(self):
+        """
+        Waits for all of the queued writes to be written. The underlying file
+        is left open.
+        """
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join()
+
+        self._check_error()
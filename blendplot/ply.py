@@ -0,0 +1,167 @@
+"""
+Functions for writing plots as 3D models in binary ply format.
+
+The verticies and faces are packed into little-endian float32 and int32
+buffers and written directly, without formatting any numbers as text. As ply
+files have no notion of objects, each group of points is recorded in a header
+comment along with its number of points, and the points of each group are
+written next to each other in the order the comments are listed.
+
+In instanced mode a single primitive is written first, followed by one vertex
+for each point.
+"""
+import numpy as np
+
+from . import obj_graph
+from . import primitives
+
+VERTEX_DTYPE = np.dtype([("x", "<f4"), ("y", "<f4"), ("z", "<f4")])
+
+FACE_DTYPE = np.dtype([("count", "u1"), ("verticies", "<i4", (4,))])
+
+def face_dtype(face_size):
+    """
+    Returns the packed dtype of faces with the given number of verticies.
+    """
+    return np.dtype([("count", "u1"), ("verticies", "<i4", (face_size,))])
+
+def ply_header(num_points, groups, point_size, instanced=False, primitive="cube"):
+    """
+    Returns the header of a binary ply file with the given number of points.
+
+    Parameters
+    ----------
+    num_points : int
+        the total number of points in the plot
+    groups : List[(str, int)]
+        the name and number of points of each group of points
+    point_size : float
+        the size to use for the data points
+    instanced : bool
+        whether the points are written as single verticies after one primitive
+    primitive : str
+        the name of the shape to plot each point as
+    """
+    primitive_verticies = len(primitives.primitives[primitive].verticies)
+    primitive_faces = len(primitives.primitives[primitive].faces)
+
+    if instanced:
+        num_verticies = primitive_verticies + num_points
+        num_faces = primitive_faces
+    else:
+        num_verticies = num_points * primitive_verticies
+        num_faces = num_points * primitive_faces
+
+    header = "ply\n"
+    header += "format binary_little_endian 1.0\n"
+    header += "comment Created by blendplot\n"
+    header += "comment point_size %s\n" % point_size
+    if instanced:
+        header += "comment instance %s %s\n" % (primitive_verticies, obj_graph.INSTANCE_OBJECT_NAME)
+    for (name, group_points) in groups:
+        name = " ".join(str(name).splitlines())
+        header += "comment object %s %s\n" % (group_points, name)
+    header += "element vertex %s\n" % num_verticies
+    header += "property float x\n"
+    header += "property float y\n"
+    header += "property float z\n"
+    header += "element face %s\n" % num_faces
+    header += "property list uchar int vertex_indices\n"
+    header += "end_header\n"
+
+    return header.encode("ascii")
+
+def vertex_bytes(points, point_size, primitive="cube"):
+    """
+    Returns the packed verticies of primitives at the given points.
+
+    Parameters
+    ----------
+    points : numpy.ndarray
+        an (N, 3) array of the positions of the primitives
+    point_size : float
+        the size of the primitives
+    primitive : str
+        the name of the shape to plot each point as
+    """
+    verticies = obj_graph.primitive_verticies(points, point_size, primitives.primitives[primitive])
+    return np.ascontiguousarray(verticies, dtype="<f4").tobytes()
+
+def face_bytes(num_points, start_index, primitive="cube"):
+    """
+    Returns the packed faces of the given number of primitives.
+
+    Parameters
+    ----------
+    num_points : int
+        the number of primitives
+    start_index : int
+        the index of the first vertex of the first primitive
+    primitive : str
+        the name of the shape to plot each point as
+    """
+    primitive = primitives.primitives[primitive]
+
+    faces = np.empty(num_points * len(primitive.faces), dtype=face_dtype(primitive.face_size))
+    faces["count"] = primitive.face_size
+    # Ply vertex indices start at 0 rather than 1 as in obj files
+    faces["verticies"] = obj_graph.primitive_faces(num_points, start_index - 1, primitive)
+    return faces.tobytes()
+
+def write_ply(output_file, groups, spacing, point_size, instanced=False, jobs=1, primitive="cube", precision=None):
+    """
+    Writes the given groups of points to the given output file in binary ply
+    format.
+
+    Parameters
+    ----------
+    output_file : file
+        the binary file to write the plot to
+    groups : List[(str, int, Iterable[numpy.ndarray])]
+        the name, number of points, and chunks of (N, 3) scaled rows of each
+        group of points
+    spacing : float
+        the scaling of the data range
+    point_size : float
+        the size to use for the data points
+    instanced : bool
+        whether to write a single primitive to be instanced onto one vertex
+        per point, rather than a primitive for every point
+    jobs : int
+        unused, as packing the binary buffers is fast enough that it is not
+        worth splitting across processes
+    primitive : str
+        the name of the shape to plot each point as
+    precision : int
+        unused, as the coordinates are always written as 32 bit floats
+    """
+    groups = list(groups)
+    num_points = sum(group_points for (name, group_points, chunks) in groups)
+
+    output_file.write(ply_header(num_points, [(name, group_points) for (name, group_points, chunks) in groups], point_size, instanced, primitive))
+
+    if instanced:
+        output_file.write(vertex_bytes(np.zeros((1, 3)), point_size, primitive))
+
+    written = 0
+    for (name, group_points, chunks) in groups:
+        for rows in chunks:
+            for i in range(0, len(rows), obj_graph.PLOT_BATCH_SIZE):
+                batch = np.asarray(rows[i:i + obj_graph.PLOT_BATCH_SIZE], dtype=float) * spacing
+                if instanced:
+                    output_file.write(np.ascontiguousarray(batch, dtype="<f4").tobytes())
+                else:
+                    output_file.write(vertex_bytes(batch, point_size, primitive))
+                written += len(batch)
+
+    if written != num_points:
+        raise ValueError("Expected to write %s points, but got %s" % (num_points, written))
+
+    if instanced:
+        output_file.write(face_bytes(1, 0, primitive))
+        return
+
+    primitive_verticies = len(primitives.primitives[primitive].verticies)
+    for i in range(0, num_points, obj_graph.PLOT_BATCH_SIZE):
+        count = min(obj_graph.PLOT_BATCH_SIZE, num_points - i)
+        output_file.write(face_bytes(count, i * primitive_verticies, primitive))
@@ -0,0 +1,122 @@
+"""
+Fixed precision formatting of vertex coordinates for obj output.
+
+By default obj files are written with the shortest representation that
+round trips each coordinate exactly, which is up to 17 significant digits,
+far more precision than is meaningful for points that are drawn as shapes of
+a given point size. Rounding the coordinates to a fixed number of decimal
+places instead makes the files much smaller, and the coordinates can be
+formatted with vectorized integer arithmetic rather than by formatting each
+float in turn.
+
+Rounding moves each coordinate by at most half of the last decimal place, so
+each vertex moves by at most sqrt(3) / 2 times the last decimal place. With 0
+decimal places the verticies are snapped to an integer grid.
+"""
+import math
+import numpy as np
+
+MAX_DECIMALS = 15
+
+# Values with magnitudes from 2^53 on can not be scaled to an exact integer,
+# so they are formatted by Python instead, along with infinities, NaNs and
+# values whose scaled product is too close to halfway to round reliably
+MAX_EXACT = 2.0 ** 53
+
+POWERS_OF_TEN = 10 ** np.arange(19, dtype=np.int64)
+
+def valid_decimals(decimals):
+    """
+    Returns whether the given number of decimal places can be rounded to.
+    """
+    return isinstance(decimals, int) and not isinstance(decimals, bool) and 0 <= decimals <= MAX_DECIMALS
+
+def fixed_chars(values, decimals):
+    """
+    Returns the given values formatted with the given number of decimal
+    places, as a fixed width bytes array.
+
+    Each value is formatted the same as "%.*f" % (decimals, value).
+
+    Parameters
+    ----------
+    values : numpy.ndarray
+        the values to format
+    decimals : int
+        the number of decimal places to round the values to
+
+    Returns
+    -------
+    chars : numpy.ndarray
+        an array of the same shape as the given values of the formatted
+        values, as ascii bytes
+    """
+    values = np.asarray(values, dtype=float)
+    flat = values.ravel()
+
+    with np.errstate(over="ignore", invalid="ignore"):
+        product = flat * 10.0 ** decimals
+        scaled = np.rint(product)
+
+        # The multiplication rounds the product once already, so a product
+        # within an ulp of halfway between two integers may be rounded by
+        # rint the other way from the exact value, which "%.*f" rounds
+        halfway = np.abs(np.abs(product - np.floor(product)) - 0.5) <= np.abs(np.spacing(product))
+        exact = (np.abs(scaled) < MAX_EXACT) & ~halfway
+    scaled[~exact] = 0.0
+
+    negative = np.signbit(scaled)
+    digits = np.abs(scaled).astype(np.int64)
+
+    # The number of digits written, with at least one before the decimal point
+    num_digits = np.maximum(np.searchsorted(POWERS_OF_TEN, digits, side="right"), decimals + 1)
+
+    lengths = negative + num_digits + (1 if decimals > 0 else 0)
+    width = max(int(lengths.max()), 1) if len(lengths) > 0 else 1
+
+    # Each column is filled for every value at once, as the sign, a digit,
+    # the decimal point, or padding past the end of the value
+    chars = np.zeros((len(digits), width), dtype=np.uint8)
+    whole_digits = num_digits - decimals
+    for column in range(width):
+        position = column - negative
+        exponent = np.where(position < whole_digits, num_digits - 1 - position, num_digits - position)
+        exponent = np.clip(exponent, 0, len(POWERS_OF_TEN) - 1)
+
+        digit = 48 + (digits // POWERS_OF_TEN[exponent]) % 10
+        char = np.where(position < lengths - negative, digit, 0)
+        if decimals > 0:
+            char = np.where(position == whole_digits, 46, char)
+        char = np.where(position < 0, 45, char)
+
+        chars[:, column] = char
+
+    formatted = chars.view("S%s" % width).ravel()
+    if not exact.all():
+        formatted = formatted.astype(object)
+        formatted[~exact] = [("%.*f" % (decimals, value)).encode("ascii") for value in flat[~exact]]
+
+    return formatted.reshape(values.shape)
+
+def position_error(decimals):
+    """
+    Returns the largest distance that rounding the coordinates of a vertex to
+    the given number of decimal places can move it by.
+    """
+    return math.sqrt(3) / 2 * 10.0 ** -decimals
+
+def error_report(decimals, point_size):
+    """
+    Returns the error introduced by rounding to the given number of decimal
+    places, as the largest distance that a vertex can move and that distance
+    relative to the given point size.
+
+    Returns
+    -------
+    error : (float, float)
+        the largest distance a vertex can move, and that distance as a
+        fraction of the point size, or infinity for a point size of 0
+    """
+    error = position_error(decimals)
+    relative = error / point_size if point_size > 0 else math.inf
+    return (error, relative)
@@ -0,0 +1,129 @@
+"""
+The shapes that points can be plotted as.
+
+Each primitive is a set of verticies placed around the position of a point,
+offset by -1, 0 or 1 times the point size along each axis, along with the
+faces between those verticies. The default cube takes 8 verticies and 6 faces
+per point, while the cheaper primitives take far less, which makes dense plots
+much smaller and faster to write where the shape of each point cannot be seen
+anyway.
+
+The primitives are:
+
+    cube        : 8 verticies and 6 quads
+    tetrahedron : 4 verticies and 4 triangles, using alternate corners of the
+                  cube
+    triangle    : 3 verticies and 1 triangle facing the -y axis, which is the
+                  direction Blender's front view looks from
+    point       : a single vertex and no faces
+"""
+import numpy as np
+
+class Primitive:
+    """
+    A shape to plot each point as.
+
+    Parameters
+    ----------
+    name : str
+        the name of the primitive
+    verticies : List[(int, int, int)]
+        the offsets of the verticies from the point, in multiples of the point
+        size
+    faces : List[tuple]
+        the vertex numbers of each face, starting from 1 and in counter
+        clockwise order when viewed from outside, with every face having the
+        same number of verticies
+    """
+    def __init__(self, name, verticies, faces):
+        self.name = name
+        self.verticies = verticies
+        self.faces = faces
+        self.face_size = len(faces[0]) if len(faces) > 0 else 0
+
+        self.template = "v %s %s %s\n" * len(verticies) + \
+                ("f" + " %s" * self.face_size + "\n") * len(faces)
+        (self.bounds, self.template_indices) = _template_indices(verticies, faces)
+
+    def offsets(self, point_size):
+        """
+        Returns an (V, 3) array of the offsets of the verticies from the point
+        for the given point size.
+        """
+        offsets = np.array(self.verticies, dtype=float).reshape(-1, 3)
+        with np.errstate(over="ignore", invalid="ignore"):
+            return np.where(offsets == 0, 0.0, point_size * offsets)
+
+def _template_indices(verticies, faces):
+    """
+    Returns the bounds used by the verticies of a primitive, and the indices
+    into the per point table of value strings used to fill in its template.
+
+    The table holds the value of each used bound, as an (axis, sign) pair,
+    followed by the vertex numbers of the primitive.
+    """
+    bounds = sorted(set((axis, sign) for vertex in verticies for (axis, sign) in enumerate(vertex)), key=lambda bound: (bound[0], -bound[1]))
+
+    indices = []
+    for vertex in verticies:
+        for (axis, sign) in enumerate(vertex):
+            indices.append(bounds.index((axis, sign)))
+
+    for face in faces:
+        for vertex in face:
+            indices.append(len(bounds) + vertex - 1)
+
+    return (bounds, np.array(indices, dtype=np.int64))
+
+CUBE = Primitive("cube",
+        [
+            (1,-1,-1),
+            (1,-1,1),
+            (-1,-1,1),
+            (-1,-1,-1),
+            (1,1,-1),
+            (1,1,1),
+            (-1,1,1),
+            (-1,1,-1)
+        ],
+        [
+            (1,2,3,4),
+            (5,8,7,6),
+            (1,5,6,2),
+            (2,6,7,3),
+            (3,7,8,4),
+            (5,1,4,8)
+        ])
+
+TETRAHEDRON = Primitive("tetrahedron",
+        [
+            (1,1,1),
+            (1,-1,-1),
+            (-1,1,-1),
+            (-1,-1,1)
+        ],
+        [
+            (1,2,3),
+            (1,4,2),
+            (1,3,4),
+            (2,4,3)
+        ])
+
+TRIANGLE = Primitive("triangle",
+        [
+            (-1,0,-1),
+            (1,0,-1),
+            (0,0,1)
+        ],
+        [
+            (1,2,3)
+        ])
+
+POINT = Primitive("point", [(0,0,0)], [])
+
+primitives = {
+            "cube": CUBE,
+            "tetrahedron": TETRAHEDRON,
+            "triangle": TRIANGLE,
+            "point": POINT
+        }
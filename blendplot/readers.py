@@ -0,0 +1,316 @@
+"""
+Readers for the data files that can be plotted.
+
+Each reader can list the columns of a data file from its header or metadata
+alone, so that the plot columns can be checked before any data is loaded, and
+then load only the columns that are plotted. The reader is chosen by the
+extension of the data file, with any unrecognized extension read as csv.
+
+Reading Parquet and Feather files requires pyarrow, and reading HDF5 files
+requires PyTables.
+"""
+import os
+import pandas as pd
+import sys
+
+class CsvReader:
+    """
+    A reader for csv files.
+
+    Parameters
+    ----------
+    engine : str
+        the csv parser to use, either "c" for pandas' single threaded parser,
+        or "pyarrow" for pyarrow's multithreaded parser
+    """
+    def __init__(self, engine="c"):
+        self.engine = engine
+
+    def columns(self, input_filename):
+        if self.engine == "pyarrow":
+            # Checked up front so that a missing pyarrow is reported before
+            # any data is read
+            import pyarrow.csv
+        return list(pd.read_csv(input_filename, nrows = 0).columns)
+
+    def read(self, input_filename, columns, num_rows, dtypes=None):
+        if self.engine == "pyarrow":
+            if num_rows is None:
+                import pyarrow.csv
+                table = pyarrow.csv.read_csv(input_filename, convert_options = arrow_convert_options(columns, dtypes))
+                return table.to_pandas()
+
+            chunks = list(self.read_chunks(input_filename, columns, num_rows, num_rows, dtypes))
+            if len(chunks) == 0:
+                return pd.DataFrame(columns = unique(columns))
+            return pd.concat(chunks, ignore_index = True)
+
+        return pd.read_csv(input_filename, nrows = num_rows, usecols = set(columns), dtype = dtypes)
+
+    def read_chunks(self, input_filename, columns, num_rows, chunk_size, dtypes=None):
+        if self.engine == "pyarrow":
+            # The streaming reader parses blocks of bytes rather than a set
+            # number of rows, so its batches are regrouped into chunks
+            import pyarrow.csv
+            batches = pyarrow.csv.open_csv(input_filename, convert_options = arrow_convert_options(columns, dtypes))
+            yield from limit_rows(arrow_chunks(batches, chunk_size), num_rows)
+            return
+
+        reader = pd.read_csv(input_filename, nrows = num_rows, chunksize = chunk_size, usecols = set(columns), dtype = dtypes)
+        with reader:
+            for chunk in reader:
+                yield chunk
+
+class ParquetReader:
+    """
+    A reader for Parquet files, which only decodes a batch of rows at a time
+    when reading in chunks.
+    """
+    def columns(self, input_filename):
+        import pyarrow.parquet
+        schema = pyarrow.parquet.read_schema(input_filename)
+        return [name for name in schema.names if not name.startswith("__index_level_")]
+
+    def read(self, input_filename, columns, num_rows, dtypes=None):
+        if num_rows is None:
+            data = pd.read_parquet(input_filename, columns = unique(columns))
+            return with_dtypes(data.reset_index(drop = True), dtypes)
+
+        chunks = list(self.read_chunks(input_filename, columns, num_rows, num_rows, dtypes))
+        if len(chunks) == 0:
+            return pd.DataFrame(columns = unique(columns))
+        return pd.concat(chunks, ignore_index = True)
+
+    def read_chunks(self, input_filename, columns, num_rows, chunk_size, dtypes=None):
+        import pyarrow.parquet
+        parquet_file = pyarrow.parquet.ParquetFile(input_filename)
+        batches = parquet_file.iter_batches(batch_size = chunk_size, columns = unique(columns))
+        chunks = limit_rows((batch.to_pandas() for batch in batches), num_rows)
+        return (with_dtypes(chunk, dtypes) for chunk in chunks)
+
+class FeatherReader:
+    """
+    A reader for Feather files, which are memory-mapped so that reading in
+    chunks only converts a chunk of rows at a time.
+    """
+    def columns(self, input_filename):
+        import pyarrow.ipc
+        with pyarrow.ipc.open_file(pyarrow.memory_map(input_filename)) as reader:
+            return list(reader.schema.names)
+
+    def _table(self, input_filename, columns):
+        import pyarrow.feather
+        return pyarrow.feather.read_table(input_filename, columns = unique(columns), memory_map = True)
+
+    def read(self, input_filename, columns, num_rows, dtypes=None):
+        table = self._table(input_filename, columns)
+        if num_rows is not None:
+            table = table.slice(0, num_rows)
+        return with_dtypes(table.to_pandas(), dtypes)
+
+    def read_chunks(self, input_filename, columns, num_rows, chunk_size, dtypes=None):
+        table = self._table(input_filename, columns)
+        if num_rows is not None:
+            table = table.slice(0, num_rows)
+
+        for start in range(0, table.num_rows, chunk_size):
+            yield with_dtypes(table.slice(start, chunk_size).to_pandas(), dtypes)
+
+class HdfReader:
+    """
+    A reader for HDF5 files holding a single dataframe. Only the plotted
+    columns are loaded from files written in table format, while files written
+    in fixed format are loaded in full.
+    """
+    def columns(self, input_filename):
+        with pd.HDFStore(input_filename, mode = "r") as store:
+            storer = store.get_storer(self._key(store))
+            if storer.is_table:
+                return list(storer.non_index_axes[0][1])
+            return list(store.select(self._key(store), stop = 0).columns)
+
+    def _key(self, store):
+        keys = store.keys()
+        if len(keys) != 1:
+            raise ValueError("Expected one dataset in the HDF5 file, but found %s" % len(keys))
+        return keys[0]
+
+    def read(self, input_filename, columns, num_rows, dtypes=None):
+        with pd.HDFStore(input_filename, mode = "r") as store:
+            key = self._key(store)
+            if store.get_storer(key).is_table:
+                data = store.select(key, columns = unique(columns), stop = num_rows)
+            else:
+                data = store.select(key, stop = num_rows)[unique(columns)]
+        return with_dtypes(data.reset_index(drop = True), dtypes)
+
+    def read_chunks(self, input_filename, columns, num_rows, chunk_size, dtypes=None):
+        with pd.HDFStore(input_filename, mode = "r") as store:
+            key = self._key(store)
+            if not store.get_storer(key).is_table:
+                data = self.read(input_filename, columns, num_rows, dtypes)
+                for start in range(0, len(data.index), chunk_size):
+                    yield data.iloc[start:start + chunk_size]
+                return
+
+            chunks = store.select(key, columns = unique(columns), stop = num_rows, chunksize = chunk_size)
+            for chunk in chunks:
+                yield with_dtypes(chunk, dtypes)
+
+input_formats = {
+            ".csv": CsvReader,
+            ".parquet": ParquetReader,
+            ".pq": ParquetReader,
+            ".feather": FeatherReader,
+            ".h5": HdfReader,
+            ".hdf": HdfReader,
+            ".hdf5": HdfReader
+        }
+
+def reader_for(input_filename, csv_engine="c"):
+    """
+    Returns the reader to use for the given data file, based on its extension.
+
+    Parameters
+    ----------
+    input_filename : str
+        the path to the data file
+    csv_engine : str
+        the parser to use if the data file is a csv file, either "c" or
+        "pyarrow"
+
+    Returns
+    -------
+    reader : CsvReader, ParquetReader, FeatherReader or HdfReader
+        the reader for the data file
+    """
+    extension = os.path.splitext(input_filename)[1].lower()
+    reader = input_formats.get(extension, CsvReader)
+    if reader is CsvReader:
+        return CsvReader(csv_engine)
+    return reader()
+
+def pinned_dtypes(columns, category_column, column_dtype):
+    """
+    Returns the dtypes to read the given columns as, so that the parser does
+    not need to infer them, or None to infer the dtypes.
+
+    Parameters
+    ----------
+    columns : List[str]
+        the columns to plot
+    category_column : str
+        the column to categorize the points by, or None if there is no
+        category column
+    column_dtype : str
+        the dtype to read the plotted columns as, either "float64" or
+        "float32", with the category column read as a categorical, or None to
+        infer the dtypes
+    """
+    if column_dtype is None:
+        return None
+
+    dtypes = {}
+    if category_column is not None:
+        dtypes[category_column] = "category"
+    for column in columns:
+        dtypes[column] = column_dtype
+    return dtypes
+
+def read_header(input_filename, csv_engine="c"):
+    """
+    Returns an empty dataframe with the columns of the given data file, read
+    without loading any of its rows, or None if a library needed to read the
+    data file is not installed.
+
+    Parameters
+    ----------
+    input_filename : str
+        the path to the data file
+    csv_engine : str
+        the parser to use if the data file is a csv file, either "c" or
+        "pyarrow"
+    """
+    try:
+        columns = reader_for(input_filename, csv_engine).columns(input_filename)
+    except ImportError as error:
+        print("Unable to read %s: %s" % (input_filename, error), file=sys.stderr)
+        return None
+
+    return pd.DataFrame(columns = columns)
+
+def unique(columns):
+    """
+    Returns the given columns without duplicates, in their original order.
+    """
+    return list(dict.fromkeys(columns))
+
+def with_dtypes(data, dtypes):
+    """
+    Returns the given dataframe with its columns converted to the given
+    dtypes, if any.
+    """
+    if dtypes is None:
+        return data
+    return data.astype(dtypes)
+
+def arrow_convert_options(columns, dtypes):
+    """
+    Returns the pyarrow csv conversion options for reading only the given
+    columns, with the given dtypes if any.
+    """
+    import pyarrow
+    import pyarrow.csv
+
+    arrow_types = {
+            "float64": pyarrow.float64(),
+            "float32": pyarrow.float32(),
+            "category": pyarrow.dictionary(pyarrow.int32(), pyarrow.string())
+        }
+
+    column_types = {}
+    if dtypes is not None:
+        column_types = {column: arrow_types[dtype] for (column, dtype) in dtypes.items()}
+
+    return pyarrow.csv.ConvertOptions(include_columns = unique(columns), column_types = column_types)
+
+def arrow_chunks(batches, chunk_size):
+    """
+    Yields dataframes of the given number of rows from the given pyarrow
+    record batches, with the last one holding any remaining rows.
+    """
+    import pyarrow
+
+    pending = []
+    pending_rows = 0
+    for batch in batches:
+        pending.append(batch)
+        pending_rows += batch.num_rows
+
+        if pending_rows >= chunk_size:
+            table = pyarrow.Table.from_batches(pending)
+            start = 0
+            while table.num_rows - start >= chunk_size:
+                yield table.slice(start, chunk_size).to_pandas()
+                start += chunk_size
+
+            pending = table.slice(start).to_batches()
+            pending_rows = table.num_rows - start
+
+    if pending_rows > 0:
+        yield pyarrow.Table.from_batches(pending).to_pandas()
+
+def limit_rows(chunks, num_rows):
+    """
+    Yields the given chunks of rows, stopping after the given number of rows.
+    """
+    if num_rows is None:
+        yield from chunks
+        return
+
+    remaining = num_rows
+    for chunk in chunks:
+        if remaining <= 0:
+            return
+        yield chunk.iloc[:remaining]
+        remaining -= len(chunk.index)
@@ -0,0 +1,597 @@
+"""
+Functions and scalers for scaling the columns of a dataset, implemented with
+NumPy so that plotting does not need to import scikit-learn.
+
+The scaling functions scale a whole dataset at once, and reproduce the results
+of the functions of the same names in sklearn's preprocessing module, doing
+the same floating point operations in the same order.
+
+The scalers are fitted to a dataset one chunk at a time, for scaling data
+that does not fit into memory. Each scaler accumulates the statistics it needs
+with partial_fit, which can be called any number of times, and then scales
+data with transform. The results of transform match the scaling functions.
+Once fitted, freeze returns a scaler that keeps scaling any later data with
+the same parameters. When the whole dataset is in memory, freeze_scaling
+instead returns a scaler with the exact parameters of the scaling function.
+"""
+import math
+import numpy as np
+
+FLOAT_DTYPES = (np.float64, np.float32, np.float16)
+
+def as_float_array(data):
+    """
+    Returns a copy of the given data as a float array, keeping the dtype of
+    float data and converting any other data to float64, as sklearn does.
+
+    Parameters
+    ----------
+    data : array-like
+        the data to convert, such as a numpy.ndarray or pandas.DataFrame
+
+    Returns
+    -------
+    data : numpy.ndarray
+        the converted copy of the data
+    """
+    data = np.array(data)
+    if not data.dtype in FLOAT_DTYPES:
+        data = data.astype(np.float64)
+    return data
+
+def handle_near_zeros_in_scale(scale):
+    """
+    Returns the given scale values with any values too close to zero to
+    divide by replaced by ones, matching the handling of constant features in
+    sklearn's scaling functions.
+
+    A constant column can be left with a scale of a few ulps rather than
+    exactly zero by rounding error, such as in the variance accumulated by
+    StandardScaler, and dividing by it would blow that error up.
+
+    Parameters
+    ----------
+    scale : numpy.ndarray
+        the scale values
+
+    Returns
+    -------
+    scale : numpy.ndarray
+        the scale values with near zeros replaced
+    """
+    scale = as_float_array(scale)
+    scale[scale < 10 * np.finfo(scale.dtype).eps] = 1.0
+    return scale
+
+def scale(data):
+    """
+    Centers each column of the given data on its mean and scales it to unit
+    variance, matching preprocessing.scale.
+
+    Parameters
+    ----------
+    data : array-like
+        the (N, columns) data to scale
+
+    Returns
+    -------
+    scaled : numpy.ndarray
+        the scaled data
+    """
+    data = as_float_array(data)
+    mean = np.nanmean(data, axis=0)
+    std = np.nanstd(data, axis=0)
+
+    data -= mean
+    # Subtracting a mean that lost precision to large values can leave the
+    # data off center, in which case it is centered again
+    mean_1 = np.nanmean(data, axis=0)
+    if not np.allclose(mean_1, 0):
+        data -= mean_1
+
+    data /= handle_near_zeros_in_scale(std)
+    mean_2 = np.nanmean(data, axis=0)
+    if not np.allclose(mean_2, 0):
+        data -= mean_2
+
+    return data
+
+def minmax_scale(data):
+    """
+    Scales each column of the given data to the range [0, 1], matching
+    preprocessing.minmax_scale.
+
+    Parameters
+    ----------
+    data : array-like
+        the (N, columns) data to scale
+
+    Returns
+    -------
+    scaled : numpy.ndarray
+        the scaled data
+    """
+    data = as_float_array(data)
+    one = np.asarray(1, dtype=data.dtype)
+    zero = np.asarray(0, dtype=data.dtype)
+
+    data_min = np.nanmin(data, axis=0)
+    data_max = np.nanmax(data, axis=0)
+    column_scale = (one - zero) / handle_near_zeros_in_scale(data_max - data_min)
+    minimum = zero - data_min * column_scale
+
+    data *= column_scale
+    data += minimum
+    return data
+
+def maxabs_scale(data):
+    """
+    Scales each column of the given data by its maximum absolute value,
+    matching preprocessing.maxabs_scale.
+
+    Parameters
+    ----------
+    data : array-like
+        the (N, columns) data to scale
+
+    Returns
+    -------
+    scaled : numpy.ndarray
+        the scaled data
+    """
+    data = as_float_array(data)
+    data /= handle_near_zeros_in_scale(np.nanmax(np.abs(data), axis=0))
+    return data
+
+def robust_scale(data):
+    """
+    Centers each column of the given data on its median and scales it by its
+    interquartile range, matching preprocessing.robust_scale.
+
+    Parameters
+    ----------
+    data : array-like
+        the (N, columns) data to scale
+
+    Returns
+    -------
+    scaled : numpy.ndarray
+        the scaled data
+    """
+    data = as_float_array(data)
+    (center, column_scale) = robust_parameters(data)
+
+    data -= center
+    data /= column_scale
+    return data
+
+def robust_parameters(data):
+    """
+    Returns the median of each column of the given float data, along with its
+    interquartile range with any near zero ranges replaced by ones, as used by
+    robust_scale.
+    """
+    center = np.nanmedian(data, axis=0)
+
+    quantiles = np.transpose([np.nanpercentile(data[:, column], [25.0, 75.0]) for column in range(data.shape[1])])
+    return (center, handle_near_zeros_in_scale(quantiles[1] - quantiles[0]))
+
+def normalize(data):
+    """
+    Scales each row of the given data to unit length, matching
+    preprocessing.normalize.
+
+    Parameters
+    ----------
+    data : array-like
+        the (N, columns) data to scale
+
+    Returns
+    -------
+    scaled : numpy.ndarray
+        the scaled data
+    """
+    data = as_float_array(data)
+    norms = np.sqrt(np.einsum("ij,ij->i", data, data))
+    data /= handle_near_zeros_in_scale(norms)[:, np.newaxis]
+    return data
+
+scale_functions = {
+            "maxabs_scale": maxabs_scale,
+            "minmax_scale": minmax_scale,
+            "normalize": normalize,
+            "robust_scale": robust_scale,
+            "scale": scale,
+            "none": lambda data: data
+        }
+
+class IdentityScaler:
+    """
+    A scaler that leaves the data unchanged.
+    """
+    def partial_fit(self, data):
+        return self
+
+    def transform(self, data):
+        return data
+
+    def freeze(self):
+        return self
+
+class StandardScaler:
+    """
+    A scaler that centers each column on its mean and scales it to unit
+    variance, matching preprocessing.scale.
+
+    The mean and variance are accumulated with Welford's algorithm, merging in
+    each chunk using Chan et al.'s parallel update.
+    """
+    def __init__(self):
+        self.count = 0
+        self.mean = None
+        self.sum_squares = None
+
+    def partial_fit(self, data):
+        data = np.asarray(data, dtype=float)
+        chunk_count = data.shape[0]
+        if chunk_count == 0:
+            return self
+
+        chunk_mean = data.mean(axis=0)
+        chunk_sum_squares = ((data - chunk_mean) ** 2).sum(axis=0)
+
+        if self.count == 0:
+            self.count = chunk_count
+            self.mean = chunk_mean
+            self.sum_squares = chunk_sum_squares
+        else:
+            total = self.count + chunk_count
+            delta = chunk_mean - self.mean
+            self.mean = self.mean + delta * (chunk_count / total)
+            self.sum_squares = self.sum_squares + chunk_sum_squares + \
+                    (delta ** 2) * (self.count * chunk_count / total)
+            self.count = total
+
+        return self
+
+    @property
+    def variance(self):
+        return self.sum_squares / self.count
+
+    def transform(self, data):
+        data = np.asarray(data, dtype=float)
+        return (data - self.mean) / handle_near_zeros_in_scale(np.sqrt(self.variance))
+
+    def freeze(self):
+        """
+        Returns an AffineScaler with the fitted parameters of this scaler.
+        """
+        return AffineScaler(self.mean, np.sqrt(self.variance))
+
+class MinMaxScaler:
+    """
+    A scaler that scales each column to the range [0, 1], matching
+    preprocessing.minmax_scale.
+    """
+    def __init__(self):
+        self.data_min = None
+        self.data_max = None
+
+    def partial_fit(self, data):
+        data = np.asarray(data, dtype=float)
+        if data.shape[0] == 0:
+            return self
+
+        chunk_min = data.min(axis=0)
+        chunk_max = data.max(axis=0)
+
+        if self.data_min is None:
+            self.data_min = chunk_min
+            self.data_max = chunk_max
+        else:
+            self.data_min = np.minimum(self.data_min, chunk_min)
+            self.data_max = np.maximum(self.data_max, chunk_max)
+
+        return self
+
+    def transform(self, data):
+        data = np.array(data, dtype=float)
+
+        scale = 1.0 / handle_near_zeros_in_scale(self.data_max - self.data_min)
+        minimum = 0.0 - self.data_min * scale
+
+        data *= scale
+        data += minimum
+        return data
+
+    def freeze(self):
+        """
+        Returns an AffineScaler with the fitted parameters of this scaler.
+        """
+        return AffineScaler(self.data_min, self.data_max - self.data_min)
+
+class MaxAbsScaler:
+    """
+    A scaler that scales each column by its maximum absolute value, matching
+    preprocessing.maxabs_scale.
+    """
+    def __init__(self):
+        self.max_abs = None
+
+    def partial_fit(self, data):
+        data = np.asarray(data, dtype=float)
+        if data.shape[0] == 0:
+            return self
+
+        chunk_max_abs = np.abs(data).max(axis=0)
+
+        if self.max_abs is None:
+            self.max_abs = chunk_max_abs
+        else:
+            self.max_abs = np.maximum(self.max_abs, chunk_max_abs)
+
+        return self
+
+    def transform(self, data):
+        data = np.array(data, dtype=float)
+        data /= handle_near_zeros_in_scale(self.max_abs)
+        return data
+
+    def freeze(self):
+        """
+        Returns an AffineScaler with the fitted parameters of this scaler.
+        """
+        return AffineScaler(np.zeros_like(self.max_abs), self.max_abs)
+
+class Normalizer:
+    """
+    A scaler that scales each row to unit length, matching
+    preprocessing.normalize.
+
+    As each row is scaled independently, there is nothing to fit.
+    """
+    def partial_fit(self, data):
+        return self
+
+    def transform(self, data):
+        data = np.array(data, dtype=float)
+        norms = np.sqrt(np.einsum("ij,ij->i", data, data))
+        data /= handle_near_zeros_in_scale(norms)[:, np.newaxis]
+        return data
+
+    def freeze(self):
+        return self
+
+class QuantileSketch:
+    """
+    A sketch of the distribution of each column of a dataset, which can be
+    used to estimate quantiles of the data in a single pass using a bounded
+    amount of memory.
+
+    The sketch keeps a stack of sorted compactors. Level h holds values that
+    each stand for 2^h of the original values, and whenever a level fills up
+    every other value is promoted to the level above. While no compaction has
+    happened the sketch holds all of the data and quantiles are exact.
+
+    Each compaction of level h shifts the estimated rank of any value by at
+    most 2^h, and at most n / (k * 2^h) such compactions can happen, so the
+    total rank error is at most n / k per level. The capacity k is chosen
+    from the requested error so that the rank error stays within error * n
+    for datasets of up to k * 2^max_levels rows.
+    """
+    def __init__(self, error=0.001, max_levels=32):
+        self.error = error
+        self.capacity = 2 * int(math.ceil(max_levels / (2.0 * error)))
+        self.count = 0
+        self.levels = []
+        self.compactions = []
+
+    def update(self, data):
+        data = np.asarray(data, dtype=float)
+        if data.ndim == 1:
+            data = data[:, np.newaxis]
+
+        for i in range(0, data.shape[0], self.capacity):
+            self._add(0, data[i:i + self.capacity])
+            self.count += min(self.capacity, data.shape[0] - i)
+
+        return self
+
+    def _add(self, level, values):
+        if len(self.levels) == level:
+            self.levels.append(values[:0])
+            self.compactions.append(0)
+
+        self.levels[level] = np.concatenate([self.levels[level], values])
+
+        if self.levels[level].shape[0] >= self.capacity:
+            items = np.sort(self.levels[level], axis=0)
+
+            # Keep an odd item out of the compaction so the rest pair up
+            leftover = items.shape[0] % 2
+            kept = items[items.shape[0] - leftover:]
+            items = items[:items.shape[0] - leftover]
+
+            # Alternate which item of each pair survives so errors cancel out
+            offset = self.compactions[level] % 2
+            self.compactions[level] += 1
+
+            self.levels[level] = kept
+            self._add(level + 1, items[offset::2])
+
+    @property
+    def exact(self):
+        """
+        Whether the sketch still holds all of the data it has been given.
+        """
+        return self.rank_error_bound == 0
+
+    @property
+    def rank_error_bound(self):
+        """
+        The maximum number of positions that the rank of an estimated quantile
+        can be from its true rank.
+        """
+        return sum(compactions * 2 ** level for (level, compactions) in enumerate(self.compactions))
+
+    def quantiles(self, percentiles):
+        """
+        Returns estimates of the given percentiles of each column.
+
+        Parameters
+        ----------
+        percentiles : List[float]
+            the percentiles to estimate, from 0 to 100
+
+        Returns
+        -------
+        quantiles : numpy.ndarray
+            a (len(percentiles), columns) array of the estimated quantiles
+        """
+        if self.exact:
+            return np.percentile(self.levels[0], percentiles, axis=0)
+
+        values = np.concatenate(self.levels)
+        weights = np.concatenate([
+                np.full(level.shape[0], 2 ** h, dtype=float)
+                for (h, level) in enumerate(self.levels)
+            ])
+
+        quantiles = np.empty((len(percentiles), values.shape[1]))
+        for column in range(values.shape[1]):
+            order = np.argsort(values[:, column], kind="stable")
+            sorted_values = values[order, column]
+            ranks = np.cumsum(weights[order]) - 1
+
+            for (i, percentile) in enumerate(percentiles):
+                target = percentile / 100.0 * (self.count - 1)
+                index = min(np.searchsorted(ranks, target), len(sorted_values) - 1)
+                quantiles[i, column] = sorted_values[index]
+
+        return quantiles
+
+class RobustScaler:
+    """
+    A scaler that centers each column on its median and scales it by its
+    interquartile range, approximating preprocessing.robust_scale.
+
+    The quantiles are estimated with a QuantileSketch. The results are exact
+    until the data exceeds the capacity of the sketch, after which the
+    estimated median and quartiles are within error * n ranks of the true
+    values.
+    """
+    def __init__(self, error=0.001):
+        self.sketch = QuantileSketch(error)
+        self.center = None
+        self.scale = None
+
+    def partial_fit(self, data):
+        self.sketch.update(data)
+        self.center = None
+        self.scale = None
+        return self
+
+    def _fit_quantiles(self):
+        if self.sketch.exact:
+            (lower, upper) = self.sketch.quantiles([25.0, 75.0])
+            center = np.median(self.sketch.levels[0], axis=0)
+        else:
+            (lower, center, upper) = self.sketch.quantiles([25.0, 50.0, 75.0])
+
+        self.center = center
+        self.scale = handle_near_zeros_in_scale(upper - lower)
+
+    def transform(self, data):
+        if self.center is None:
+            self._fit_quantiles()
+
+        data = np.array(data, dtype=float)
+        data -= self.center
+        data /= self.scale
+        return data
+
+    def freeze(self):
+        """
+        Returns an AffineScaler with the fitted parameters of this scaler.
+        """
+        if self.center is None:
+            self._fit_quantiles()
+        return AffineScaler(self.center, self.scale)
+
+class AffineScaler:
+    """
+    A scaler with fixed parameters, which centers each column on the given
+    center and divides it by the given scale.
+
+    The freeze method of each fitted scaler returns an AffineScaler with its
+    parameters, for scaling new data in the same way as the data it was fitted
+    to.
+
+    Parameters
+    ----------
+    center : numpy.ndarray
+        the value to subtract from each column
+    scale : numpy.ndarray
+        the value to divide each column by
+    """
+    def __init__(self, center, scale):
+        self.center = np.asarray(center, dtype=float)
+        self.scale = handle_near_zeros_in_scale(scale)
+
+    def partial_fit(self, data):
+        return self
+
+    def transform(self, data):
+        data = np.array(data, dtype=float)
+        data -= self.center
+        data /= self.scale
+        return data
+
+    def freeze(self):
+        return self
+
+streaming_scalers = {
+            "maxabs_scale": MaxAbsScaler,
+            "minmax_scale": MinMaxScaler,
+            "normalize": Normalizer,
+            "robust_scale": RobustScaler,
+            "scale": StandardScaler,
+            "none": IdentityScaler
+        }
+
+frozen_parameters = {
+            "maxabs_scale": lambda data: (np.zeros(data.shape[1]), np.nanmax(np.abs(data), axis=0)),
+            "minmax_scale": lambda data: (np.nanmin(data, axis=0), np.nanmax(data, axis=0) - np.nanmin(data, axis=0)),
+            "robust_scale": robust_parameters,
+            "scale": lambda data: (np.nanmean(data, axis=0), np.nanstd(data, axis=0))
+        }
+
+def freeze_scaling(scale_name, data):
+    """
+    Returns a scaler that scales later data with the parameters that the
+    scaling function of the given name uses for the given data.
+
+    Unlike fitting a streaming scaler and freezing it, the parameters are
+    computed from the whole of the data in the same way as by the scaling
+    function, so the quantiles of robust_scale are exact however large the
+    data is.
+
+    Parameters
+    ----------
+    scale_name : str
+        the name of the scaling function
+    data : array-like
+        the (N, columns) data that was scaled
+
+    Returns
+    -------
+    scaler : AffineScaler
+        the frozen scaler, or a scaler without parameters for the scaling
+        functions that do not have any
+    """
+    data = as_float_array(data)
+    if not scale_name in frozen_parameters or len(data) == 0:
+        return streaming_scalers[scale_name]().partial_fit(data).freeze()
+
+    (center, scale) = frozen_parameters[scale_name](data)
+    return AffineScaler(center, scale)
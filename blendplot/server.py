@@ -0,0 +1,229 @@
+"""
+A long running plot server, which makes plots sent to it over a Unix domain
+socket, along with the client functions for sending it plots.
+
+Each run of blendplot spends far longer importing numpy and pandas than
+plotting a small data file. The server pays for those imports once,
+and keeps the scaled data of recently plotted data files in memory, so each
+plot sent to it only takes as long as the plotting itself.
+
+Each connection to the server sends a single request as a line of json, and
+gets back a single response as a line of json. The requests are:
+
+    {"command": "plot", "argv": [...], "cwd": "..."}
+        makes a plot from the given blendplot command line arguments, with
+        relative paths resolved from the given working directory
+    {"command": "ping"}
+        checks that the server is running
+    {"command": "stop"}
+        stops the server once the response has been sent
+
+Each response is of the form {"exit_code": 0, "stdout": "...", "stderr": "..."}
+with the exit code and output that the command would have had if it had been
+run directly.
+
+Plots are made one at a time, in the order they are received, as a plot
+changes the working directory and output streams of the whole server process.
+
+This module only imports the standard library, so that clients start quickly.
+"""
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import stat
+import sys
+import tempfile
+import traceback
+
+SOCKET_NAME = "blendplot-%s.sock"
+
+REQUEST_QUEUE_SIZE = 64
+
+def default_socket_path():
+    """
+    Returns the default path of the server socket, in the user's runtime
+    directory if there is one, or in the temporary directory otherwise.
+    """
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if runtime_dir is None or runtime_dir == "":
+        runtime_dir = tempfile.gettempdir()
+    return os.path.join(runtime_dir, SOCKET_NAME % os.getuid())
+
+class PlotServer(socketserver.UnixStreamServer):
+    """
+    A server that makes plots sent to it over a Unix domain socket, one at a
+    time.
+
+    The socket is only accessible by the user running the server. Any stale
+    socket left behind by a server that did not stop cleanly is replaced.
+
+    Parameters
+    ----------
+    socket_path : str
+        the path to listen on
+    handle_job : Callable[[List[str]], None]
+        the function that makes a plot from the given command line arguments,
+        printing its output and calling sys.exit if the plot fails
+    """
+    request_queue_size = REQUEST_QUEUE_SIZE
+
+    def __init__(self, socket_path, handle_job):
+        remove_stale_socket(socket_path)
+
+        socketserver.UnixStreamServer.__init__(self, socket_path, PlotRequestHandler)
+
+        self.socket_path = socket_path
+        self.handle_job = handle_job
+        self.stopping = False
+        self.jobs_run = 0
+
+    def server_bind(self):
+        # The socket is created with only user access, rather than changing
+        # its mode once bound, so that it is never accessible by other users
+        previous_umask = os.umask(0o177)
+        try:
+            socketserver.UnixStreamServer.server_bind(self)
+        finally:
+            os.umask(previous_umask)
+
+    def serve(self):
+        """
+        Handles requests until a stop request is received.
+        """
+        while not self.stopping:
+            self.handle_request()
+
+    def server_close(self):
+        socketserver.UnixStreamServer.server_close(self)
+        try:
+            os.remove(self.socket_path)
+        except OSError:
+            pass
+
+    def run_job(self, argv, cwd=None):
+        """
+        Makes the plot given by the given command line arguments from the
+        given working directory, and returns its exit code and output.
+
+        Returns
+        -------
+        response : dict
+            the exit code, stdout and stderr of the plot
+        """
+        stdout = io.StringIO()
+        stderr = io.StringIO()
+        exit_code = 0
+
+        previous_dir = os.getcwd()
+        try:
+            with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+                try:
+                    if cwd is not None:
+                        os.chdir(cwd)
+                    self.handle_job(argv)
+                except SystemExit as error:
+                    exit_code = exit_status(error.code)
+                except Exception:
+                    traceback.print_exc()
+                    exit_code = 1
+        finally:
+            os.chdir(previous_dir)
+            self.jobs_run += 1
+
+        return response(exit_code, stdout.getvalue(), stderr.getvalue())
+
+class PlotRequestHandler(socketserver.StreamRequestHandler):
+    """
+    Handles a single request to a PlotServer.
+    """
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline().decode("utf-8"))
+            command = request["command"]
+        except (ValueError, KeyError, TypeError):
+            self.respond(response(1, "", "Invalid request\n"))
+            return
+
+        if command == "plot":
+            self.respond(self.server.run_job(list(request.get("argv", [])), request.get("cwd")))
+        elif command == "ping":
+            self.respond(response(0, "Server is running at %s, and has made %s plots\n" % (self.server.socket_path, self.server.jobs_run), ""))
+        elif command == "stop":
+            self.server.stopping = True
+            self.respond(response(0, "Stopped server at %s\n" % self.server.socket_path, ""))
+        else:
+            self.respond(response(1, "", "Invalid command: %s\n" % command))
+
+    def respond(self, body):
+        self.wfile.write(json.dumps(body).encode("utf-8") + b"\n")
+
+def response(exit_code, stdout, stderr):
+    return {"exit_code": exit_code, "stdout": stdout, "stderr": stderr}
+
+def exit_status(code):
+    """
+    Returns the exit status for the given code passed to sys.exit, printing
+    the code to stderr if it is a message, as the interpreter would.
+    """
+    if code is None:
+        return 0
+    if isinstance(code, int):
+        return code
+
+    print(code, file=sys.stderr)
+    return 1
+
+def remove_stale_socket(socket_path):
+    """
+    Removes the socket at the given path if no server is listening on it,
+    raising an OSError if one is.
+    """
+    if not os.path.exists(socket_path):
+        return
+    if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+        raise OSError("%s already exists and is not a socket" % socket_path)
+
+    try:
+        send_request(socket_path, {"command": "ping"})
+    except OSError:
+        os.remove(socket_path)
+        return
+
+    raise OSError("A server is already running at %s" % socket_path)
+
+def send_request(socket_path, request):
+    """
+    Sends the given request to the server at the given socket path, and
+    returns its response. Raises an OSError if the server cannot be reached.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_path)
+        client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+
+        with client.makefile("rb") as reader:
+            line = reader.readline()
+
+    try:
+        return json.loads(line.decode("utf-8"))
+    except ValueError:
+        raise OSError("Invalid response from server at %s" % socket_path)
+
+def plot_remote(socket_path, argv):
+    """
+    Sends the plot given by the given command line arguments to the server at
+    the given socket path, with relative paths resolved from the current
+    working directory, and prints its output.
+
+    Returns
+    -------
+    exit_code : int
+        the exit code of the plot
+    """
+    result = send_request(socket_path, {"command": "plot", "argv": list(argv), "cwd": os.getcwd()})
+
+    sys.stdout.write(result["stdout"])
+    sys.stderr.write(result["stderr"])
+    return result["exit_code"]
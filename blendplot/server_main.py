@@ -0,0 +1,88 @@
+"""
+A cli application for running a long running plot server, which makes plots
+sent to it by blendplot-client. See the server module for how the server
+works.
+"""
+import cli.app
+import sys
+
+from . import __main__ as blendplot_main
+from . import server
+from .cache import MemoryCache
+
+# The cli only imports the plotting modules once a plot's arguments are valid,
+# so they are imported here for the server to pay for them once on startup
+from . import incremental
+from . import obj_graph
+
+@cli.app.CommandLineApp
+def blendplot_server(app):
+    """
+    Runs the cli interface for the plot server.
+
+    Parameters
+    ----------
+    app : cli.app.CommandLineApp
+        the cli information
+    """
+    main(app.params.socket, app.params.memory_cache_size)
+
+blendplot_server.add_param("--socket", help="the path of the socket to listen on, defaults to blendplot-<uid>.sock in $XDG_RUNTIME_DIR or the temporary directory", default=None, type=str)
+blendplot_server.add_param("--memory-cache-size", help="the number of megabytes of scaled data from recent plots to keep in memory", default=512, type=int)
+
+def main(socket_path=None, memory_cache_size=512):
+    """
+    Runs a plot server on the given socket until it is stopped.
+
+    Parameters
+    ----------
+    socket_path : str
+        the path of the socket to listen on, or None to use the default
+    memory_cache_size : int
+        the number of megabytes of scaled data from recent plots to keep in
+        memory
+    """
+    if socket_path is None:
+        socket_path = server.default_socket_path()
+
+    try:
+        plot_server = server.PlotServer(socket_path, job_handler(memory_cache_size * 1024 * 1024))
+    except OSError as error:
+        print("Unable to start server: %s" % error, file=sys.stderr)
+        sys.exit(1)
+
+    print("Listening on %s" % socket_path)
+    sys.stdout.flush()
+    try:
+        plot_server.serve()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        plot_server.server_close()
+
+def job_handler(memory_size):
+    """
+    Returns a function that makes a plot from blendplot command line
+    arguments, reusing an in memory cache of scaled data for each cache
+    directory between plots.
+    """
+    caches = {}
+
+    def handle_job(argv):
+        params = blendplot_main.blendplot.argparser.parse_args(argv)
+
+        plot_cache = None
+        if not params.no_cache:
+            if not params.cache_dir in caches:
+                caches[params.cache_dir] = MemoryCache(params.cache_dir, memory_size=memory_size)
+            plot_cache = caches[params.cache_dir]
+
+        blendplot_main.run_params(params, plot_cache)
+
+    return handle_job
+
+def run():
+    blendplot_server.run()
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,172 @@
+"""
+Timing and counters for the stages of making a plot, for working out where
+the time goes when plotting a dataset.
+
+The stages recorded by plot_file are "cache" (when given a cache), "read",
+"validate", "dropna", "scale", "dedup", "downsample", "group", "spill"
+(chunked plots with categories only), "format" and "write".
+
+Stages can be timed on several threads at once, as they are in pipelined
+plots, in which case the time of each stage is the total time spent in it
+across all threads, and the total time of the stages can exceed the time the
+plot took.
+"""
+import collections
+import contextlib
+import json
+import threading
+import time
+
+class PlotStats:
+    """
+    The time spent in each stage of making a plot, along with counters of the
+    amount of data that went through the stages.
+
+    Stage times are exclusive, so time spent in a stage nested inside another
+    one, such as writing to the output file while formatting points, is only
+    counted towards the inner stage. Stages are nested separately on each
+    thread.
+
+    Parameters
+    ----------
+    hooks : Dict[str, Callable[[str, float, PlotStats], None]]
+        callbacks to run at the end of each stage, keyed by stage name, or by
+        "*" to run for every stage. Each callback is given the stage name, the
+        number of seconds spent in that run of the stage, and the stats.
+    """
+    def __init__(self, hooks=None):
+        self.hooks = hooks if hooks is not None else {}
+        self.stage_seconds = collections.OrderedDict()
+        self.counters = collections.OrderedDict()
+        self.category_points = collections.OrderedDict()
+        self.category_duplicates = collections.OrderedDict()
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @property
+    def _stack(self):
+        # Each thread nests its own stages
+        if not hasattr(self._local, "stack"):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextlib.contextmanager
+    def stage(self, name):
+        """
+        Times the code run within the context as the given stage.
+        """
+        stack = self._stack
+        now = time.perf_counter()
+        if len(stack) > 0:
+            (parent, parent_start, parent_total) = stack[-1]
+            stack[-1] = (parent, None, parent_total + (now - parent_start))
+
+        stack.append((name, now, 0.0))
+        try:
+            yield
+        finally:
+            now = time.perf_counter()
+            (name, start, total) = stack.pop()
+            seconds = total + (now - start)
+            with self._lock:
+                self.stage_seconds[name] = self.stage_seconds.get(name, 0.0) + seconds
+
+            if len(stack) > 0:
+                (parent, parent_start, parent_total) = stack[-1]
+                stack[-1] = (parent, now, parent_total)
+
+            for key in [name, "*"]:
+                if key in self.hooks:
+                    self.hooks[key](name, seconds, self)
+
+    def timed_iter(self, name, iterable):
+        """
+        Yields the items of the given iterable, timing the work of getting each
+        item as the given stage.
+        """
+        iterator = iter(iterable)
+        while True:
+            with self.stage(name):
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    return
+            yield item
+
+    def count(self, name, amount):
+        """
+        Adds the given amount to the given counter.
+        """
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def count_category(self, category, points):
+        """
+        Adds the given number of points to the count for the given category.
+        """
+        category = str(category)
+        with self._lock:
+            self.category_points[category] = self.category_points.get(category, 0) + points
+
+    def count_duplicates(self, category, points):
+        """
+        Adds the given number of points collapsed as duplicates to the count
+        for the given category.
+        """
+        category = str(category)
+        with self._lock:
+            self.category_duplicates[category] = self.category_duplicates.get(category, 0) + points
+
+    @property
+    def total_seconds(self):
+        return sum(self.stage_seconds.values())
+
+    def to_dict(self):
+        """
+        Returns the stats as a dictionary that can be serialized as json.
+        """
+        return {
+                "stage_seconds": dict(self.stage_seconds),
+                "total_seconds": self.total_seconds,
+                "counters": dict(self.counters),
+                "category_points": dict(self.category_points),
+                "category_duplicates": dict(self.category_duplicates)
+            }
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), indent=2)
+
+    def to_text(self):
+        """
+        Returns the stats as a human readable report.
+        """
+        total = self.total_seconds
+        lines = []
+        for (name, seconds) in self.stage_seconds.items():
+            percent = 100.0 * seconds / total if total > 0 else 0.0
+            lines.append("%-10s %10.4fs %5.1f%%" % (name, seconds, percent))
+        for (name, value) in self.counters.items():
+            lines.append("%-14s %s" % (name, value))
+        for (category, points) in self.category_points.items():
+            lines.append("points in %s: %s" % (category, points))
+        for (category, points) in self.category_duplicates.items():
+            lines.append("duplicates in %s: %s" % (category, points))
+        return "\n".join(lines)
+
+class TimedFile:
+    """
+    A wrapper around a file that times each write as the "write" stage and
+    counts the number of bytes written.
+    """
+    def __init__(self, output_file, stats):
+        self.output_file = output_file
+        self.stats = stats
+
+    def write(self, data):
+        with self.stats.stage("write"):
+            written = self.output_file.write(data)
+        if isinstance(data, str) and not data.isascii():
+            self.stats.count("bytes_written", len(data.encode()))
+        else:
+            self.stats.count("bytes_written", len(data))
+        return written
@@ -13,10 +13,15 @@ setup( \
       packages=['blendplot'],
       install_requires=[
           'pyCLI',
-          'scikit-learn',
-          'scipy',
+          'numpy',
           'pandas'
       ],
+      extras_require={
+          'parquet': ['pyarrow'],
+          'feather': ['pyarrow'],
+          'hdf5': ['tables'],
+          'zstd': ['zstandard']
+      },
       include_package_data=True,
       package_data={
           '': ['LICENSE']
@@ -31,6 +36,9 @@ setup( \
       entry_points = {
           'console_scripts': [
               'blendplot = blendplot.__main__:run',
+              'blendplot-batch = blendplot.batch_main:run',
+              'blendplot-server = blendplot.server_main:run',
+              'blendplot-client = blendplot.client_main:run',
           ],              
       },
      )
@@ -0,0 +1,116 @@
+import io
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from blendplot.batch import *
+from blendplot.cache import CachedData
+from blendplot.obj_graph import plot_file
+from blendplot.stats import PlotStats
+
+import utilities
+
+class TestBatch(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        shutil.copy("test/resources/data_01.csv", os.path.join(self.directory, "data.csv"))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_job_file(self, batch):
+        job_filename = os.path.join(self.directory, "jobs.json")
+        with open(job_filename, "w") as job_file:
+            json.dump(batch, job_file)
+        return job_filename
+
+    def read_output(self, filename):
+        with open(os.path.join(self.directory, filename), "rb") as output_file:
+            return output_file.read()
+
+    def expected_output(self, output_format="obj", **kwargs):
+        output_file = io.StringIO() if output_format == "obj" else io.BytesIO()
+        plot_file("test/resources/data_01.csv", output_file, output_format=output_format, **kwargs)
+        output = output_file.getvalue()
+        return output.encode("utf-8") if output_format == "obj" else output
+
+    def test_run_batch(self):
+        job_filename = self.write_job_file({
+                "input_file": "data.csv",
+                "plots": [
+                    {"output_file": "abc.obj", "columns": ["a", "b", "c"], "spacing": 0.5, "point_size": 0.1},
+                    {"output_file": "abc_large.obj", "columns": ["a", "b", "c"], "spacing": 1.0, "point_size": 0.2},
+                    {"output_file": "abd.ply", "columns": ["a", "b", "d"], "category": "category", "scale_function": "minmax_scale", "instanced": True}
+                ]
+            })
+        (input_filename, num_rows, jobs, csv_engine, column_dtype) = load_job_file(job_filename)
+
+        for workers in [1, 2]:
+            stats = PlotStats()
+            points = run_batch(input_filename, jobs, num_rows, workers, csv_engine, column_dtype, stats)
+
+            self.assertEqual(points, [5, 5, 5])
+
+            # The first two plots share their scaled data
+            self.assertEqual(stats.counters["rows_read"], 10)
+
+            self.assertEqual(self.read_output("abc.obj"), self.expected_output(num_rows=None, columns=["a", "b", "c"], spacing=0.5, point_size=0.1, category_column=None, scale_function="scale"))
+            self.assertEqual(self.read_output("abc_large.obj"), self.expected_output(num_rows=None, columns=["a", "b", "c"], spacing=1.0, point_size=0.2, category_column=None, scale_function="scale"))
+            self.assertEqual(self.read_output("abd.ply"), self.expected_output("ply", num_rows=None, columns=["a", "b", "d"], spacing=2.0, point_size=0.0625, category_column="category", scale_function="minmax_scale", instanced=True))
+
+    @unittest.skipUnless(multiprocessing.get_start_method() == "fork", "requires forked worker processes")
+    def test_run_batch_workers_share_scaled_data(self):
+        jobs = [PlotJob(os.path.join(self.directory, "abc_%s.obj" % i), ["a", "b", "c"]) for i in range(4)]
+
+        # Forked workers inherit the scaled data, so it is never pickled
+        with mock.patch.object(CachedData, "__reduce_ex__", side_effect=AssertionError("scaled data was pickled")):
+            points = run_batch("test/resources/data_01.csv", jobs, workers=2)
+
+        self.assertEqual(points, [5, 5, 5, 5])
+
+    def test_run_batch_invalid_column(self):
+        jobs = [
+                PlotJob(os.path.join(self.directory, "abc.obj"), ["a", "b", "c"]),
+                PlotJob(os.path.join(self.directory, "abe.obj"), ["a", "b", "e"])
+            ]
+
+        (points, stderr) = utilities.capture_stderr(lambda _: run_batch("test/resources/data_01.csv", jobs))
+
+        self.assertIsNone(points)
+        self.assertIn("Invalid column(s): e", stderr)
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "abc.obj")))
+
+    def test_load_job_file(self):
+        job_filename = self.write_job_file({
+                "input_file": "data.csv",
+                "rows": 3,
+                "plots": [{"output_file": "abc.ply", "columns": ["a", "b", "c"], "category": "category"}]
+            })
+
+        (input_filename, num_rows, jobs, csv_engine, column_dtype) = load_job_file(job_filename)
+
+        self.assertEqual(input_filename, os.path.join(self.directory, "data.csv"))
+        self.assertEqual(num_rows, 3)
+        self.assertEqual(jobs[0].output_file, os.path.join(self.directory, "abc.ply"))
+        self.assertEqual(jobs[0].output_format, "ply")
+        self.assertEqual(jobs[0].category_column, "category")
+        self.assertEqual(jobs[0].scale_function, "scale")
+        self.assertEqual((csv_engine, column_dtype), ("c", None))
+
+    def test_load_job_file_invalid(self):
+        invalid_batches = [
+                {"plots": []},
+                {"input_file": "data.csv", "plots": [{"output_file": "a.obj", "columns": ["a", "b"]}]},
+                {"input_file": "data.csv", "plots": [{"output_file": "a.obj", "columns": ["a", "b", "c"], "colour": "red"}]},
+                {"input_file": "data.csv", "plots": [{"output_file": "a.obj", "columns": ["a", "b", "c"], "scale_function": "unknown"}]},
+                {"input_file": "data.csv", "plots": [{"output_file": "a.stl", "columns": ["a", "b", "c"], "format": "stl"}]},
+                {"input_file": "data.csv", "csv_engine": "python", "plots": []}
+            ]
+
+        for batch in invalid_batches:
+            with self.assertRaises(ValueError):
+                load_job_file(self.write_job_file(batch))
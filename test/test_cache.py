@@ -0,0 +1,184 @@
+import io
+import numpy as np
+import os
+import shutil
+import tempfile
+import time
+import unittest
+
+from blendplot.cache import *
+from blendplot.obj_graph import plot_file
+from blendplot.stats import PlotStats
+
+class TestCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = PlotCache(os.path.join(self.directory, "cache"))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def plot(self, input_filename="test/resources/data_01.csv", category_column="category", **kwargs):
+        stats = PlotStats()
+        output_file = io.StringIO()
+        points = plot_file(input_filename, output_file, None, ["a", "b", "c"], 0.5, 0.1, category_column, "scale", stats=stats, cache=self.cache, **kwargs)
+        return (points, output_file.getvalue(), stats)
+
+    def test_plot_file_cache(self):
+        for category_column in [None, "category"]:
+            expected_output = io.StringIO()
+            plot_file("test/resources/data_01.csv", expected_output, None, ["a", "b", "c"], 0.5, 0.1, category_column, "scale")
+
+            (first_points, first_output, first_stats) = self.plot(category_column=category_column)
+            (second_points, second_output, second_stats) = self.plot(category_column=category_column)
+
+            self.assertEqual(first_points, 5)
+            self.assertEqual(second_points, 5)
+            self.assertEqual(first_output, expected_output.getvalue())
+            self.assertEqual(second_output, expected_output.getvalue())
+
+            self.assertEqual(first_stats.counters["cache_hits"], 0)
+            self.assertEqual(second_stats.counters["cache_hits"], 1)
+            self.assertNotIn("read", second_stats.stage_seconds)
+            self.assertNotIn("scale", second_stats.stage_seconds)
+            self.assertEqual(second_stats.counters["rows_read"], first_stats.counters["rows_read"])
+            self.assertEqual(second_stats.category_points, first_stats.category_points)
+
+    def test_plot_file_cache_jobs(self):
+        (first_points, first_output, first_stats) = self.plot(jobs=2)
+        (second_points, second_output, second_stats) = self.plot(jobs=2)
+
+        self.assertEqual(second_stats.counters["cache_hits"], 1)
+        self.assertEqual(second_output, first_output)
+
+    def test_plot_file_cache_modified_input(self):
+        input_filename = os.path.join(self.directory, "data.csv")
+        shutil.copy("test/resources/data_01.csv", input_filename)
+
+        self.plot(input_filename)
+        with open(input_filename, "a") as input_file:
+            input_file.write("2.0,3.0,4.0,5.0,D\n")
+        (points, output, stats) = self.plot(input_filename)
+
+        self.assertEqual(stats.counters["cache_hits"], 0)
+        self.assertEqual(points, 6)
+
+    def test_plot_file_cache_invalid_column(self):
+        self.plot(category_column="category")
+
+        stats = PlotStats()
+        points = plot_file("test/resources/data_01.csv", io.StringIO(), None, ["a", "b", "e"], 0.5, 0.1, None, "scale", stats=stats, cache=self.cache)
+
+        self.assertIsNone(points)
+        self.assertEqual(len(self.cache.entries()), 1)
+
+    def test_store_categories(self):
+        categories = np.array(["A", np.nan, 3, "A"], dtype=object)
+        self.cache.store("key", CachedData(np.zeros((4, 3)), categories, 5, 1))
+
+        loaded = self.cache.load("key")
+
+        np.testing.assert_array_equal(loaded.rows, np.zeros((4, 3)))
+        self.assertEqual(list(loaded.categories[[0, 2, 3]]), ["A", 3, "A"])
+        self.assertTrue(np.isnan(loaded.categories[1]))
+        self.assertEqual((loaded.rows_read, loaded.rows_dropped), (5, 1))
+
+    def test_store_numeric_categories(self):
+        for categories in [np.array([3, 1, 3]), np.array([2.5, np.nan, 2.5])]:
+            self.cache.store("key", CachedData(np.zeros((3, 3)), categories, 3, 0))
+
+            loaded = self.cache.load("key")
+
+            self.assertEqual(loaded.categories.dtype, categories.dtype)
+            np.testing.assert_array_equal(loaded.categories, categories)
+
+    def test_load_never_unpickles(self):
+        self.cache.store("key", CachedData(np.zeros((2, 3)), np.array(["A", "B"], dtype=object), 2, 0))
+        entry_dir = os.path.join(self.cache.cache_dir, "key")
+
+        # An entry with pickled categories, such as one planted in a shared
+        # cache directory, is treated as a cache miss rather than loaded
+        os.remove(os.path.join(entry_dir, "uniques.json"))
+        np.save(os.path.join(entry_dir, "uniques.npy"), np.array(["A", "B"], dtype=object), allow_pickle=True)
+        self.assertIsNone(self.cache.load("key"))
+
+        np.save(os.path.join(entry_dir, "codes.npy"), np.array([0, 1], dtype=object), allow_pickle=True)
+        self.assertIsNone(self.cache.load("key"))
+
+    def test_load_corrupt_categories(self):
+        self.cache.store("key", CachedData(np.zeros((2, 3)), np.array(["A", "B"], dtype=object), 2, 0))
+        uniques_filename = os.path.join(self.cache.cache_dir, "key", "uniques.json")
+
+        for uniques in ["not json", '{"dtype": "not a dtype", "values": []}', '{"dtype": "|O", "values": ["A"]}']:
+            with open(uniques_filename, "w") as uniques_file:
+                uniques_file.write(uniques)
+
+            self.assertIsNone(self.cache.load("key"))
+
+    def test_load_missing(self):
+        self.assertIsNone(self.cache.load("missing"))
+
+    def test_evict_least_recently_used(self):
+        data = CachedData(np.zeros((1000, 3)), None, 1000, 0)
+        self.cache.store("first", data)
+        self.cache.store("second", data)
+        entry_size = self.cache.entries()[0][2]
+
+        # Using the first entry makes the second the least recently used
+        time.sleep(0.01)
+        self.cache.load("first")
+
+        self.cache.max_size = 2 * entry_size
+        self.cache.store("third", data)
+
+        self.assertEqual(sorted(key for (key, last_used, size) in self.cache.entries()), ["first", "third"])
+
+class TestMemoryCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.cache = MemoryCache(os.path.join(self.directory, "cache"))
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def test_load_from_memory(self):
+        data = CachedData(np.ones((10, 3)), np.array(["A"] * 10, dtype=object), 10, 0)
+        self.cache.store("key", data)
+        shutil.rmtree(self.cache.cache_dir)
+
+        self.assertIs(data, self.cache.load("key"))
+
+    def test_load_from_disk(self):
+        PlotCache(self.cache.cache_dir).store("key", CachedData(np.ones((10, 3)), None, 10, 0))
+
+        first = self.cache.load("key")
+        shutil.rmtree(self.cache.cache_dir)
+
+        np.testing.assert_array_equal(np.ones((10, 3)), first.rows)
+        self.assertIs(first, self.cache.load("key"))
+
+    def test_forget_least_recently_used(self):
+        data = CachedData(np.zeros((1000, 3)), None, 1000, 0)
+        self.cache.memory_size = 2 * entry_size(data)
+
+        self.cache.store("first", data)
+        self.cache.store("second", data)
+        self.cache.load("first")
+        self.cache.store("third", data)
+
+        self.assertEqual(["first", "third"], list(self.cache.memory))
+
+    def test_too_large(self):
+        self.cache.memory_size = 100
+        self.cache.store("key", CachedData(np.zeros((1000, 3)), None, 1000, 0))
+
+        self.assertEqual([], list(self.cache.memory))
+        self.assertIsNotNone(self.cache.load("key"))
+
+    def test_plot_file(self):
+        for i in range(2):
+            stats = PlotStats()
+            plot_file("test/resources/data_01.csv", io.StringIO(), None, ["a", "b", "c"], 0.5, 0.1, "category", "scale", stats=stats, cache=self.cache)
+
+        self.assertEqual(1, stats.counters["cache_hits"])
+        self.assertEqual(1, len(self.cache.memory))
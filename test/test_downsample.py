@@ -0,0 +1,156 @@
+from hypothesis import given
+import hypothesis.strategies as st
+import io
+import json
+import numpy as np
+import unittest
+
+from blendplot.downsample import *
+from blendplot.obj_graph import plot_data, plot_file
+from blendplot.stats import PlotStats
+
+import utilities
+
+class TestDownsample(unittest.TestCase):
+    def test_voxel_downsample(self):
+        points = np.array([
+                (0.1, 0.1, 0.1),
+                (0.2, 0.3, 0.4),
+                (1.5, 0.1, 0.1),
+                (0.3, 0.3, 0.3),
+                (-0.1, 0.1, 0.1)
+            ])
+        codes = np.array([0, 0, 0, 1, 0])
+
+        actual = voxel_downsample(points, codes, 1.0)
+
+        self.assertEqual(actual.tolist(), [True, False, True, True, False])
+
+    def test_voxel_size_for_budget(self):
+        points = np.random.RandomState(0).uniform(size=(10000, 3))
+        codes = np.zeros(len(points), dtype=np.int64)
+
+        voxel_size = voxel_size_for_budget(points, codes, 500)
+        kept = np.count_nonzero(voxel_downsample(points, codes, voxel_size))
+
+        self.assertLessEqual(kept, 500)
+        self.assertGreater(kept, 250)
+
+    def test_voxel_size_for_budget_not_needed(self):
+        points = np.zeros((10, 3))
+        codes = np.zeros(10, dtype=np.int64)
+
+        self.assertIsNone(voxel_size_for_budget(points, codes, 10))
+
+    def test_plot_file_voxel_size(self):
+        stats = PlotStats()
+        output_file = io.StringIO()
+
+        actual_ret = plot_file("test/resources/data_01.csv", output_file, None, ["a", "b", "c"], 0.5, 0.1, "category", "minmax_scale", stats=stats, voxel_size=10.0)
+
+        self.assertEqual(actual_ret, 3)
+        self.assertEqual(stats.counters["points_removed"], 2)
+        self.assertEqual(output_file.getvalue().count("o "), 3)
+        self.assertEqual(output_file.getvalue().count("v "), 3 * 8)
+
+    def test_plot_file_max_points(self):
+        output_file = io.StringIO()
+
+        actual_ret = plot_file("test/resources/data_01.csv", output_file, None, ["a", "b", "c"], 0.5, 0.1, None, "scale", max_points=2)
+
+        self.assertLessEqual(actual_ret, 2)
+        self.assertEqual(output_file.getvalue().count("v "), actual_ret * 8)
+
+    def test_plot_file_downsample_stats_json(self):
+        for arguments in [dict(voxel_size=10.0), dict(max_points=2)]:
+            stats = PlotStats()
+
+            plot_file("test/resources/data_01.csv", io.StringIO(), None, ["a", "b", "c"], 0.5, 0.1, "category", "scale", stats=stats, **arguments)
+
+            counters = json.loads(stats.to_json())["counters"]
+            self.assertEqual(counters["points_removed"], stats.counters["points_removed"])
+            self.assertEqual(counters["voxel_size"], stats.counters["voxel_size"])
+
+    def test_collapse_duplicates(self):
+        points = np.array([
+                (0.0, 0.0, 0.0),
+                (1.0, 1.0, 1.0),
+                (-0.0, 0.0, 0.0),
+                (0.0, 0.0, 0.0),
+                (1.0, 1.0, 1.0),
+                (1.0, 1.0, 1.5)
+            ])
+        codes = np.array([0, 0, 0, 1, 0, 0])
+
+        (keep, multiplicity) = collapse_duplicates(points, codes)
+
+        self.assertEqual(keep.tolist(), [True, True, False, True, False, True])
+        self.assertEqual(multiplicity.tolist(), [2, 2, 1, 1])
+
+    def test_plot_data_dedup(self):
+        rows = np.array([[1.0, 2.0, 3.0], [1.0, 2.0, 3.0], [4.0, 5.0, 6.0], [1.0, 2.0, 3.0], [1.0, 2.0, 3.0]])
+        categories = np.array(["x", "x", "x", "y", "x"], dtype=object)
+        stats = PlotStats()
+
+        actual = plot_data(rows, 1.0, 0.1, "none", categories=categories, stats=stats, dedup=True)
+
+        self.assertEqual(actual.groups, [("x", 2), ("y", 1)])
+        np.testing.assert_allclose(actual.verticies.reshape(-1, 8, 3).mean(axis=1), [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0], [1.0, 2.0, 3.0]])
+        self.assertEqual(stats.counters["duplicates_removed"], 2)
+        self.assertEqual(stats.counters["max_multiplicity"], 3)
+        self.assertEqual(dict(stats.category_duplicates), {"x": 2, "y": 0})
+        self.assertIn("duplicates in x: 2", stats.to_text())
+
+    def test_plot_file_dedup_no_duplicates(self):
+        expected_file = io.StringIO()
+        actual_file = io.StringIO()
+
+        plot_file("test/resources/data_01.csv", expected_file, None, ["a", "b", "c"], 0.5, 0.1, "category", "scale")
+        actual_ret = plot_file("test/resources/data_01.csv", actual_file, None, ["a", "b", "c"], 0.5, 0.1, "category", "scale", dedup=True)
+
+        self.assertEqual(actual_ret, 5)
+        self.assertEqual(actual_file.getvalue(), expected_file.getvalue())
+
+    def test_plot_file_dedup_chunked(self):
+        (actual_ret, stderr) = utilities.capture_stderr(lambda _: plot_file("test/resources/data_01.csv", io.StringIO(), None, ["a", "b", "c"], 0.5, 0.1, None, "scale", chunk_size=2, dedup=True))
+
+        self.assertIsNone(actual_ret)
+        self.assertEqual(stderr, "Collapsing duplicate points cannot be used with chunked reading\n")
+
+@given(
+  st.lists(st.tuples(st.integers(0, 3), st.integers(0, 3), st.integers(0, 3), st.integers(0, 2)), min_size=1, max_size=50)
+  )
+def test_collapse_duplicates_counts(rows):
+    """
+    The kept points should all be distinct within their category, cover every
+    point, and have multiplicities adding up to the number of points.
+    """
+    points = np.array([row[:3] for row in rows], dtype=float)
+    codes = np.array([row[3] for row in rows])
+
+    (keep, multiplicity) = collapse_duplicates(points, codes)
+
+    kept = [tuple(row) for (row, k) in zip(rows, keep) if k]
+    assert len(kept) == len(set(kept))
+    assert set(kept) == set(tuple(row) for row in rows)
+    assert multiplicity.sum() == len(rows)
+    assert multiplicity.tolist() == [rows.count(row) for row in kept]
+
+@given(
+  st.lists(st.tuples(st.floats(-100, 100), st.floats(-100, 100), st.floats(-100, 100)), min_size=1, max_size=50),
+  st.floats(0.01, 10.0)
+  )
+def test_voxel_downsample_one_per_voxel(points, voxel_size):
+    """
+    The kept points should each be in a different voxel, and every dropped
+    point should share a voxel with a kept point.
+    """
+    points = np.array(points)
+    codes = np.zeros(len(points), dtype=np.int64)
+
+    keep = voxel_downsample(points, codes, voxel_size)
+
+    voxels = [tuple(v) for v in np.floor((points - points.min(axis=0)) / voxel_size)]
+    kept_voxels = [v for (v, k) in zip(voxels, keep) if k]
+    assert len(kept_voxels) == len(set(kept_voxels))
+    assert set(kept_voxels) == set(voxels)
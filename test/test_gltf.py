@@ -0,0 +1,143 @@
+from hypothesis import given
+import hypothesis.strategies as st
+import io
+import json
+import numpy as np
+import struct
+import unittest
+
+from blendplot.gltf import *
+from blendplot.obj_graph import plot_data
+from blendplot.primitives import primitives
+
+from utilities import plot_file_output, read_obj
+
+def read_glb(data):
+    """
+    Returns the json and binary buffer of the given glb file, along with the
+    translations of the points of each node.
+    """
+    (magic, version, length) = struct.unpack("<III", data[:12])
+    assert (magic, version, length) == (GLB_MAGIC, GLB_VERSION, len(data))
+
+    (json_length, json_type) = struct.unpack("<II", data[12:20])
+    assert json_type == JSON_CHUNK_TYPE and json_length % 4 == 0
+    gltf = json.loads(data[20:20 + json_length].decode("utf-8"))
+
+    (bin_length, bin_type) = struct.unpack("<II", data[20 + json_length:28 + json_length])
+    assert bin_type == BIN_CHUNK_TYPE and bin_length % 4 == 0
+    buffer = data[28 + json_length:]
+    assert len(buffer) == bin_length and bin_length >= gltf["buffers"][0]["byteLength"]
+
+    translations = []
+    for node in gltf["nodes"]:
+        accessor = gltf["accessors"][node["extensions"][INSTANCING_EXTENSION]["attributes"]["TRANSLATION"]]
+        view = gltf["bufferViews"][accessor["bufferView"]]
+        values = np.frombuffer(buffer[view["byteOffset"]:view["byteOffset"] + view["byteLength"]], dtype="<f4")
+        translations.append(values.reshape(accessor["count"], 3))
+
+    return (gltf, buffer, translations)
+
+def read_mesh(gltf, buffer):
+    """
+    Returns the verticies and triangles of the mesh of the given glb file.
+    """
+    mesh_primitive = gltf["meshes"][0]["primitives"][0]
+
+    def accessor_array(index, dtype, width):
+        accessor = gltf["accessors"][index]
+        view = gltf["bufferViews"][accessor["bufferView"]]
+        values = np.frombuffer(buffer[view["byteOffset"]:view["byteOffset"] + view["byteLength"]], dtype=dtype)
+        return values.reshape(-1, width)
+
+    verticies = accessor_array(mesh_primitive["attributes"]["POSITION"], "<f4", 3)
+    triangles = None
+    if "indices" in mesh_primitive:
+        triangles = accessor_array(mesh_primitive["indices"], "<u4", 3)
+
+    return (verticies, triangles)
+
+class TestGltf(unittest.TestCase):
+    def test_points_match_obj(self):
+        for category_column in [None, "category"]:
+            (gltf, buffer, translations) = read_glb(plot_file_output("glb", category_column=category_column))
+            (objects, verticies, faces) = read_obj(plot_file_output("obj", category_column=category_column))
+
+            self.assertEqual(objects, [node["name"] for node in gltf["nodes"]])
+            self.assertEqual([INSTANCING_EXTENSION], gltf["extensionsUsed"])
+            np.testing.assert_allclose(np.concatenate(translations), verticies.reshape(-1, 8, 3).mean(axis=1), rtol=1e-6, atol=1e-6)
+
+    def test_mesh(self):
+        (gltf, buffer, translations) = read_glb(plot_file_output("glb"))
+        (verticies, triangles) = read_mesh(gltf, buffer)
+
+        self.assertEqual("point_instance", gltf["meshes"][0]["name"])
+        self.assertEqual(TRIANGLES_MODE, gltf["meshes"][0]["primitives"][0]["mode"])
+        self.assertEqual({"point_size": 0.1, "primitive": "cube"}, gltf["extras"])
+        np.testing.assert_allclose(verticies, primitives["cube"].offsets(0.1), rtol=1e-6)
+        self.assertEqual((12, 3), triangles.shape)
+
+        position = gltf["accessors"][gltf["meshes"][0]["primitives"][0]["attributes"]["POSITION"]]
+        self.assertEqual([-0.1] * 3, [round(v, 6) for v in position["min"]])
+        self.assertEqual([0.1] * 3, [round(v, 6) for v in position["max"]])
+
+    def test_triangles_cover_faces(self):
+        for (name, primitive) in primitives.items():
+            triangles = primitive_triangles(primitive)
+
+            self.assertEqual(sum(len(face) - 2 for face in primitive.faces), len(triangles))
+            for face in primitive.faces:
+                self.assertTrue(all(vertex - 1 in triangles for vertex in face))
+
+    def test_point_primitive(self):
+        (gltf, buffer, translations) = read_glb(plot_file_output("glb", primitive="point"))
+        (verticies, triangles) = read_mesh(gltf, buffer)
+
+        self.assertEqual(POINTS_MODE, gltf["meshes"][0]["primitives"][0]["mode"])
+        self.assertEqual((1, 3), verticies.shape)
+        self.assertEqual(None, triangles)
+
+    def test_chunked_matches_whole(self):
+        for category_column in [None, "category"]:
+            (expected_gltf, expected_buffer, expected_translations) = read_glb(plot_file_output("glb", category_column=category_column, scale_function="none"))
+            (gltf, buffer, translations) = read_glb(plot_file_output("glb", category_column=category_column, scale_function="none", chunk_size=2))
+
+            self.assertEqual(expected_gltf, gltf)
+            self.assertEqual(expected_buffer, buffer)
+
+    def test_plot_data(self):
+        rows = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0], [7.0, 8.0, 9.0]])
+
+        (gltf, buffer, translations) = read_glb(plot_data(rows, 2.0, 0.5, "none", categories=["x", "y", "x"], output_format="glb"))
+
+        self.assertEqual(["x", "y"], [node["name"] for node in gltf["nodes"]])
+        np.testing.assert_array_equal(rows[[0, 2]] * 2.0, translations[0])
+        np.testing.assert_array_equal(rows[[1]] * 2.0, translations[1])
+
+    def test_wrong_point_count(self):
+        with self.assertRaises(ValueError):
+            write_glb(io.BytesIO(), [("data", 3, [np.zeros((2, 3))])], 1.0, 0.1)
+
+@given(
+  st.lists(
+      st.lists(st.floats(-1e6, 1e6), min_size=3, max_size=3)
+      , min_size=0, max_size=20),
+  st.floats(0.0, 10.0),
+  st.sampled_from(sorted(primitives))
+  )
+def test_write_glb_round_trip(points, spacing, name):
+    """
+    write_glb should write a valid glb file holding the spaced points as
+    float32 translations.
+    """
+    rows = np.array(points, dtype=float).reshape(-1, 3)
+    output_file = io.BytesIO()
+    write_glb(output_file, [("data", len(rows), [rows])], spacing, 0.1, primitive=name)
+
+    (gltf, buffer, translations) = read_glb(output_file.getvalue())
+
+    assert len(output_file.getvalue()) % 4 == 0
+    if len(rows) == 0:
+        assert translations == []
+    else:
+        np.testing.assert_array_equal(translations[0], (rows * spacing).astype("<f4"))
@@ -0,0 +1,212 @@
+import io
+import numpy as np
+import os
+import shutil
+import tempfile
+import unittest
+
+from blendplot.incremental import *
+from blendplot.obj_graph import plot_file
+
+from utilities import read_obj
+import utilities
+
+DATA_LINES = open("test/resources/data_01.csv", "r").read().splitlines(True)
+
+class TestIncremental(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.input_filename = os.path.join(self.directory, "data.csv")
+        self.output_filename = os.path.join(self.directory, "plot.obj")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write_data(self, lines, mode="w"):
+        with open(self.input_filename, mode) as input_file:
+            input_file.write("".join(lines))
+
+    def read_output(self):
+        with open(self.output_filename, "r") as output_file:
+            return output_file.read()
+
+    def plot(self, **kwargs):
+        arguments = dict(columns=["a", "b", "c"], spacing=0.5, point_size=0.1, category_column=None, scale_function="scale")
+        arguments.update(kwargs)
+        return plot_file_incremental(self.input_filename, self.output_filename, **arguments)
+
+    def full_plot(self, **kwargs):
+        arguments = dict(num_rows=None, columns=["a", "b", "c"], spacing=0.5, point_size=0.1, category_column=None, scale_function="scale")
+        arguments.update(kwargs)
+        output_file = io.StringIO()
+        plot_file(self.input_filename, output_file, **arguments)
+        return output_file.getvalue()
+
+    def test_first_plot_matches_plot_file(self):
+        self.write_data(DATA_LINES)
+
+        self.assertEqual((5, 5, True), self.plot(category_column="category"))
+        self.assertEqual(self.full_plot(category_column="category"), self.read_output())
+        self.assertTrue(os.path.exists(state_filename(self.output_filename)))
+
+    def test_append(self):
+        self.write_data(DATA_LINES[:4])
+        self.assertEqual((3, 3, True), self.plot(scale_function="none"))
+
+        self.write_data(DATA_LINES[4:], "a")
+        self.assertEqual((5, 2, False), self.plot(scale_function="none"))
+
+        (objects, verticies, faces) = read_obj(self.read_output())
+        (expected_objects, expected_verticies, expected_faces) = read_obj(self.full_plot(scale_function="none"))
+
+        self.assertEqual(["data", "data"], objects)
+        np.testing.assert_allclose(verticies, expected_verticies)
+        np.testing.assert_array_equal(faces, expected_faces)
+
+    def test_append_uses_frozen_scaling(self):
+        self.write_data(DATA_LINES[:4])
+        self.plot()
+        first_plot = self.read_output()
+
+        self.write_data(DATA_LINES[4:], "a")
+        self.plot()
+        output = self.read_output()
+
+        self.assertTrue(output.startswith(first_plot))
+
+        first_rows = np.array([[1.0, 2.5, 9.5], [1.2, 3.8, 11.5], [4.0, 5.5, 9.6]])
+        new_rows = np.array([[float(v) for v in line.split(",")[:3]] for line in DATA_LINES[4:]])
+        scaled = (new_rows - first_rows.mean(axis=0)) / first_rows.std(axis=0)
+
+        (objects, verticies, faces) = read_obj(output)
+        new_verticies = verticies[8 * 3:].reshape(-1, 8, 3)
+        np.testing.assert_allclose(new_verticies.mean(axis=1), scaled * 0.5)
+
+    def test_append_matches_rebuilt_scaling(self):
+        # Beyond the capacity of the quantile sketch of the streaming robust
+        # scaler, whose estimated quantiles would not match the rebuilt plot
+        data = np.random.RandomState(0).standard_cauchy(size=(40000, 3))
+        self.write_data(["a,b,c\n"] + ["%r,%r,%r\n" % tuple(row) for row in data.tolist()])
+        self.plot(scale_function="robust_scale")
+
+        # Appended copies of rows already in the plot are scaled to the same
+        # points as them
+        self.write_data(["%r,%r,%r\n" % tuple(row) for row in data[:10].tolist()], "a")
+        self.assertEqual((40010, 10, False), self.plot(scale_function="robust_scale"))
+
+        (objects, verticies, faces) = read_obj(self.read_output())
+        np.testing.assert_array_equal(verticies[-10 * 8:], verticies[:10 * 8])
+
+    def test_append_categories_instanced(self):
+        self.write_data(DATA_LINES[:4])
+        self.plot(category_column="category", instanced=True)
+
+        self.write_data(DATA_LINES[4:] + ["0.5,1.0,10.0,0.0,A\n"], "a")
+        self.assertEqual((6, 3, False), self.plot(category_column="category", instanced=True))
+
+        (objects, verticies, faces) = read_obj(self.read_output())
+        (expected_objects, expected_verticies, expected_faces) = read_obj(self.full_plot(category_column="category", instanced=True))
+
+        self.assertEqual(["point_instance", "A", "B", "C"], expected_objects)
+        self.assertEqual(["point_instance", "A", "B", "C", "A"], objects)
+        self.assertEqual(len(expected_verticies), len(verticies))
+        np.testing.assert_array_equal(faces, expected_faces)
+
+    def test_append_precision(self):
+        self.write_data(DATA_LINES[:4])
+        self.plot(scale_function="none", precision=2)
+
+        self.write_data(DATA_LINES[4:], "a")
+        self.assertEqual((5, 2, False), self.plot(scale_function="none", precision=2))
+
+        (objects, verticies, faces) = read_obj(self.read_output())
+        (expected_objects, expected_verticies, expected_faces) = read_obj(self.full_plot(scale_function="none", precision=2))
+
+        np.testing.assert_array_equal(verticies, expected_verticies)
+        np.testing.assert_array_equal(faces, expected_faces)
+
+    def test_partial_line(self):
+        self.write_data(DATA_LINES[:4])
+        self.plot()
+
+        (last_start, last_end) = (DATA_LINES[4][:5], DATA_LINES[4][5:])
+        self.write_data([last_start], "a")
+        first_plot = self.read_output()
+        self.assertEqual((3, 0, False), self.plot())
+        self.assertEqual(first_plot, self.read_output())
+
+        self.write_data([last_end], "a")
+        self.assertEqual((4, 1, False), self.plot())
+
+    def test_no_new_rows(self):
+        self.write_data(DATA_LINES)
+        self.plot()
+        first_plot = self.read_output()
+
+        self.assertEqual((5, 0, False), self.plot())
+        self.assertEqual(first_plot, self.read_output())
+
+    def test_rebuild_on_changed_settings(self):
+        self.write_data(DATA_LINES)
+        self.plot()
+
+        self.assertEqual((5, 5, True), self.plot(spacing=1.0))
+        self.assertEqual(self.full_plot(spacing=1.0), self.read_output())
+
+    def test_rebuild_on_rewritten_data(self):
+        self.write_data(DATA_LINES[:4])
+        self.plot()
+
+        self.write_data(DATA_LINES[:2] + DATA_LINES[3:])
+        self.assertEqual((4, 4, True), self.plot())
+        self.assertEqual(self.full_plot(), self.read_output())
+
+    def test_rebuild_on_changed_output(self):
+        self.write_data(DATA_LINES[:4])
+        self.plot()
+
+        with open(self.output_filename, "a") as output_file:
+            output_file.write("# edited\n")
+
+        self.write_data(DATA_LINES[4:], "a")
+        self.assertEqual((5, 5, True), self.plot())
+        self.assertEqual(self.full_plot(), self.read_output())
+
+    def test_rebuild_on_corrupt_state(self):
+        self.write_data(DATA_LINES)
+        self.plot()
+
+        with open(state_filename(self.output_filename), "w") as state_file:
+            state_file.write("{")
+
+        self.assertEqual((5, 5, True), self.plot())
+
+    def test_rescale(self):
+        self.write_data(DATA_LINES[:4])
+        self.plot()
+
+        self.write_data(DATA_LINES[4:], "a")
+        self.assertEqual((5, 5, True), self.plot(rescale=True))
+        self.assertEqual(self.full_plot(), self.read_output())
+
+    def test_minmax_in_range(self):
+        self.write_data(DATA_LINES[:4] + ["2.0,3.0,10.0,0.0,A\n"])
+        self.plot(scale_function="minmax_scale")
+
+        self.write_data(["1.5,3.0,10.0,0.0,A\n"], "a")
+        self.assertEqual((5, 1, False), self.plot(scale_function="minmax_scale"))
+
+    def test_minmax_out_of_range(self):
+        self.write_data(DATA_LINES[:4])
+        self.plot(scale_function="minmax_scale")
+
+        self.write_data(DATA_LINES[4:], "a")
+        self.assertEqual((5, 5, True), self.plot(scale_function="minmax_scale"))
+        self.assertEqual(self.full_plot(scale_function="minmax_scale"), self.read_output())
+
+    def test_not_csv(self):
+        self.input_filename = os.path.join(self.directory, "data.parquet")
+
+        (result, err) = utilities.capture_stderr(lambda _: self.plot())
+        self.assertEqual(None, result)
+        self.assertEqual("Incremental plotting only supports csv data files\n", err)
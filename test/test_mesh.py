@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import unittest
+
+from blendplot.mesh import *
+from blendplot.obj_graph import plot_data
+from blendplot.stats import PlotStats
+
+from utilities import plot_file_output, read_obj
+
+class TestMesh(unittest.TestCase):
+    def setUp(self):
+        self.data = pd.read_csv("test/resources/data_01.csv")
+
+    def test_plot_data_obj(self):
+        for category_column in [None, "category"]:
+            expected = plot_file_output(category_column=category_column, scale_function="scale")
+            actual = plot_data(self.data, 0.5, 0.1, columns=["a", "b", "c"], categories=category_column, output_format="obj")
+
+            self.assertEqual(actual, expected.encode("utf-8"))
+
+    def test_plot_data_ply(self):
+        expected = plot_file_output("ply", category_column="category", scale_function="minmax_scale", instanced=True)
+        actual = plot_data(self.data, 0.5, 0.1, "minmax_scale", ["a", "b", "c"], "category", "ply", instanced=True)
+
+        self.assertEqual(actual, expected)
+
+    def test_plot_data_mesh(self):
+        expected = plot_file_output(category_column="category", scale_function="scale")
+        (objects, expected_verticies, expected_faces) = read_obj(expected)
+
+        actual = plot_data(self.data, 0.5, 0.1, columns=["a", "b", "c"], categories="category")
+
+        self.assertEqual(actual.groups, [("A", 2), ("B", 1), ("C", 2)])
+        self.assertFalse(actual.instanced)
+        np.testing.assert_allclose(actual.verticies, expected_verticies)
+        np.testing.assert_array_equal(actual.faces, expected_faces - 1)
+
+    def test_plot_data_mesh_instanced(self):
+        rows = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+
+        actual = plot_data(rows, 2.0, 0.5, "none", instanced=True)
+
+        self.assertEqual(actual.verticies.shape, (10, 3))
+        np.testing.assert_array_equal(actual.verticies[:8], cube_verticies_at_origin(0.5))
+        np.testing.assert_array_equal(actual.verticies[8:], rows * 2.0)
+        self.assertEqual(actual.faces.shape, (6, 4))
+        self.assertEqual(actual.faces.max(), 7)
+
+    def test_plot_data_array(self):
+        rows = self.data[["a", "b", "c"]].to_numpy()
+        categories = self.data["category"].to_numpy()
+
+        expected = plot_data(self.data, 0.5, 0.1, columns=["a", "b", "c"], categories="category", output_format="obj")
+        actual = plot_data(rows, 0.5, 0.1, categories=categories, output_format="obj")
+
+        self.assertEqual(actual, expected)
+
+    def test_plot_data_drops_missing(self):
+        rows = np.array([[1.0, 2.0, 3.0], [np.nan, 5.0, 6.0], [7.0, 8.0, 9.0]])
+        categories = np.array(["x", "y", "z"], dtype=object)
+        stats = PlotStats()
+
+        actual = plot_data(rows, 1.0, 0.1, "none", categories=categories, stats=stats)
+
+        self.assertEqual(actual.groups, [("x", 1), ("z", 1)])
+        self.assertEqual(stats.counters["rows_dropped"], 1)
+
+    def test_plot_data_invalid_column(self):
+        with self.assertRaisesRegex(ValueError, r"Invalid column\(s\): e"):
+            plot_data(self.data, 0.5, 0.1, columns=["a", "b", "e"], output_format="obj")
+        with self.assertRaisesRegex(ValueError, r"Invalid column\(s\): kind"):
+            plot_data(self.data, 0.5, 0.1, columns=["a", "b", "c"], categories="kind")
+
+    def test_plot_data_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            plot_data(np.zeros((3, 2)), 0.5, 0.1)
+        with self.assertRaises(ValueError):
+            plot_data(np.zeros((3, 3)), 0.5, 0.1, categories=["a"])
+        with self.assertRaises(ValueError):
+            plot_data(np.zeros((3, 3)), 0.5, 0.1, "unknown")
+        with self.assertRaises(ValueError):
+            plot_data(self.data, 0.5, 0.1)
+
+def cube_verticies_at_origin(point_size):
+    return point_size * np.array([
+            (1,-1,-1),
+            (1,-1,1),
+            (-1,-1,1),
+            (-1,-1,-1),
+            (1,1,-1),
+            (1,1,1),
+            (-1,1,1),
+            (-1,1,-1)
+        ], dtype=float)
@@ -1,6 +1,10 @@
 from hypothesis import given
 import hypothesis.strategies as st
 import io
+import numpy as np
+import os
+import pandas as pd
+import tempfile
 import unittest
 
 from blendplot.obj_graph import *
@@ -82,6 +86,44 @@ class TestObjGraph(unittest.TestCase):
 
         self.assertEquals(actual, expected)
 
+    def test_cube_verticies(self):
+        points = np.array([(1.0, 2.0, 3.0), (0.0, 0.0, 0.0)])
+        point_size = 1.0
+
+        actual = cube_verticies(points, point_size)
+
+        self.assertEqual(actual.shape, (16, 3))
+        self.assertEqual(actual[:8].tolist(), [[2.0, 1.0, 2.0], [2.0, 1.0, 4.0], [0.0, 1.0, 4.0], [0.0, 1.0, 2.0], [2.0, 3.0, 2.0], [2.0, 3.0, 4.0], [0.0, 3.0, 4.0], [0.0, 3.0, 2.0]])
+        self.assertEqual(actual[8:].tolist(), [[1.0, -1.0, -1.0], [1.0, -1.0, 1.0], [-1.0, -1.0, 1.0], [-1.0, -1.0, -1.0], [1.0, 1.0, -1.0], [1.0, 1.0, 1.0], [-1.0, 1.0, 1.0], [-1.0, 1.0, -1.0]])
+
+    def test_cube_faces(self):
+        num_points = 2
+        start_num = 8
+
+        actual = cube_faces(num_points, start_num)
+
+        expected = [[9, 10, 11, 12], [13, 16, 15, 14], [9, 13, 14, 10], [10, 14, 15, 11], [11, 15, 16, 12], [13, 9, 12, 16], [17, 18, 19, 20], [21, 24, 23, 22], [17, 21, 22, 18], [18, 22, 23, 19], [19, 23, 24, 20], [21, 17, 20, 24]]
+
+        self.assertEqual(actual.tolist(), expected)
+
+    def test_cube_strings(self):
+        points = np.array([(1.0, 2.0, 3.0)])
+        point_size = 1.0
+        start_num = 0
+
+        actual = cube_strings(points, point_size, start_num)
+
+        expected = "v 2.0 1.0 2.0\nv 2.0 1.0 4.0\nv 0.0 1.0 4.0\nv 0.0 1.0 2.0\nv 2.0 3.0 2.0\nv 2.0 3.0 4.0\nv 0.0 3.0 4.0\nv 0.0 3.0 2.0\nf 1 2 3 4\nf 5 8 7 6\nf 1 5 6 2\nf 2 6 7 3\nf 3 7 8 4\nf 5 1 4 8\n"
+
+        self.assertEqual(actual, expected)
+
+    def test_cube_strings_empty(self):
+        points = np.empty((0, 3))
+
+        actual = cube_strings(points, 1.0, 0)
+
+        self.assertEqual(actual, "")
+
     def test_plot(self):
         rows = [(1.0, 1.0, 1.0), (2.0, 2.0, 2.0)]
         spacing = 0.5
@@ -242,6 +284,225 @@ class TestObjGraph(unittest.TestCase):
 
         self.assertEquals(actual_output, expected_output)
 
+    def test_plot_file_chunked(self):
+        functions = ["maxabs_scale", "minmax_scale", "normalize", "robust_scale", "none"]
+        for func in functions:
+            for chunk_size in [1, 2, 100]:
+                input_filename = "test/resources/data_01.csv"
+                output_file = io.StringIO()
+                num_rows = None
+                columns = ["a", "b", "c"]
+                spacing = 0.5
+                point_size = 0.1
+                category_column = None
+                scale_function = func
+
+                actual_ret = plot_file(input_filename, output_file, num_rows, columns, spacing, point_size, category_column, scale_function, chunk_size)
+                expected_ret = 5
+
+                self.assertEqual(actual_ret, expected_ret)
+
+                actual_output = output_file.getvalue()
+
+                test_file = "test/expected/test_plot_file_scale_function_" + func + ".obj"
+                with open(test_file, 'r') as myfile:
+                    expected_output = myfile.read()
+
+                    self.assertEqual(actual_output, expected_output)
+
+    def test_plot_file_chunked_scale(self):
+        input_filename = "test/resources/data_01.csv"
+        output_file = io.StringIO()
+        num_rows = None
+        columns = ["a", "b", "c"]
+        spacing = 0.5
+        point_size = 0.1
+        category_column = None
+        scale_function = "scale"
+        chunk_size = 2
+
+        actual_ret = plot_file(input_filename, output_file, num_rows, columns, spacing, point_size, category_column, scale_function, chunk_size)
+        expected_ret = 5
+
+        self.assertEqual(actual_ret, expected_ret)
+
+        actual_output = output_file.getvalue()
+
+        test_file = "test/expected/test_plot_file.obj"
+        with open(test_file, 'r') as myfile:
+            expected_output = myfile.read()
+
+            utilities.assert_obj_close(actual_output, expected_output)
+
+    def test_plot_file_chunked_constant_column(self):
+        data = pd.DataFrame(np.random.RandomState(0).normal(size=(1000, 3)), columns=["a", "b", "c"])
+        data["a"] = 0.1
+
+        with tempfile.TemporaryDirectory() as directory:
+            input_filename = os.path.join(directory, "constant.csv")
+            data.to_csv(input_filename, index=False)
+
+            for scale_function in ["maxabs_scale", "minmax_scale", "robust_scale", "scale"]:
+                expected_output = io.StringIO()
+                plot_file(input_filename, expected_output, None, ["a", "b", "c"], 0.5, 0.1, None, scale_function)
+
+                actual_output = io.StringIO()
+                plot_file(input_filename, actual_output, None, ["a", "b", "c"], 0.5, 0.1, None, scale_function, 7)
+
+                utilities.assert_obj_close(actual_output.getvalue(), expected_output.getvalue())
+
+    def test_plot_file_chunked_missing_category(self):
+        random = np.random.RandomState(0)
+        data = pd.DataFrame(random.normal(size=(500, 3)), columns=["a", "b", "c"])
+        data["category"] = random.choice(["x", "y", None], size=500)
+
+        with tempfile.TemporaryDirectory() as directory:
+            input_filename = os.path.join(directory, "missing.csv")
+            data.to_csv(input_filename, index=False)
+
+            expected_output = io.StringIO()
+            expected_stats = PlotStats()
+            plot_file(input_filename, expected_output, None, ["a", "b", "c"], 0.5, 0.1, "category", "scale", stats=expected_stats)
+
+            actual_output = io.StringIO()
+            actual_stats = PlotStats()
+            plot_file(input_filename, actual_output, None, ["a", "b", "c"], 0.5, 0.1, "category", "scale", 33, stats=actual_stats)
+
+            self.assertEqual(actual_output.getvalue().count("o nan\n"), 1)
+            self.assertEqual(actual_stats.category_points, expected_stats.category_points)
+            utilities.assert_obj_close(actual_output.getvalue(), expected_output.getvalue())
+
+    def test_plot_file_chunked_category(self):
+        input_filename = "test/resources/data_01.csv"
+        output_file = io.StringIO()
+        num_rows = 4
+        columns = ["a", "b", "c"]
+        spacing = 0.5
+        point_size = 0.1
+        category_column = "category"
+        scale_function = "scale"
+        chunk_size = 1
+
+        actual_ret = plot_file(input_filename, output_file, num_rows, columns, spacing, point_size, category_column, scale_function, chunk_size)
+        expected_ret = num_rows
+
+        self.assertEqual(actual_ret, expected_ret)
+
+        actual_output = output_file.getvalue()
+
+        test_file = "test/expected/test_plot_file_category.obj"
+        with open(test_file, 'r') as myfile:
+            expected_output = myfile.read()
+
+            utilities.assert_obj_close(actual_output, expected_output)
+
+    def test_plot_file_chunked_invalid_column(self):
+        input_filename = "test/resources/data_01.csv"
+        output_file = io.StringIO()
+        num_rows = None
+        invalid_column = "u"
+        columns = [invalid_column, "b", "c"]
+        spacing = 0.5
+        point_size = 0.1
+        category_column = None
+        scale_function = "scale"
+        chunk_size = 2
+
+        func = lambda x: plot_file(input_filename, output_file, num_rows, columns, spacing, point_size, category_column, scale_function, chunk_size)
+
+        (actual_return, actual_error) = utilities.capture_stderr(func)
+        expected_error = "Invalid column(s): %s\nValid columns are: a, b, c, d, category\n" % invalid_column
+
+        self.assertEqual(actual_error, expected_error)
+        self.assertEqual(actual_return, None)
+        self.assertEqual(output_file.getvalue(), "")
+
+    def test_plot_points(self):
+        rows = np.array([(1.0, 1.0, 1.0), (2.0, 2.0, 2.0)])
+        spacing = 0.5
+        output_file = io.StringIO()
+        start_num = 8
+
+        actual_ret = plot_points(rows, spacing, output_file, start_num)
+        expected_ret = 10
+
+        self.assertEqual(actual_ret, expected_ret)
+        self.assertEqual(output_file.getvalue(), "v 0.5 0.5 0.5\nv 1.0 1.0 1.0\n")
+
+    def test_plot_file_instanced(self):
+        input_filename = "test/resources/data_01.csv"
+        num_rows = 4
+        columns = ["a", "b", "c"]
+        spacing = 0.5
+        point_size = 0.1
+        category_column = "category"
+        scale_function = "scale"
+
+        output_file = io.StringIO()
+        actual_ret = plot_file(input_filename, output_file, num_rows, columns, spacing, point_size, category_column, scale_function, instanced=True)
+
+        self.assertEqual(actual_ret, num_rows)
+
+        cubes_file = io.StringIO()
+        plot_file(input_filename, cubes_file, num_rows, columns, spacing, point_size, category_column, scale_function)
+
+        actual_lines = output_file.getvalue().splitlines()
+        cube_lines = cubes_file.getvalue().splitlines()
+
+        expected_prefix = ["# point_size 0.1", "o point_instance"] + cube_string(0.0, 0.0, 0.0, point_size, 0).splitlines()
+        self.assertEqual(actual_lines[:len(expected_prefix)], expected_prefix)
+
+        actual_lines = actual_lines[len(expected_prefix):]
+        self.assertEqual([line for line in actual_lines if line.startswith("o ")], ["o A", "o B", "o C"])
+        self.assertFalse(any(line.startswith("f ") for line in actual_lines))
+
+        # Each point should be at the center of its cube in the regular plot
+        points = np.array([[float(v) for v in line.split()[1:]] for line in actual_lines if line.startswith("v ")])
+        cube_verts = np.array([[float(v) for v in line.split()[1:]] for line in cube_lines if line.startswith("v ")])
+        np.testing.assert_allclose(points, cube_verts.reshape(-1, 8, 3).mean(axis=1))
+
+    def test_write_obj_jobs(self):
+        data = np.random.RandomState(0).normal(size=(25000, 3))
+        spacing = 0.5
+        point_size = 0.1
+
+        for instanced in [False, True]:
+            groups = lambda: [("A", 20000, [data[:12000], data[12000:20000]]), ("B", 5000, [data[20000:]])]
+
+            expected_file = io.StringIO()
+            write_obj(expected_file, groups(), spacing, point_size, instanced)
+
+            actual_file = io.StringIO()
+            write_obj(actual_file, groups(), spacing, point_size, instanced, jobs=3)
+
+            self.assertEqual(actual_file.getvalue(), expected_file.getvalue())
+
+    def test_plot_file_jobs(self):
+        input_filename = "test/resources/data_01.csv"
+        output_file = io.StringIO()
+        num_rows = 4
+        columns = ["a", "b", "c"]
+        spacing = 0.5
+        point_size = 0.1
+        category_column = "category"
+        scale_function = "scale"
+
+        actual_ret = plot_file(input_filename, output_file, num_rows, columns, spacing, point_size, category_column, scale_function, jobs=2)
+
+        self.assertEqual(actual_ret, num_rows)
+
+        with open("test/expected/test_plot_file_category.obj", 'r') as myfile:
+            self.assertEqual(output_file.getvalue(), myfile.read())
+
+    def test_group_categories(self):
+        categories = np.array(["B", "A", "B", "C", "A", "B"], dtype=object)
+
+        (actual_categories, actual_order, actual_starts) = group_categories(categories)
+
+        self.assertEqual(list(actual_categories), ["B", "A", "C"])
+        self.assertEqual(actual_order.tolist(), [0, 2, 5, 1, 4, 3])
+        self.assertEqual(actual_starts.tolist(), [0, 3, 5, 6])
+
 @given(
   st.text(),
   st.floats(allow_nan=False, allow_infinity=False),
@@ -309,3 +570,40 @@ def test_plot(rows, spacing, point_size, start_num):
 
     assert len(actual_output) > 0
     assert len(actual_output.split("\n")) == len(rows) * 14 + 1
+
+@given(
+  st.lists(
+      st.lists(st.floats(allow_nan=False, allow_infinity=False), min_size=3, max_size=3)
+      , min_size=1, max_size=20),
+  st.floats(allow_nan=False, allow_infinity=False),
+  st.integers()
+  )
+def test_cube_strings_matches_cube_string(points, point_size, start_num):
+    """
+    cube_strings should produce exactly the same output as calling cube_string
+    on each of the points in turn.
+    """
+    expected = ""
+    for (i, (x, y, z)) in enumerate(points):
+        expected += cube_string(x, y, z, point_size, start_num + 8 * i)
+
+    actual = cube_strings(np.array(points), point_size, start_num)
+
+    assert actual == expected
+
+@given(
+  st.lists(st.integers(0, 10), min_size=1)
+  )
+def test_group_categories_matches_masks(categories):
+    """
+    Grouping categories should give the same groups of rows in the same order
+    as selecting the rows of each category in pandas.unique order.
+    """
+    categories = np.array(categories)
+
+    (unique_categories, order, starts) = group_categories(categories)
+
+    assert list(unique_categories) == list(pd.unique(categories))
+    for (i, cat) in enumerate(unique_categories):
+        expected_rows = np.nonzero(categories == cat)[0]
+        assert order[starts[i]:starts[i + 1]].tolist() == expected_rows.tolist()
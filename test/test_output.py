@@ -0,0 +1,123 @@
+import gzip
+import io
+import os
+import tempfile
+import unittest
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+from blendplot.obj_graph import plot_file
+from blendplot.output import *
+
+class CountingFile(io.BytesIO):
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def write(self, data):
+        self.writes += 1
+        return super().write(data)
+
+class TestOutput(unittest.TestCase):
+    def test_block_writer(self):
+        raw_file = CountingFile()
+        writer = BlockWriter(raw_file, 8)
+
+        writer.write("abc")
+        writer.write(b"def")
+        self.assertEqual(raw_file.writes, 0)
+
+        writer.write("ghé")
+        writer.write(b"0123456789")
+        writer.flush()
+
+        self.assertEqual(raw_file.getvalue(), "abcdefghé0123456789".encode("utf-8"))
+        self.assertEqual(raw_file.writes, 3)
+        self.assertEqual(writer.raw_writes, 3)
+
+    def test_block_writer_partial_writes(self):
+        class PartialFile(CountingFile):
+            def write(self, data):
+                return super().write(bytes(data[:3]))
+
+        raw_file = PartialFile()
+        writer = BlockWriter(raw_file, 4)
+
+        writer.write("0123456789")
+        writer.flush()
+
+        self.assertEqual(raw_file.getvalue(), b"0123456789")
+
+    def test_plot_file_block_writer(self):
+        for chunk_size in [None, 2]:
+            text_file = io.StringIO()
+            plot_file("test/resources/data_01.csv", text_file, None, ["a", "b", "c"], 0.5, 0.1, None, "scale", chunk_size)
+            expected_output = text_file.getvalue().encode("utf-8")
+
+            raw_file = CountingFile()
+            with BlockWriter(raw_file, 1024 * 1024) as writer:
+                actual_ret = plot_file("test/resources/data_01.csv", writer, None, ["a", "b", "c"], 0.5, 0.1, None, "scale", chunk_size)
+                writer.flush()
+
+                self.assertEqual(actual_ret, 5)
+                self.assertEqual(raw_file.getvalue(), expected_output)
+                self.assertEqual(raw_file.writes, 1)
+
+    def test_open_output(self):
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, "plot.obj")
+            with open_output(filename, 4) as output_file:
+                output_file.write("v 1 2 3\n")
+                output_file.write(b"f 1 2 3 4\n")
+
+            with open(filename, "rb") as plot:
+                self.assertEqual(plot.read(), b"v 1 2 3\nf 1 2 3 4\n")
+
+    def test_compression_for(self):
+        self.assertEqual(compression_for("plot.obj.gz"), "gzip")
+        self.assertEqual(compression_for("plot.PLY.ZST"), "zstd")
+        self.assertIsNone(compression_for("plot.obj"))
+
+        self.assertEqual(uncompressed_filename("plot.ply.gz"), "plot.ply")
+        self.assertEqual(uncompressed_filename("plot.obj"), "plot.obj")
+
+    def plot_compressed(self, filename, compression_threads, decompress):
+        text_file = io.StringIO()
+        plot_file("test/resources/data_01.csv", text_file, None, ["a", "b", "c"], 0.5, 0.1, "category", "scale")
+        expected_output = text_file.getvalue().encode("utf-8")
+
+        with tempfile.TemporaryDirectory() as directory:
+            filename = os.path.join(directory, filename)
+            with open_output(filename, 64, compression_threads) as output_file:
+                actual_ret = plot_file("test/resources/data_01.csv", output_file, None, ["a", "b", "c"], 0.5, 0.1, "category", "scale")
+
+            with open(filename, "rb") as plot:
+                compressed = plot.read()
+
+        self.assertEqual(actual_ret, 5)
+        self.assertLess(len(compressed), len(expected_output))
+        self.assertEqual(decompress(compressed), expected_output)
+
+    def test_open_output_gzip(self):
+        for compression_threads in [1, 3]:
+            self.plot_compressed("plot.obj.gz", compression_threads, gzip.decompress)
+
+    @unittest.skipUnless(zstandard, "zstandard is not installed")
+    def test_open_output_zstd(self):
+        decompress = lambda data: zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data), read_across_frames=True).read()
+        for compression_threads in [1, 3]:
+            self.plot_compressed("plot.obj.zst", compression_threads, decompress)
+
+    def test_compressed_file_error(self):
+        class FailingFile(CountingFile):
+            def write(self, data):
+                raise OSError("disk full")
+
+        compressed_file = CompressedFile(FailingFile(), "gzip", queue_size=1)
+        with self.assertRaises(IOError):
+            with BlockWriter(compressed_file, 4) as writer:
+                for i in range(100):
+                    writer.write("0123456789")
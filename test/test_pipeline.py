@@ -0,0 +1,124 @@
+from hypothesis import given, settings
+import hypothesis.strategies as st
+import io
+import threading
+import unittest
+
+from blendplot.obj_graph import plot_file
+from blendplot.pipeline import *
+from blendplot.stats import PlotStats
+
+import utilities
+
+class TestPipeline(unittest.TestCase):
+    def test_threaded(self):
+        self.assertEqual(list(range(100)), list(threaded(range(100), 2)))
+        self.assertEqual([], list(threaded([])))
+
+    def test_threaded_error(self):
+        def items():
+            yield 1
+            raise ValueError("bad row")
+
+        iterator = threaded(items())
+
+        self.assertEqual(1, next(iterator))
+        with self.assertRaises(ValueError):
+            next(iterator)
+
+    def test_threaded_backpressure(self):
+        produced = []
+
+        def items():
+            for i in range(100):
+                produced.append(i)
+                yield i
+
+        iterator = ThreadedIterator(items(), 3)
+        self.assertEqual(0, next(iterator))
+        iterator.thread.join(0.1)
+
+        # The thread waits once the queue is full, holding at most one more
+        # item than the queue
+        self.assertLessEqual(len(produced), 1 + 3 + 1)
+        self.assertTrue(iterator.thread.is_alive())
+
+        iterator.close()
+        self.assertFalse(iterator.thread.is_alive())
+        self.assertLess(len(produced), 100)
+
+    def test_threaded_file(self):
+        output_file = io.BytesIO()
+        buffer = bytearray(b"abc")
+
+        threaded_file = ThreadedFile(output_file, 1)
+        for i in range(10):
+            self.assertEqual(3, threaded_file.write(memoryview(buffer)))
+            buffer[:] = b"%03d" % i
+        threaded_file.finish()
+
+        self.assertEqual(b"abc" + b"".join(b"%03d" % i for i in range(9)), output_file.getvalue())
+
+    def test_threaded_file_error(self):
+        class FailingFile:
+            def write(self, data):
+                raise OSError("disk full")
+
+        threaded_file = ThreadedFile(FailingFile(), 1)
+        with self.assertRaises(IOError):
+            for i in range(100):
+                threaded_file.write("0123456789")
+            threaded_file.finish()
+
+    def test_plot_file_pipelined(self):
+        for output_format in ["obj", "ply", "glb"]:
+            for category_column in [None, "category"]:
+                for chunk_size in [None, 2]:
+                    outputs = []
+                    for pipelined in [False, True]:
+                        stats = PlotStats()
+                        output_file = io.StringIO() if output_format == "obj" else io.BytesIO()
+
+                        points = plot_file("test/resources/data_01.csv", output_file, None, ["a", "b", "c"], 0.5, 0.1, category_column, "scale", chunk_size, output_format, stats=stats, pipelined=pipelined)
+                        outputs.append((points, output_file.getvalue(), dict(stats.counters), dict(stats.category_points)))
+
+                    self.assertEqual(outputs[0], outputs[1])
+
+    def test_plot_file_pipelined_jobs(self):
+        threads = threading.active_count()
+
+        (points, stderr) = utilities.capture_stderr(lambda _: plot_file("test/resources/data_01.csv", io.StringIO(), None, ["a", "b", "c"], 0.5, 0.1, None, "scale", 2, jobs=2, pipelined=True))
+
+        self.assertIsNone(points)
+        self.assertEqual("Pipelined plots cannot be formatted with multiple jobs\n", stderr)
+        self.assertEqual(threads, threading.active_count())
+
+    def test_plot_file_pipelined_error(self):
+        def fail(stage, seconds, stats):
+            raise ValueError("scaling failed")
+        threads = threading.active_count()
+
+        # The error stops the threads reading the chunks ahead of time
+        with self.assertRaises(ValueError):
+            plot_file("test/resources/data_01.csv", io.StringIO(), None, ["a", "b", "c"], 0.5, 0.1, None, "scale", 2, stats=PlotStats({"scale": fail}), pipelined=True)
+        self.assertEqual(threads, threading.active_count())
+
+@settings(deadline=None)
+@given(
+  st.lists(st.integers()),
+  st.integers(1, 5),
+  st.integers(0, 20)
+  )
+def test_threaded_stops_early(items, queue_size, taken):
+    """
+    threaded should yield the items of the iterable in order, and stop its
+    thread when closed before all of the items have been taken.
+    """
+    threads = threading.active_count()
+    iterator = threaded(items, queue_size)
+
+    actual = [item for (_, item) in zip(range(taken), iterator)]
+    iterator.close()
+
+    assert actual == items[:taken]
+    assert threading.active_count() == threads
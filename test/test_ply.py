@@ -0,0 +1,83 @@
+import io
+import numpy as np
+import unittest
+
+from blendplot.obj_graph import plot_file
+from blendplot.ply import *
+
+from utilities import read_obj, read_ply
+
+class TestPly(unittest.TestCase):
+    def plot_both(self, **kwargs):
+        arguments = dict(input_filename="test/resources/data_01.csv", num_rows=None, columns=["a", "b", "c"], spacing=0.5, point_size=0.1, category_column=None, scale_function="scale")
+        arguments.update(kwargs)
+
+        obj_file = io.StringIO()
+        ply_file = io.BytesIO()
+
+        obj_ret = plot_file(output_file=obj_file, **arguments)
+        ply_ret = plot_file(output_file=ply_file, output_format="ply", **arguments)
+
+        self.assertEqual(obj_ret, ply_ret)
+
+        return (read_obj(obj_file.getvalue()), read_ply(ply_file.getvalue()))
+
+    def test_face_bytes(self):
+        faces = np.frombuffer(face_bytes(1, 8), dtype=FACE_DTYPE)
+
+        self.assertEqual(faces["count"].tolist(), [4] * 6)
+        self.assertEqual(faces["verticies"].tolist(), [[8, 9, 10, 11], [12, 15, 14, 13], [8, 12, 13, 9], [9, 13, 14, 10], [10, 14, 15, 11], [12, 8, 11, 15]])
+
+    def test_vertex_bytes(self):
+        points = np.array([(1.0, 2.0, 3.0)])
+
+        verticies = np.frombuffer(vertex_bytes(points, 1.0), dtype=VERTEX_DTYPE)
+
+        self.assertEqual(verticies["x"].tolist(), [2.0, 2.0, 0.0, 0.0, 2.0, 2.0, 0.0, 0.0])
+        self.assertEqual(verticies["y"].tolist(), [1.0, 1.0, 1.0, 1.0, 3.0, 3.0, 3.0, 3.0])
+        self.assertEqual(verticies["z"].tolist(), [2.0, 4.0, 4.0, 2.0, 2.0, 4.0, 4.0, 2.0])
+
+    def test_plot_file_ply(self):
+        ((objects, obj_verticies, obj_faces), (header, ply_verticies, ply_faces)) = self.plot_both()
+
+        self.assertEqual(header[:2], ["ply", "format binary_little_endian 1.0"])
+        self.assertIn("comment object 5 data", header)
+        self.assertIn("element vertex 40", header)
+        self.assertIn("element face 30", header)
+
+        ply_verticies = np.column_stack([ply_verticies["x"], ply_verticies["y"], ply_verticies["z"]])
+        np.testing.assert_array_equal(ply_verticies, obj_verticies.astype(np.float32))
+        np.testing.assert_array_equal(ply_faces["verticies"], obj_faces - 1)
+
+    def test_plot_file_ply_category(self):
+        ((objects, obj_verticies, obj_faces), (header, ply_verticies, ply_faces)) = self.plot_both(num_rows=4, category_column="category")
+
+        self.assertEqual([line for line in header if line.startswith("comment object")], ["comment object 2 A", "comment object 1 B", "comment object 1 C"])
+
+        ply_verticies = np.column_stack([ply_verticies["x"], ply_verticies["y"], ply_verticies["z"]])
+        np.testing.assert_array_equal(ply_verticies, obj_verticies.astype(np.float32))
+        np.testing.assert_array_equal(ply_faces["verticies"], obj_faces - 1)
+
+    def test_plot_file_ply_chunked(self):
+        for category_column in [None, "category"]:
+            expected_file = io.BytesIO()
+            actual_file = io.BytesIO()
+
+            arguments = dict(input_filename="test/resources/data_01.csv", num_rows=None, columns=["a", "b", "c"], spacing=0.5, point_size=0.1, category_column=category_column, scale_function="minmax_scale", output_format="ply")
+
+            plot_file(output_file=expected_file, **arguments)
+            plot_file(output_file=actual_file, chunk_size=2, **arguments)
+
+            self.assertEqual(actual_file.getvalue(), expected_file.getvalue())
+
+    def test_plot_file_ply_instanced(self):
+        ((objects, obj_verticies, obj_faces), (header, ply_verticies, ply_faces)) = self.plot_both(num_rows=4, category_column="category", instanced=True)
+
+        self.assertIn("comment point_size 0.1", header)
+        self.assertIn("comment instance 8 point_instance", header)
+        self.assertIn("element vertex 12", header)
+        self.assertIn("element face 6", header)
+
+        ply_verticies = np.column_stack([ply_verticies["x"], ply_verticies["y"], ply_verticies["z"]])
+        np.testing.assert_array_equal(ply_verticies, obj_verticies.astype(np.float32))
+        np.testing.assert_array_equal(ply_faces["verticies"], obj_faces - 1)
@@ -0,0 +1,123 @@
+from hypothesis import example, given, settings
+import hypothesis.strategies as st
+import math
+import numpy as np
+import unittest
+
+from blendplot.obj_graph import plot_data, point_strings, primitive_strings
+from blendplot.precision import *
+from blendplot.primitives import primitives
+from blendplot.stats import PlotStats
+
+from utilities import plot_file_output, read_obj
+
+class TestPrecision(unittest.TestCase):
+    def test_fixed_chars(self):
+        values = np.array([[1.0, -2.5, 0.125], [-0.001, 123456.789, 0.0]])
+
+        expected = [[b"1.00", b"-2.50", b"0.12"], [b"-0.00", b"123456.79", b"0.00"]]
+        self.assertEqual(expected, fixed_chars(values, 2).tolist())
+        self.assertEqual([[b"1", b"-2", b"0"], [b"-0", b"123457", b"0"]], fixed_chars(values, 0).tolist())
+
+    def test_fixed_chars_not_exact(self):
+        values = np.array([np.nan, np.inf, -np.inf, 1e20, 0.5])
+
+        self.assertEqual([b"nan", b"inf", b"-inf", b"100000000000000000000.0", b"0.5"], fixed_chars(values, 1).tolist())
+
+    def test_fixed_chars_empty(self):
+        self.assertEqual((0, 3), fixed_chars(np.zeros((0, 3)), 2).shape)
+
+    def test_valid_decimals(self):
+        self.assertTrue(valid_decimals(0))
+        self.assertTrue(valid_decimals(MAX_DECIMALS))
+        self.assertFalse(valid_decimals(-1))
+        self.assertFalse(valid_decimals(MAX_DECIMALS + 1))
+        self.assertFalse(valid_decimals(2.0))
+        self.assertFalse(valid_decimals(True))
+
+    def test_error_report(self):
+        (error, relative) = error_report(3, 0.1)
+
+        self.assertAlmostEqual(math.sqrt(3) * 0.0005, error)
+        self.assertAlmostEqual(error / 0.1, relative)
+        self.assertEqual(math.inf, error_report(3, 0.0)[1])
+
+    def test_point_strings(self):
+        self.assertEqual("v 1.500 -2.000 0.333\n", point_strings(np.array([[1.5, -2.0, 1 / 3.0]]), 3))
+
+    def test_plot_file_within_error(self):
+        for instanced in [False, True]:
+            for decimals in [0, 2, 5]:
+                stats = PlotStats()
+                (objects, verticies, faces) = read_obj(plot_file_output(instanced=instanced, precision=decimals, stats=stats))
+                (expected_objects, expected_verticies, expected_faces) = read_obj(plot_file_output(instanced=instanced))
+
+                self.assertEqual(expected_objects, objects)
+                np.testing.assert_array_equal(expected_faces, faces)
+
+                distances = np.sqrt(((verticies - expected_verticies) ** 2).sum(axis=1))
+                self.assertLessEqual(distances.max(), position_error(decimals) * (1 + 1e-9))
+                self.assertEqual(error_report(decimals, 0.1), (stats.counters["max_position_error"], stats.counters["max_relative_error"]))
+
+    def test_plot_file_smaller(self):
+        self.assertLess(len(plot_file_output(precision=4)), len(plot_file_output()))
+
+    def test_chunked(self):
+        expected = plot_file_output(scale_function="none", precision=3)
+        actual = plot_file_output(scale_function="none", precision=3, chunk_size=2)
+
+        self.assertEqual(expected, actual)
+
+    def test_binary_formats_unchanged(self):
+        for output_format in ["ply", "glb"]:
+            stats = PlotStats()
+            self.assertEqual(plot_file_output(output_format), plot_file_output(output_format, precision=2, stats=stats))
+            self.assertNotIn("max_position_error", stats.counters)
+
+    def test_plot_data(self):
+        rows = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+
+        output = plot_data(rows, 1.0, 0.25, "none", output_format="obj", precision=1).decode("utf-8")
+
+        self.assertIn("v 1.2 2.2 2.8\n", output)
+        with self.assertRaises(ValueError):
+            plot_data(rows, 1.0, 0.25, "none", output_format="obj", precision=-1)
+
+@settings(derandomize=True, max_examples=500)
+@given(
+  st.lists(st.floats(allow_nan=False, allow_infinity=False), min_size=0, max_size=50),
+  st.integers(0, MAX_DECIMALS)
+  )
+@example([1125900.3385022674], 9)
+@example([0.125, 2.5, -0.5, 1e-300, 2.0 ** 52 + 0.5], 2)
+def test_fixed_chars_matches_python(values, decimals):
+    """
+    fixed_chars should format each value exactly the same as Python's
+    "%.*f" formatting.
+    """
+    values = np.array(values, dtype=float)
+    formatted = fixed_chars(values, decimals).tolist()
+
+    for (value, chars) in zip(values.tolist(), formatted):
+        assert chars.decode("ascii") == "%.*f" % (decimals, value)
+
+@given(
+  st.lists(
+      st.lists(st.floats(-1e6, 1e6), min_size=3, max_size=3)
+      , min_size=1, max_size=20),
+  st.floats(0.0, 10.0),
+  st.integers(0, 8),
+  st.sampled_from(sorted(primitives))
+  )
+def test_primitive_strings_precision(points, point_size, decimals, name):
+    """
+    primitive_strings with a precision should write the same faces as at full
+    precision, with each vertex within the position error.
+    """
+    primitive = primitives[name]
+    (objects, verticies, faces) = read_obj(primitive_strings(np.array(points), point_size, 3, primitive, decimals))
+    (expected_objects, expected_verticies, expected_faces) = read_obj(primitive_strings(np.array(points), point_size, 3, primitive))
+
+    np.testing.assert_array_equal(expected_faces, faces)
+    distances = np.sqrt(((verticies - expected_verticies) ** 2).sum(axis=1))
+    assert distances.max() <= position_error(decimals) * (1 + 1e-6) + np.abs(expected_verticies).max() * 1e-15
@@ -0,0 +1,84 @@
+from hypothesis import given
+import hypothesis.strategies as st
+import numpy as np
+import unittest
+
+from blendplot.mesh import build_mesh
+from blendplot.obj_graph import plot_data, primitive_faces, primitive_strings, primitive_verticies
+from blendplot.primitives import *
+
+from utilities import plot_file_output, read_obj, read_ply
+
+class TestPrimitives(unittest.TestCase):
+    def test_faces_face_outwards(self):
+        for primitive in [CUBE, TETRAHEDRON]:
+            verticies = np.array(primitive.verticies, dtype=float)
+            for face in primitive.faces:
+                (a, b, c) = verticies[[vertex - 1 for vertex in face[:3]]]
+                normal = np.cross(b - a, c - a)
+                self.assertGreater(np.dot(normal, (a + b + c) / 3.0), 0.0)
+
+    def test_triangle_faces_front_view(self):
+        verticies = np.array(TRIANGLE.verticies, dtype=float)
+        (a, b, c) = verticies[[vertex - 1 for vertex in TRIANGLE.faces[0]]]
+
+        self.assertLess(np.cross(b - a, c - a)[1], 0.0)
+
+    def test_plot_file_sizes(self):
+        for (name, primitive) in primitives.items():
+            (objects, verticies, faces) = read_obj(plot_file_output(primitive=name))
+
+            self.assertEqual(["A", "B", "C"], objects)
+            self.assertEqual((5 * len(primitive.verticies), 3), verticies.shape)
+            self.assertEqual(5 * len(primitive.faces), len(faces))
+
+    def test_point_has_no_faces(self):
+        output = plot_file_output(primitive="point")
+
+        self.assertNotIn("\nf ", output)
+        self.assertEqual(5, output.count("\nv "))
+
+    def test_obj_ply_and_mesh_match(self):
+        for (name, primitive) in primitives.items():
+            for instanced in [False, True]:
+                (objects, obj_verticies, obj_faces) = read_obj(plot_file_output(primitive=name, instanced=instanced))
+                (header, ply_verticies, ply_faces) = read_ply(plot_file_output("ply", primitive=name, instanced=instanced), primitive.face_size)
+                mesh = plot_data(np.zeros((0, 3)), 0.5, 0.1, "none", instanced=instanced, primitive=name)
+
+                ply_verticies = np.column_stack([ply_verticies["x"], ply_verticies["y"], ply_verticies["z"]])
+                np.testing.assert_allclose(ply_verticies, obj_verticies, rtol=1e-6, atol=1e-6)
+                np.testing.assert_array_equal(ply_faces["verticies"].reshape(obj_faces.shape), obj_faces - 1)
+                self.assertEqual(primitive.face_size, mesh.faces.shape[1])
+
+    def test_build_mesh(self):
+        rows = np.array([[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]])
+
+        actual = build_mesh([("data", 2, [rows])], 2.0, 0.5, primitive="tetrahedron")
+
+        self.assertEqual((8, 3), actual.verticies.shape)
+        np.testing.assert_allclose(actual.verticies.reshape(2, 4, 3).mean(axis=1), rows * 2.0)
+        np.testing.assert_array_equal(actual.faces, primitive_faces(2, -1, TETRAHEDRON))
+
+    def test_plot_data_invalid_primitive(self):
+        with self.assertRaises(ValueError):
+            plot_data(np.zeros((3, 3)), 0.5, 0.1, primitive="sphere")
+
+@given(
+  st.lists(
+      st.lists(st.floats(-1e6, 1e6), min_size=3, max_size=3)
+      , min_size=1, max_size=20),
+  st.floats(0.0, 10.0),
+  st.integers(0, 2 ** 40),
+  st.sampled_from(sorted(primitives))
+  )
+def test_primitive_strings_match_arrays(points, point_size, start_num, name):
+    """
+    primitive_strings should write the same verticies and faces as
+    primitive_verticies and primitive_faces give.
+    """
+    primitive = primitives[name]
+    (objects, verticies, faces) = read_obj(primitive_strings(np.array(points), point_size, start_num, primitive))
+
+    np.testing.assert_array_equal(verticies, primitive_verticies(np.array(points), point_size, primitive))
+    assert faces.size == primitive_faces(len(points), start_num, primitive).size
+    np.testing.assert_array_equal(faces.reshape(-1), primitive_faces(len(points), start_num, primitive).reshape(-1))
@@ -0,0 +1,145 @@
+import importlib.util
+import io
+import os
+import pandas as pd
+import shutil
+import tempfile
+import unittest
+
+from blendplot.obj_graph import plot_file
+from blendplot.readers import *
+
+import utilities
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+HAS_TABLES = importlib.util.find_spec("tables") is not None
+
+class TestReaders(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.data = pd.read_csv("test/resources/data_01.csv")
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def plot(self, input_filename, chunk_size=None, **kwargs):
+        output_file = io.StringIO()
+        points = plot_file(input_filename, output_file, None, ["a", "b", "c"], 0.5, 0.1, "category", "scale", chunk_size, **kwargs)
+        return (points, output_file.getvalue())
+
+    def assert_plots_match_csv(self, input_filename):
+        (expected_points, expected_output) = self.plot("test/resources/data_01.csv")
+        (actual_points, actual_output) = self.plot(input_filename)
+
+        self.assertEqual(actual_points, expected_points)
+        self.assertEqual(actual_output, expected_output)
+
+        (actual_points, actual_output) = self.plot(input_filename, chunk_size=2)
+
+        self.assertEqual(actual_points, expected_points)
+        utilities.assert_obj_close(actual_output, expected_output)
+
+    def test_reader_for(self):
+        self.assertIsInstance(reader_for("data.csv"), CsvReader)
+        self.assertIsInstance(reader_for("data.txt"), CsvReader)
+        self.assertIsInstance(reader_for("data.PARQUET"), ParquetReader)
+        self.assertIsInstance(reader_for("data.feather"), FeatherReader)
+        self.assertIsInstance(reader_for("data.h5"), HdfReader)
+
+    def test_read_header(self):
+        header = read_header("test/resources/data_01.csv")
+
+        self.assertEqual(list(header.columns), ["a", "b", "c", "d", "category"])
+        self.assertEqual(len(header.index), 0)
+
+    def test_csv_reader_projects_columns(self):
+        data = CsvReader().read("test/resources/data_01.csv", ["a", "c", "a", "category"], 3)
+
+        self.assertEqual(set(data.columns), {"a", "c", "category"})
+        self.assertEqual(len(data.index), 3)
+
+    def test_pinned_dtypes(self):
+        self.assertIsNone(pinned_dtypes(["a", "b", "c"], "category", None))
+        self.assertEqual(pinned_dtypes(["a", "b", "c"], "category", "float32"), {"a": "float32", "b": "float32", "c": "float32", "category": "category"})
+        self.assertEqual(pinned_dtypes(["a", "b", "c"], "a", "float64"), {"a": "float64", "b": "float64", "c": "float64"})
+
+    def test_csv_reader_dtypes(self):
+        dtypes = pinned_dtypes(["a", "b", "c"], "category", "float32")
+        data = CsvReader().read("test/resources/data_01.csv", ["a", "b", "c", "category"], None, dtypes)
+
+        self.assertEqual(str(data["a"].dtype), "float32")
+        self.assertEqual(str(data["category"].dtype), "category")
+
+    def test_plot_file_pinned_dtypes(self):
+        (expected_points, expected_output) = self.plot("test/resources/data_01.csv")
+
+        for chunk_size in [None, 2]:
+            (actual_points, actual_output) = self.plot("test/resources/data_01.csv", chunk_size, column_dtype="float64")
+            self.assertEqual(actual_points, expected_points)
+            utilities.assert_obj_close(actual_output, expected_output)
+
+            (actual_points, actual_output) = self.plot("test/resources/data_01.csv", chunk_size, column_dtype="float32")
+            self.assertEqual(actual_points, expected_points)
+            utilities.assert_obj_close(actual_output, expected_output, 1e-6)
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+    def test_plot_file_pyarrow_engine(self):
+        (expected_points, expected_output) = self.plot("test/resources/data_01.csv")
+
+        for chunk_size in [None, 2]:
+            for column_dtype in [None, "float32"]:
+                (actual_points, actual_output) = self.plot("test/resources/data_01.csv", chunk_size, csv_engine="pyarrow", column_dtype=column_dtype)
+                self.assertEqual(actual_points, expected_points)
+                utilities.assert_obj_close(actual_output, expected_output, 1e-6)
+
+    @unittest.skipIf(HAS_PYARROW, "pyarrow is installed")
+    def test_plot_file_pyarrow_engine_missing_dependency(self):
+        (points, stderr) = utilities.capture_stderr(lambda _: self.plot("test/resources/data_01.csv", csv_engine="pyarrow"))
+
+        self.assertIsNone(points[0])
+        self.assertIn("Unable to read", stderr)
+
+    def test_plot_file_invalid_column_before_reading(self):
+        # The rows of the file are malformed, so reading them would fail
+        input_filename = os.path.join(self.directory, "data.csv")
+        with open(input_filename, "w") as input_file:
+            input_file.write("a,b,c\n1,2,3,4,5,6\n")
+
+        for chunk_size in [None, 2]:
+            output_file = io.StringIO()
+            points = utilities.capture_stderr(lambda _: plot_file(input_filename, output_file, None, ["a", "b", "e"], 0.5, 0.1, None, "scale", chunk_size))[0]
+
+            self.assertIsNone(points)
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+    def test_plot_file_parquet(self):
+        input_filename = os.path.join(self.directory, "data.parquet")
+        self.data.to_parquet(input_filename)
+
+        self.assert_plots_match_csv(input_filename)
+
+    @unittest.skipUnless(HAS_PYARROW, "pyarrow is not installed")
+    def test_plot_file_feather(self):
+        input_filename = os.path.join(self.directory, "data.feather")
+        self.data.to_feather(input_filename)
+
+        self.assert_plots_match_csv(input_filename)
+
+    @unittest.skipUnless(HAS_TABLES, "PyTables is not installed")
+    def test_plot_file_hdf(self):
+        for hdf_format in ["table", "fixed"]:
+            input_filename = os.path.join(self.directory, "data_%s.h5" % hdf_format)
+            self.data.to_hdf(input_filename, key="data", format=hdf_format)
+
+            self.assert_plots_match_csv(input_filename)
+
+    @unittest.skipIf(HAS_PYARROW, "pyarrow is installed")
+    def test_plot_file_parquet_missing_dependency(self):
+        input_filename = os.path.join(self.directory, "data.parquet")
+        with open(input_filename, "wb") as input_file:
+            input_file.write(b"PAR1")
+
+        (points, stderr) = utilities.capture_stderr(lambda _: plot_file(input_filename, io.StringIO(), None, ["a", "b", "c"], 0.5, 0.1, None, "scale"))
+
+        self.assertIsNone(points)
+        self.assertIn("Unable to read", stderr)
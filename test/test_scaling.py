@@ -0,0 +1,192 @@
+from hypothesis import given, settings
+import hypothesis.extra.numpy as hnp
+import hypothesis.strategies as st
+import numpy as np
+import pandas as pd
+import unittest
+import warnings
+
+from sklearn import preprocessing
+
+from blendplot.scaling import *
+
+def fit_chunked(scaler, data, chunk_size):
+    for i in range(0, len(data), chunk_size):
+        scaler.partial_fit(data[i:i + chunk_size])
+    return scaler
+
+def sklearn_scale(name, data):
+    with warnings.catch_warnings():
+        # sklearn warns when it has to center the data a second time
+        warnings.simplefilter("ignore")
+        return getattr(preprocessing, name)(data)
+
+class TestScaling(unittest.TestCase):
+    def setUp(self):
+        self.data = np.random.RandomState(0).normal(5.0, 3.0, size=(1000, 3))
+
+    def test_scale_functions(self):
+        datasets = [
+                self.data,
+                np.random.RandomState(1).standard_cauchy(size=(500, 3)) * 1e8,
+                np.array([[1e300, 2.0, 3.0], [1e300, 2.0, 4.0]]),
+                np.array([[1.0, 2.0, 3.0], [1.0, 4.0, 3.0]]),
+                np.zeros((4, 3))
+            ]
+
+        for data in datasets:
+            for name in ["maxabs_scale", "minmax_scale", "normalize", "robust_scale", "scale"]:
+                np.testing.assert_array_equal(scale_functions[name](data), sklearn_scale(name, data))
+
+    def test_scale_functions_dtypes(self):
+        float32_data = self.data.astype(np.float32)
+        integer_data = pd.DataFrame(np.random.RandomState(1).randint(0, 5, size=(20, 3)))
+
+        for data in [float32_data, integer_data]:
+            for name in ["maxabs_scale", "minmax_scale", "normalize", "robust_scale", "scale"]:
+                actual = scale_functions[name](data)
+                expected = sklearn_scale(name, data)
+
+                self.assertEqual(expected.dtype, actual.dtype)
+                np.testing.assert_array_equal(actual, expected)
+
+    def test_scale_functions_copy(self):
+        data = self.data.copy()
+
+        for name in ["maxabs_scale", "minmax_scale", "normalize", "robust_scale", "scale"]:
+            scale_functions[name](data)
+
+        np.testing.assert_array_equal(self.data, data)
+
+    def test_standard_scaler(self):
+        scaler = fit_chunked(StandardScaler(), self.data, 7)
+
+        actual = scaler.transform(self.data)
+        expected = preprocessing.scale(self.data)
+
+        np.testing.assert_allclose(actual, expected, rtol=1e-10, atol=1e-12)
+
+    def test_minmax_scaler(self):
+        scaler = fit_chunked(MinMaxScaler(), self.data, 7)
+
+        actual = scaler.transform(self.data)
+        expected = preprocessing.minmax_scale(self.data)
+
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_maxabs_scaler(self):
+        scaler = fit_chunked(MaxAbsScaler(), self.data, 7)
+
+        actual = scaler.transform(self.data)
+        expected = preprocessing.maxabs_scale(self.data)
+
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_normalizer(self):
+        scaler = fit_chunked(Normalizer(), self.data, 7)
+
+        actual = scaler.transform(self.data)
+        expected = preprocessing.normalize(self.data)
+
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_robust_scaler_exact(self):
+        scaler = fit_chunked(RobustScaler(), self.data, 7)
+
+        actual = scaler.transform(self.data)
+        expected = preprocessing.robust_scale(self.data)
+
+        self.assertTrue(scaler.sketch.exact)
+        np.testing.assert_array_equal(actual, expected)
+
+    def test_robust_scaler_approximate(self):
+        data = np.random.RandomState(1).standard_cauchy(size=(200000, 3))
+        error = 0.01
+
+        scaler = fit_chunked(RobustScaler(error), data, 1000)
+
+        self.assertFalse(scaler.sketch.exact)
+        self.assertLessEqual(scaler.sketch.rank_error_bound, error * len(data))
+
+        sorted_data = np.sort(data, axis=0)
+        for (percentile, estimate) in zip([25.0, 50.0, 75.0], scaler.sketch.quantiles([25.0, 50.0, 75.0])):
+            for column in range(data.shape[1]):
+                rank = np.searchsorted(sorted_data[:, column], estimate[column])
+                expected_rank = percentile / 100.0 * (len(data) - 1)
+                self.assertLessEqual(abs(rank - expected_rank), error * len(data))
+
+    def test_constant_column(self):
+        data = np.array([[1.0, 2.0, 3.0], [1.0, 4.0, 3.0]])
+
+        for (name, function) in [("scale", preprocessing.scale), ("minmax_scale", preprocessing.minmax_scale), ("maxabs_scale", preprocessing.maxabs_scale), ("robust_scale", preprocessing.robust_scale)]:
+            scaler = streaming_scalers[name]().partial_fit(data)
+
+            np.testing.assert_allclose(scaler.transform(data), function(data))
+
+    def test_constant_column_rounding(self):
+        # Accumulating the variance of a constant 0.1 column leaves a few ulps
+        # of rounding error, which must still be treated as a zero scale
+        data = self.data.copy()
+        data[:, 0] = 0.1
+
+        for (name, scaler) in streaming_scalers.items():
+            if name == "normalize":
+                continue
+            scaler = fit_chunked(scaler(), data, 7)
+            expected = scale_functions[name](data)
+
+            np.testing.assert_allclose(scaler.transform(data)[:, 0], expected[:, 0], atol=1e-12)
+            np.testing.assert_allclose(scaler.freeze().transform(data)[:, 0], expected[:, 0], atol=1e-12)
+
+    def test_freeze(self):
+        new_data = np.random.RandomState(2).normal(5.0, 3.0, size=(100, 3))
+
+        for (name, scaler) in streaming_scalers.items():
+            scaler = fit_chunked(scaler(), self.data, 7)
+            frozen = scaler.freeze()
+
+            np.testing.assert_allclose(frozen.transform(new_data), scaler.transform(new_data), rtol=1e-12, atol=1e-12)
+
+            # Fitting a frozen scaler to more data leaves it unchanged
+            frozen.partial_fit(new_data * 10.0)
+            np.testing.assert_allclose(frozen.transform(new_data), scaler.transform(new_data), rtol=1e-12, atol=1e-12)
+
+    def test_freeze_scaling(self):
+        # Beyond the capacity of the quantile sketch, so that only the exact
+        # quantiles match robust_scale
+        data = np.random.RandomState(3).standard_cauchy(size=(50000, 3))
+
+        for (name, function) in scale_functions.items():
+            frozen = freeze_scaling(name, data)
+
+            np.testing.assert_allclose(frozen.transform(data), function(data), rtol=1e-12, atol=1e-12)
+
+@settings(deadline=None)
+@given(
+  hnp.arrays(float, st.tuples(st.integers(1, 50), st.just(3)), elements=st.floats(-1e6, 1e6)),
+  st.sampled_from(["maxabs_scale", "minmax_scale", "normalize", "robust_scale", "scale"])
+  )
+def test_scale_functions_match_sklearn(data, name):
+    """
+    Each scaling function should give exactly the same results as the sklearn
+    function of the same name.
+    """
+    np.testing.assert_array_equal(scale_functions[name](data), sklearn_scale(name, data))
+
+@settings(deadline=None)
+@given(
+  hnp.arrays(float, st.tuples(st.integers(1, 50), st.just(3)), elements=st.floats(-1e6, 1e6)),
+  st.integers(1, 10)
+  )
+def test_quantile_sketch_exact(data, chunk_size):
+    """
+    A QuantileSketch that has not had to compact any data should give exactly
+    the same percentiles as numpy.
+    """
+    sketch = QuantileSketch()
+    for i in range(0, len(data), chunk_size):
+        sketch.update(data[i:i + chunk_size])
+
+    assert sketch.exact
+    assert sketch.count == len(data)
+    np.testing.assert_array_equal(sketch.quantiles([25.0, 75.0]), np.percentile(data, [25.0, 75.0], axis=0))
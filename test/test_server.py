@@ -0,0 +1,187 @@
+import io
+import os
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import unittest
+
+from blendplot.cache import MemoryCache
+from blendplot.obj_graph import plot_file
+from blendplot.server import *
+from blendplot.stats import PlotStats
+
+import utilities
+
+def plot_job(argv, cache=None):
+    """
+    Plots the data file and columns given by the arguments to the output file
+    given by the arguments, as a stand in for the blendplot command line.
+    """
+    (input_filename, output_filename, x, y, z) = argv
+    if not os.path.exists(input_filename):
+        print("Missing data file: %s" % input_filename, file=sys.stderr)
+        sys.exit(1)
+
+    stats = PlotStats()
+    with open(output_filename, "w") as output_file:
+        points = plot_file(input_filename, output_file, None, [x, y, z], 0.5, 0.1, None, "scale", stats=stats, cache=cache)
+    print("Plotted %s points, with %s cache hits" % (points, stats.counters.get("cache_hits", 0)))
+
+class TestServer(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        self.socket_path = os.path.join(self.directory, "server.sock")
+        shutil.copy("test/resources/data_01.csv", os.path.join(self.directory, "data.csv"))
+
+    def start_server(self, handle_job=plot_job):
+        plot_server = PlotServer(self.socket_path, handle_job)
+        thread = threading.Thread(target=plot_server.serve, daemon=True)
+        thread.start()
+
+        def stop():
+            if not plot_server.stopping:
+                send_request(self.socket_path, {"command": "stop"})
+            thread.join()
+            plot_server.server_close()
+        self.addCleanup(stop)
+
+        return plot_server
+
+    def plot(self, argv):
+        return send_request(self.socket_path, {"command": "plot", "argv": argv, "cwd": self.directory})
+
+    def test_plot(self):
+        self.start_server()
+
+        result = self.plot(["data.csv", "plot.obj", "a", "b", "c"])
+
+        expected = io.StringIO()
+        plot_file("test/resources/data_01.csv", expected, None, ["a", "b", "c"], 0.5, 0.1, None, "scale")
+        with open(os.path.join(self.directory, "plot.obj"), "r") as output_file:
+            self.assertEqual(expected.getvalue(), output_file.read())
+
+        self.assertEqual({"exit_code": 0, "stdout": "Plotted 5 points, with 0 cache hits\n", "stderr": ""}, result)
+        self.assertNotEqual(self.directory, os.getcwd())
+
+    def test_exit_code_and_output(self):
+        self.start_server()
+
+        result = self.plot(["missing.csv", "plot.obj", "a", "b", "c"])
+
+        self.assertEqual({"exit_code": 1, "stdout": "", "stderr": "Missing data file: missing.csv\n"}, result)
+
+    def test_exception(self):
+        self.start_server()
+
+        result = self.plot(["data.csv", "plot.obj"])
+
+        self.assertEqual(1, result["exit_code"])
+        self.assertIn("Traceback", result["stderr"])
+        self.assertIn("ValueError", result["stderr"])
+
+        # The server keeps running after a failed plot
+        self.assertEqual(0, self.plot(["data.csv", "plot.obj", "a", "b", "c"])["exit_code"])
+
+    def test_exit_message(self):
+        def handle_job(argv):
+            sys.exit("Invalid arguments")
+        self.start_server(handle_job)
+
+        self.assertEqual({"exit_code": 1, "stdout": "", "stderr": "Invalid arguments\n"}, self.plot([]))
+
+    def test_memory_cache(self):
+        cache = MemoryCache(os.path.join(self.directory, "cache"))
+        self.start_server(lambda argv: plot_job(argv, cache))
+
+        self.assertEqual("Plotted 5 points, with 0 cache hits\n", self.plot(["data.csv", "first.obj", "a", "b", "c"])["stdout"])
+        shutil.rmtree(os.path.join(self.directory, "cache"))
+        self.assertEqual("Plotted 5 points, with 1 cache hits\n", self.plot(["data.csv", "second.obj", "a", "b", "c"])["stdout"])
+
+    def test_ping_and_stop(self):
+        plot_server = self.start_server()
+
+        self.assertEqual(0, send_request(self.socket_path, {"command": "ping"})["exit_code"])
+        self.assertEqual(0, send_request(self.socket_path, {"command": "stop"})["exit_code"])
+        self.assertTrue(plot_server.stopping)
+
+    def test_invalid_requests(self):
+        self.start_server()
+
+        self.assertEqual({"exit_code": 1, "stdout": "", "stderr": "Invalid command: draw\n"}, send_request(self.socket_path, {"command": "draw"}))
+        self.assertEqual({"exit_code": 1, "stdout": "", "stderr": "Invalid request\n"}, send_request(self.socket_path, []))
+
+    def test_plot_remote(self):
+        self.start_server()
+
+        previous_dir = os.getcwd()
+        os.chdir(self.directory)
+        try:
+            (exit_code, err) = utilities.capture_stderr(lambda _: plot_remote(self.socket_path, ["missing.csv", "plot.obj", "a", "b", "c"]))
+        finally:
+            os.chdir(previous_dir)
+
+        self.assertEqual(1, exit_code)
+        self.assertEqual("Missing data file: missing.csv\n", err)
+
+    def test_socket_permissions(self):
+        self.start_server()
+
+        self.assertEqual(0o600, os.stat(self.socket_path).st_mode & 0o777)
+
+    def test_socket_permissions_when_bound(self):
+        modes = []
+        class RecordingServer(PlotServer):
+            def server_activate(self):
+                modes.append(os.stat(self.server_address).st_mode & 0o777)
+                PlotServer.server_activate(self)
+
+        previous_umask = os.umask(0)
+        try:
+            plot_server = RecordingServer(self.socket_path, plot_job)
+            plot_server.server_close()
+        finally:
+            self.assertEqual(0, os.umask(previous_umask))
+
+        self.assertEqual([0o600], modes)
+
+    def test_already_running(self):
+        self.start_server()
+
+        with self.assertRaises(OSError):
+            PlotServer(self.socket_path, plot_job)
+
+    def test_stale_socket(self):
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(self.socket_path)
+        stale.close()
+
+        self.start_server()
+
+        self.assertEqual(0, send_request(self.socket_path, {"command": "ping"})["exit_code"])
+
+    def test_not_a_socket(self):
+        with open(self.socket_path, "w") as other_file:
+            other_file.write("data")
+
+        with self.assertRaises(OSError):
+            PlotServer(self.socket_path, plot_job)
+        self.assertTrue(os.path.exists(self.socket_path))
+
+    def test_socket_removed_on_close(self):
+        plot_server = PlotServer(self.socket_path, plot_job)
+        plot_server.server_close()
+
+        self.assertFalse(os.path.exists(self.socket_path))
+        with self.assertRaises(OSError):
+            send_request(self.socket_path, {"command": "ping"})
+
+    def test_client_imports(self):
+        # The client only needs the standard library, so it starts quickly
+        script = "import sys, blendplot.server; print(sorted(set(['numpy', 'pandas']) & set(sys.modules)))"
+        result = subprocess.run([sys.executable, "-c", script], stdout=subprocess.PIPE, check=True)
+
+        self.assertEqual(b"[]\n", result.stdout)
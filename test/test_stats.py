@@ -0,0 +1,87 @@
+import io
+import threading
+import time
+import unittest
+
+from blendplot.obj_graph import plot_file
+from blendplot.stats import *
+
+class TestStats(unittest.TestCase):
+    def test_stage_exclusive(self):
+        stats = PlotStats()
+
+        with stats.stage("format"):
+            time.sleep(0.01)
+            with stats.stage("write"):
+                time.sleep(0.05)
+            time.sleep(0.01)
+
+        self.assertGreaterEqual(stats.stage_seconds["write"], 0.05)
+        self.assertLess(stats.stage_seconds["format"], 0.05)
+        self.assertGreaterEqual(stats.stage_seconds["format"], 0.02)
+
+    def test_hooks(self):
+        calls = []
+        hooks = {
+                "write": lambda stage, seconds, stats: calls.append(("write", stage)),
+                "*": lambda stage, seconds, stats: calls.append(("*", stage))
+            }
+        stats = PlotStats(hooks)
+
+        with stats.stage("format"):
+            with stats.stage("write"):
+                pass
+
+        self.assertEqual(calls, [("write", "write"), ("*", "write"), ("*", "format")])
+
+    def test_stage_threads(self):
+        stats = PlotStats()
+
+        def write():
+            with stats.stage("write"):
+                time.sleep(0.05)
+
+        with stats.stage("format"):
+            thread = threading.Thread(target=write)
+            thread.start()
+            thread.join()
+
+        # Stages on other threads are not nested in the stages of this one
+        self.assertGreaterEqual(stats.stage_seconds["write"], 0.05)
+        self.assertGreaterEqual(stats.stage_seconds["format"], 0.05)
+
+    def test_timed_iter(self):
+        stats = PlotStats()
+
+        actual = list(stats.timed_iter("read", [1, 2, 3]))
+
+        self.assertEqual(actual, [1, 2, 3])
+        self.assertIn("read", stats.stage_seconds)
+
+    def test_timed_file(self):
+        stats = PlotStats()
+        output_file = io.StringIO()
+
+        timed_file = TimedFile(output_file, stats)
+        timed_file.write("abc")
+        timed_file.write("é")
+
+        self.assertEqual(output_file.getvalue(), "abcé")
+        self.assertEqual(stats.counters["bytes_written"], 5)
+
+    def test_plot_file_stats(self):
+        for chunk_size in [None, 2]:
+            stats = PlotStats()
+            output_file = io.StringIO()
+
+            actual_ret = plot_file("test/resources/data_01.csv", output_file, None, ["a", "b", "c"], 0.5, 0.1, "category", "scale", chunk_size, stats=stats)
+
+            self.assertEqual(actual_ret, 5)
+            self.assertEqual(stats.counters["rows_read"], 5)
+            self.assertEqual(stats.counters["rows_dropped"], 0)
+            self.assertEqual(stats.counters["points"], 5)
+            self.assertEqual(stats.counters["bytes_written"], len(output_file.getvalue()))
+            self.assertEqual(dict(stats.category_points), {"A": 2, "B": 1, "C": 2})
+
+            for stage in ["read", "validate", "dropna", "scale", "group", "format", "write"]:
+                self.assertIn(stage, stats.stage_seconds)
@@ -1,6 +1,10 @@
 import io
+import numpy as np
 import sys
 
+from blendplot.obj_graph import plot_file
+from blendplot.ply import VERTEX_DTYPE, face_dtype
+
 def capture_stderr(func):
     err, sys.stderr = sys.stderr, io.StringIO()
     value = None
@@ -12,3 +16,61 @@ def capture_stderr(func):
         sys.stderr = err
 
     return value
+
+def assert_obj_close(actual, expected, tolerance=1e-12):
+    """
+    Asserts that the two given obj file strings contain the same lines, with
+    the vertex positions only needing to be equal within the given tolerance.
+    """
+    actual_lines = actual.splitlines()
+    expected_lines = expected.splitlines()
+    assert len(actual_lines) == len(expected_lines)
+
+    for (actual_line, expected_line) in zip(actual_lines, expected_lines):
+        if expected_line.startswith("v "):
+            actual_values = [float(v) for v in actual_line.split()[1:]]
+            expected_values = [float(v) for v in expected_line.split()[1:]]
+            np.testing.assert_allclose(actual_values, expected_values, rtol=tolerance, atol=tolerance)
+        else:
+            assert actual_line == expected_line
+
+def plot_file_output(output_format="obj", **kwargs):
+    """
+    Returns the contents of the file written by plotting the columns "a", "b"
+    and "c" of the test data file in the given format, with any other
+    arguments to plot_file overriding the defaults.
+    """
+    arguments = dict(input_filename="test/resources/data_01.csv", num_rows=None, columns=["a", "b", "c"], spacing=0.5, point_size=0.1, category_column="category", scale_function="scale")
+    arguments.update(kwargs)
+
+    output_file = io.StringIO() if output_format == "obj" else io.BytesIO()
+    plot_file(output_file=output_file, output_format=output_format, **arguments)
+    return output_file.getvalue()
+
+def read_ply(data, face_size=4):
+    """
+    Returns the header lines, verticies and faces of the given binary ply file,
+    which has faces with the given number of verticies.
+    """
+    (header, body) = data.split(b"end_header\n", 1)
+    header_lines = header.decode("ascii").splitlines()
+
+    counts = dict((line.split()[1], int(line.split()[2])) for line in header_lines if line.startswith("element"))
+    vertex_size = counts["vertex"] * VERTEX_DTYPE.itemsize
+
+    verticies = np.frombuffer(body[:vertex_size], dtype=VERTEX_DTYPE)
+    faces = np.frombuffer(body[vertex_size:], dtype=face_dtype(face_size))
+
+    assert len(faces) == counts["face"]
+
+    return (header_lines, verticies, faces)
+
+def read_obj(text):
+    """
+    Returns the object names, verticies and faces of the given obj file.
+    """
+    objects = [line[2:] for line in text.splitlines() if line.startswith("o ")]
+    verticies = [[float(v) for v in line.split()[1:]] for line in text.splitlines() if line.startswith("v ")]
+    faces = [[int(v) for v in line.split()[1:]] for line in text.splitlines() if line.startswith("f ")]
+
+    return (objects, np.array(verticies), np.array(faces))